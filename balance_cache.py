@@ -0,0 +1,145 @@
+import base64
+import logging
+import time
+from collections import OrderedDict
+
+from balances import balance_accounts, decode_token_amount, is_sol, make_balance
+from tokenInfo import SOL_MINT
+from ws_manager import ws_manager
+
+logger = logging.getLogger(__name__)
+
+MAX_SUBSCRIPTIONS = 500
+# How long a balance without a live subscription may be served before it is refetched
+POLL_TTL = 10.0
+
+
+class BalanceEntry:
+    __slots__ = ("account", "decimals", "balance", "updated_at", "listener")
+
+    def __init__(self, account, balance):
+        self.account = account
+        self.decimals = balance['decimals']
+        self.balance = balance
+        self.updated_at = time.monotonic()
+        self.listener = None
+
+
+class BalanceCache:
+    """
+    (owner, mint) balances kept in memory and updated in place by accountSubscribe
+    pushes (via the shared ws_manager) for the owner's SOL account or token ATA.
+    Subscriptions are bounded; the least recently read balance is unsubscribed first.
+    While the websocket is down, balances are served for POLL_TTL and then refetched.
+    """
+
+    def __init__(self, max_subscriptions: int = MAX_SUBSCRIPTIONS, poll_ttl: float = POLL_TTL,
+                 commitment: str = "confirmed"):
+        self.max_subscriptions = max_subscriptions
+        self.poll_ttl = poll_ttl
+        self.commitment = commitment
+        self._entries = OrderedDict()  # (owner, mint) -> BalanceEntry
+        self.stats = {
+            "hits": 0,
+            "fetches": 0,
+            "pushes": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def _key(owner: str, mint: str):
+        return (owner, SOL_MINT) if is_sol(owner, mint) else (owner, mint)
+
+    def _fresh(self, entry: BalanceEntry) -> bool:
+        # Pushes keep an entry fresh only once it was refreshed after the (re)subscription;
+        # changes before the server acknowledged it were never pushed
+        active_since = entry.listener.active_since if entry.listener is not None else None
+        if active_since is not None and entry.updated_at >= active_since:
+            return True
+        return time.monotonic() - entry.updated_at < self.poll_ttl
+
+    async def get(self, owner: str, mint: str, client=None) -> dict:
+        """Balance for (owner, mint) in the Wallet.get_token_balance shape"""
+        return (await self.get_many([(owner, mint)], client=client))[(owner, mint)]
+
+    async def get_many(self, pairs, client=None) -> dict:
+        """Balances for many (owner, mint) pairs; only unknown or stale ones hit the RPC"""
+        balances = {}
+        missing = []
+        for owner, mint in pairs:
+            key = self._key(owner, mint)
+            entry = self._entries.get(key)
+            if entry is not None and self._fresh(entry):
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                balances[(owner, mint)] = entry.balance
+            else:
+                missing.append((owner, mint))
+
+        if missing:
+            self.stats["fetches"] += 1
+            fetched = await balance_accounts(missing, client=client)
+            for (owner, mint), (account, balance) in fetched.items():
+                balances[(owner, mint)] = balance
+                if account is not None:
+                    self._store(self._key(owner, mint), account, balance)
+            self._evict()
+        return balances
+
+    def invalidate(self, owner: str, mint: str):
+        """Force the next read of (owner, mint) to the RPC (e.g. a trade just moved it); the subscription stays"""
+        entry = self._entries.get(self._key(owner, mint))
+        if entry is not None:
+            entry.updated_at = float("-inf")
+            self.stats["invalidations"] += 1
+
+    def _store(self, key, account: str, balance: dict):
+        entry = self._entries.get(key)
+        if entry is not None and entry.account == account:
+            entry.balance = balance
+            entry.decimals = balance['decimals']
+            entry.updated_at = time.monotonic()
+            self._entries.move_to_end(key)
+            return
+        if entry is not None:
+            self._drop(key)
+        entry = BalanceEntry(account, balance)
+        self._entries[key] = entry
+        entry.listener = ws_manager.subscribe(
+            "account",
+            [account, {"encoding": "base64", "commitment": self.commitment}],
+            callback=lambda result: self._on_notification(key, entry, result),
+        )
+
+    def _evict(self):
+        while len(self._entries) > self.max_subscriptions:
+            self._drop(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        if entry.listener is not None:
+            ws_manager.unsubscribe(entry.listener)
+            entry.listener = None
+
+    def _on_notification(self, key, entry: BalanceEntry, result: dict):
+        if self._entries.get(key) is not entry:
+            return
+        value = result["value"]
+        if key[1] == SOL_MINT:
+            amount = value["lamports"] if value else 0
+        else:
+            amount = decode_token_amount(base64.b64decode(value["data"][0])) if value else 0
+        entry.balance = make_balance(amount, entry.decimals)
+        entry.updated_at = time.monotonic()
+        self.stats["pushes"] += 1
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["entries"] = len(self._entries)
+        stats["subscribed"] = sum(1 for entry in self._entries.values() if entry.listener and entry.listener.active)
+        return stats
+
+
+balance_cache = BalanceCache()
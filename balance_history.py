@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+
+from db_handler_aio import (
+    get_balance_rollups,
+    get_balance_samples,
+    prune_balance_history,
+    write_balance_history,
+)
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+RESOLUTIONS = (MINUTE, HOUR, DAY)
+
+# Raw samples kept in memory per (wallet, mint)
+RING_SIZE = 512
+MAX_SERIES = 10_000
+FLUSH_INTERVAL = 5.0
+FLUSH_BATCH = 500
+
+# Retention on disk
+SAMPLE_RETENTION = 2 * DAY
+ROLLUP_RETENTION = {MINUTE: 30 * DAY, HOUR: 365 * DAY, DAY: None}
+PRUNE_INTERVAL = HOUR
+
+# Range queries pick the finest resolution whose data still fits in about this many points
+MAX_POINTS = 500
+
+
+class BalanceHistory:
+    """
+    Balance time series per (wallet, mint).
+    Recent samples live in fixed-size ring buffers; every sample is written behind
+    to SQLite in batches, together with minute/hour/day rollups for longer ranges.
+    Timestamps are unix seconds.
+    """
+
+    def __init__(self, ring_size: int = RING_SIZE, max_series: int = MAX_SERIES,
+                 flush_interval: float = FLUSH_INTERVAL, flush_batch: int = FLUSH_BATCH):
+        self.ring_size = ring_size
+        self.max_series = max_series
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._series = OrderedDict()  # (wallet, mint) -> deque of (ts, balance)
+        self._pending_samples = []
+        self._pending_rollups = {}  # (wallet, mint, resolution, bucket) -> [open, high, low, close, samples]
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._last_prune = 0.0
+        self.stats = {
+            "recorded": 0,
+            "flushes": 0,
+            "flushed_samples": 0,
+            "flush_errors": 0,
+            "warm_loads": 0,
+        }
+
+    async def _ring(self, wallet: str, mint: str) -> deque:
+        key = (wallet, mint)
+        ring = self._series.get(key)
+        if ring is None:
+            # First touch since start: seed the ring from disk so changes survive restarts
+            self.stats["warm_loads"] += 1
+            await self.flush()
+            samples = await get_balance_samples(wallet, mint, 0, time.time(), limit=self.ring_size) or []
+            ring = self._series.get(key)
+            if ring is None:
+                ring = deque(samples, maxlen=self.ring_size)
+                self._series[key] = ring
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        self._series.move_to_end(key)
+        return ring
+
+    async def record(self, wallet: str, mint: str, balance: float, ts: float = None):
+        """Append a sample; it reaches SQLite on the next flush"""
+        ts = time.time() if ts is None else ts
+        ring = await self._ring(wallet, mint)
+        ring.append((ts, balance))
+        self._pending_samples.append((wallet, mint, ts, balance))
+        for resolution in RESOLUTIONS:
+            bucket_key = (wallet, mint, resolution, ts - ts % resolution)
+            bucket = self._pending_rollups.get(bucket_key)
+            if bucket is None:
+                self._pending_rollups[bucket_key] = [balance, balance, balance, balance, 1]
+            else:
+                bucket[1] = max(bucket[1], balance)
+                bucket[2] = min(bucket[2], balance)
+                bucket[3] = balance
+                bucket[4] += 1
+        self.stats["recorded"] += 1
+        if len(self._pending_samples) >= self.flush_batch:
+            self._wakeup.set()
+
+    async def latest(self, wallet: str, mint: str):
+        """Most recent (ts, balance), or None"""
+        ring = await self._ring(wallet, mint)
+        return ring[-1] if ring else None
+
+    async def change(self, wallet: str, mint: str, window: float = None):
+        """
+        Change of the latest balance against the previous sample, or against the
+        balance `window` seconds ago. Returns (current, change_percent, is_increase) or None.
+        """
+        ring = await self._ring(wallet, mint)
+        if not ring:
+            return None
+        ts, current = ring[-1]
+        if window is None:
+            if len(ring) < 2:
+                return current, 0, False
+            previous = ring[-2][1]
+        else:
+            previous = await self._balance_at(wallet, mint, ring, ts - window)
+            if previous is None:
+                return current, 0, False
+        if previous <= 0:
+            return current, 0, False
+        return current, (current - previous) / previous * 100, current > previous
+
+    async def _balance_at(self, wallet: str, mint: str, ring: deque, at: float):
+        if ring and ring[0][0] <= at:
+            # Newest sample at or before `at`; the ring is short, so scan from the end
+            for ts, balance in reversed(ring):
+                if ts <= at:
+                    return balance
+        await self.flush()
+        samples = await get_balance_samples(wallet, mint, 0, at, limit=1)
+        if samples:
+            return samples[-1][1]
+        for resolution in RESOLUTIONS:
+            rollups = await get_balance_rollups(wallet, mint, resolution, 0, at)
+            if rollups:
+                return rollups[-1][4]
+        return None
+
+    async def get_range(self, wallet: str, mint: str, start: float, end: float = None,
+                        resolution: int = None) -> list:
+        """
+        Points for charts between start and end: [(ts, balance)] from raw samples, or
+        [(bucket, open, high, low, close)] when downsampled. With resolution=None the
+        finest resolution that keeps the range within MAX_POINTS is picked (0 = raw).
+        """
+        end = time.time() if end is None else end
+        if resolution is None:
+            span = end - start
+            resolution = 0
+            if span > SAMPLE_RETENTION or span / MINUTE > MAX_POINTS:
+                resolution = next((r for r in RESOLUTIONS if span / r <= MAX_POINTS), DAY)
+        if resolution == 0:
+            ring = await self._ring(wallet, mint)
+            if ring and ring[0][0] <= start:
+                return [sample for sample in ring if start <= sample[0] <= end]
+            await self.flush()
+            return await get_balance_samples(wallet, mint, start, end) or []
+        await self.flush()
+        return await get_balance_rollups(wallet, mint, resolution, start - start % resolution, end) or []
+
+    async def flush(self):
+        """Write pending samples and rollups to SQLite in one transaction"""
+        async with self._flush_lock:
+            if not self._pending_samples:
+                return
+            samples, self._pending_samples = self._pending_samples, []
+            rollups, self._pending_rollups = self._pending_rollups, {}
+            # Both or neither: a half-written batch would be written again on retry
+            ok = await write_balance_history(samples, [(*key, *values) for key, values in rollups.items()])
+            if not ok:
+                # error_decorator already logged it; keep the batch for the next attempt
+                self.stats["flush_errors"] += 1
+                self._pending_samples = samples + self._pending_samples
+                for key, values in rollups.items():
+                    self._merge_rollup(key, values)
+                return
+            self.stats["flushes"] += 1
+            self.stats["flushed_samples"] += len(samples)
+
+    def _merge_rollup(self, key, values):
+        newer = self._pending_rollups.get(key)
+        if newer is None:
+            self._pending_rollups[key] = values
+        else:
+            self._pending_rollups[key] = [values[0], max(values[1], newer[1]), min(values[2], newer[2]),
+                                          newer[3], values[4] + newer[4]]
+
+    async def prune(self):
+        now = time.time()
+        await prune_balance_history(
+            now - SAMPLE_RETENTION,
+            {resolution: now - retention for resolution, retention in ROLLUP_RETENTION.items() if retention},
+        )
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+                    self._last_prune = time.monotonic()
+                    await self.prune()
+            except Exception as e:
+                logger.error(f"Balance history flush failed: {e}")
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["series"] = len(self._series)
+        stats["pending"] = len(self._pending_samples)
+        return stats
+
+
+balance_history = BalanceHistory()
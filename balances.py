@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from functools import lru_cache
+
+from solders.pubkey import Pubkey # type: ignore
+
+from rpc_transport import get_rpc_client
+from tokenInfo import SOL_MINT
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+TOKEN_2022_PROGRAM_ID = Pubkey.from_string("TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb")
+ASSOCIATED_TOKEN_PROGRAM_ID = Pubkey.from_string("ATokenGPvbdGVxr1b1hRzve2e8MdsYfbYXyuC2H1rMAj")
+
+# getMultipleAccounts accepts at most 100 keys per call
+MAX_ACCOUNTS_PER_REQUEST = 100
+SOL_DECIMALS = 9
+
+# SPL token account / mint layouts (Token-2022 shares the base layout)
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64
+MINT_DECIMALS_OFFSET = 44
+
+
+@lru_cache(maxsize=100_000)
+def derive_ata(owner: str, mint: str, token_program: Pubkey = TOKEN_PROGRAM_ID) -> Pubkey:
+    """Associated token address for (owner, mint); memoized since it never changes"""
+    address, _ = Pubkey.find_program_address(
+        [bytes(Pubkey.from_string(owner)), bytes(token_program), bytes(Pubkey.from_string(mint))],
+        ASSOCIATED_TOKEN_PROGRAM_ID,
+    )
+    return address
+
+
+@lru_cache(maxsize=100_000)
+def _pubkey(address: str) -> Pubkey:
+    return Pubkey.from_string(address)
+
+
+def is_sol(owner: str, mint: str) -> bool:
+    # The wallet code uses either the owner address or the SOL mint to mean native SOL
+    return mint == SOL_MINT or mint == owner
+
+
+def make_balance(amount: int, decimals: int) -> dict:
+    """Balance in the same shape Wallet.get_token_balance returns"""
+    return {
+        'decimals': decimals,
+        'balance': {
+            'int': amount,
+            'float': float(amount / 10 ** decimals) if decimals else float(amount),
+        }
+    }
+
+
+def decode_token_amount(data: bytes) -> int:
+    return int.from_bytes(data[TOKEN_ACCOUNT_AMOUNT_OFFSET:TOKEN_ACCOUNT_AMOUNT_OFFSET + 8], "little")
+
+
+def decode_mint_decimals(data: bytes) -> int:
+    return data[MINT_DECIMALS_OFFSET]
+
+
+async def fetch_accounts(addresses, client=None) -> dict:
+    """getMultipleAccounts for any number of addresses, in concurrent chunks of 100"""
+    client = client or get_rpc_client()
+    addresses = list(dict.fromkeys(addresses))
+    chunks = [addresses[i:i + MAX_ACCOUNTS_PER_REQUEST] for i in range(0, len(addresses), MAX_ACCOUNTS_PER_REQUEST)]
+    responses = await asyncio.gather(*(
+        client.get_multiple_accounts([_pubkey(address) for address in chunk], encoding="base64")
+        for chunk in chunks
+    ))
+    accounts = {}
+    for chunk, response in zip(chunks, responses):
+        accounts.update(zip(chunk, response.value))
+    return accounts
+
+
+async def balance_accounts(pairs, client=None) -> dict:
+    """
+    Balances for many (owner, mint) pairs in one batched getMultipleAccounts pass,
+    together with the account each balance lives in.
+    SOL balances come from the owner accounts; token balances from the owners' ATAs
+    (SPL Token and Token-2022) with decimals read from the mint accounts.
+    Returns {(owner, mint): (account address, balance)} with missing accounts reported as zero.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    addresses = []
+    for owner, mint in pairs:
+        if is_sol(owner, mint):
+            addresses.append(owner)
+        else:
+            addresses.append(mint)
+            addresses.append(str(derive_ata(owner, mint)))
+            addresses.append(str(derive_ata(owner, mint, TOKEN_2022_PROGRAM_ID)))
+
+    accounts = await fetch_accounts(addresses, client=client)
+
+    balances = {}
+    for owner, mint in pairs:
+        if is_sol(owner, mint):
+            account = accounts.get(owner)
+            balances[(owner, mint)] = (owner, make_balance(account.lamports if account else 0, SOL_DECIMALS))
+            continue
+
+        mint_account = accounts.get(mint)
+        if mint_account is None:
+            balances[(owner, mint)] = (None, make_balance(0, 0))
+            continue
+        decimals = decode_mint_decimals(bytes(mint_account.data))
+        token_program = TOKEN_2022_PROGRAM_ID if mint_account.owner == TOKEN_2022_PROGRAM_ID else TOKEN_PROGRAM_ID
+        ata = str(derive_ata(owner, mint, token_program))
+        ata_account = accounts.get(ata)
+        amount = decode_token_amount(bytes(ata_account.data)) if ata_account else 0
+        balances[(owner, mint)] = (ata, make_balance(amount, decimals))
+    return balances
+
+
+async def get_balances(pairs, client=None) -> dict:
+    """Balances for many (owner, mint) pairs in one batched pass: {(owner, mint): balance}"""
+    accounts = await balance_accounts(pairs, client=client)
+    return {pair: balance for pair, (_, balance) in accounts.items()}
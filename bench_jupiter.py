@@ -0,0 +1,181 @@
+# Microbenchmark of the swap hot path: the jupiter_python_sdk-style path
+# (unpooled httpx.get/httpx.post per call, base64 strings and full
+# VersionedTransaction round trips) against jupiter_client + tx_codec.
+# The HTTP part runs against a local stub of the Jupiter API, so it measures
+# client overhead, not Jupiter.
+#
+#   python bench_jupiter.py [iterations]
+
+import asyncio
+import base64
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+from aiohttp import web
+from solders.address_lookup_table_account import AddressLookupTableAccount # type: ignore
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price # type: ignore
+from solders.hash import Hash # type: ignore
+from solders.instruction import AccountMeta, Instruction # type: ignore
+from solders.keypair import Keypair # type: ignore
+from solders.message import MessageV0, to_bytes_versioned # type: ignore
+from solders.pubkey import Pubkey # type: ignore
+from solders.signature import Signature # type: ignore
+from solders.transaction import VersionedTransaction # type: ignore
+
+from compute_budget import with_compute_budget
+from http_session import open_http_session, close_http_session
+from jupiter_client import JupiterClient
+from tx_codec import parse_message, replace_message, sign_transaction
+
+UNIT_PRICE = 50_000
+UNIT_LIMIT = 180_000
+
+
+def jupiter_like_transaction(payer: Keypair) -> bytes:
+    """Unsigned v0 swap of roughly the size and shape Jupiter returns"""
+    program = Pubkey.new_unique()
+    table_keys = [Pubkey.new_unique() for _ in range(40)]
+    tables = [AddressLookupTableAccount(Pubkey.new_unique(), table_keys[:20]),
+              AddressLookupTableAccount(Pubkey.new_unique(), table_keys[20:])]
+    accounts = [AccountMeta(payer.pubkey(), True, True)]
+    accounts += [AccountMeta(key, False, i % 3 == 0) for i, key in enumerate(table_keys)]
+    accounts += [AccountMeta(Pubkey.new_unique(), False, True) for _ in range(6)]
+    instructions = [
+        set_compute_unit_limit(1_400_000),
+        set_compute_unit_price(10_000),
+        Instruction(program, bytes(24), accounts[:8]),
+        Instruction(program, bytes(120), accounts),
+        Instruction(program, bytes(8), accounts[:4]),
+    ]
+    message = MessageV0.try_compile(payer.pubkey(), instructions, tables, Hash.new_unique())
+    return bytes(VersionedTransaction.populate(message, [Signature.default()]))
+
+
+def sdk_path(transaction_data: str, payer: Keypair) -> bytes:
+    # prepare: decode, patch and re-encode
+    transaction = VersionedTransaction.from_bytes(base64.b64decode(transaction_data))
+    message = with_compute_budget(transaction.message, unit_price=UNIT_PRICE, unit_limit=UNIT_LIMIT)
+    transaction_data = base64.b64encode(bytes(VersionedTransaction.populate(message, transaction.signatures))).decode()
+    # sign: decode again, re-serialize the message to sign it, serialize the whole transaction
+    transaction = VersionedTransaction.from_bytes(base64.b64decode(transaction_data))
+    signature = payer.sign_message(to_bytes_versioned(transaction.message))
+    return bytes(VersionedTransaction.populate(transaction.message, [signature]))
+
+
+def client_path(raw_transaction: bytes, payer: Keypair) -> bytes:
+    message = with_compute_budget(parse_message(raw_transaction), unit_price=UNIT_PRICE, unit_limit=UNIT_LIMIT)
+    signed, _ = sign_transaction(replace_message(raw_transaction, message), payer)
+    return signed
+
+
+def timed(fn, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def timed_async(fn, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(name: str, samples: list, unit: str = "us"):
+    scale = 1e6 if unit == "us" else 1e3
+    ordered = sorted(samples)
+    print(f"  {name:<28} mean {statistics.mean(samples) * scale:9.1f}{unit}"
+          f"  p50 {ordered[len(ordered) // 2] * scale:9.1f}{unit}"
+          f"  p95 {ordered[int(len(ordered) * 0.95)] * scale:9.1f}{unit}")
+
+
+def start_stub(raw_transaction: bytes):
+    """Stub Jupiter API on its own thread and loop, so the blocking SDK-style calls cannot stall it"""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        state["runner"], state["base_url"] = loop.run_until_complete(_serve_stub(raw_transaction))
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(state["runner"].cleanup())
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return loop, state["base_url"]
+
+
+async def _serve_stub(raw_transaction: bytes):
+    quote = {"inAmount": "1000000", "outAmount": "123456789", "priceImpactPct": "0.001",
+             "routePlan": [{"swapInfo": {"ammKey": str(Pubkey.new_unique())}, "percent": 100}]}
+    swap = {"swapTransaction": base64.b64encode(raw_transaction).decode(), "lastValidBlockHeight": 1}
+
+    async def handle_quote(request):
+        return web.json_response(quote)
+
+    async def handle_swap(request):
+        await request.read()
+        return web.json_response(swap)
+
+    app = web.Application()
+    app.router.add_get("/v6/quote", handle_quote)
+    app.router.add_post("/v6/swap", handle_swap)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v6"
+
+
+async def main(iterations: int):
+    payer = Keypair()
+    raw_transaction = jupiter_like_transaction(payer)
+    encoded = base64.b64encode(raw_transaction).decode()
+    assert bytes(sdk_path(encoded, payer)) == bytes(client_path(raw_transaction, payer))
+
+    print(f"Prepare + sign ({len(raw_transaction)} byte transaction, {iterations} iterations)")
+    report("sdk path", timed(lambda: sdk_path(encoded, payer), iterations))
+    report("jupiter_client + tx_codec", timed(lambda: client_path(raw_transaction, payer), iterations))
+
+    stub_loop, base_url = start_stub(raw_transaction)
+    user = str(payer.pubkey())
+    params = {"inputMint": "a", "outputMint": "b", "amount": "1000000", "slippageBps": "50"}
+
+    async def sdk_round_trip():
+        # What the SDK does: module-level httpx calls, a new connection each time, blocking the loop
+        quote = httpx.get(f"{base_url}/quote", params=params).json()
+        result = httpx.post(f"{base_url}/swap", json={
+            "quoteResponse": quote, "userPublicKey": user, "wrapAndUnwrapSol": True}).json()
+        return result["swapTransaction"]
+
+    client = JupiterClient(base_url)
+
+    async def client_round_trip():
+        quote = await client.quote("a", "b", 1000000, 50)
+        return await client.swap_transaction(quote, user)
+
+    await open_http_session()
+    try:
+        await client_round_trip()  # warm the pooled connection
+        http_iterations = max(1, iterations // 10)
+        print(f"Quote + build against a local stub ({http_iterations} iterations)")
+        report("sdk path", await timed_async(sdk_round_trip, http_iterations), unit="ms")
+        report("jupiter_client", await timed_async(client_round_trip, http_iterations), unit="ms")
+    finally:
+        await close_http_session()
+        stub_loop.call_soon_threadsafe(stub_loop.stop)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+
+from solana.rpc.commitment import Confirmed, Processed
+
+from rpc_transport import get_rpc_client, get_tip_slot
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 0.4
+# A blockhash stays valid for 150 blocks, so lastValidBlockHeight - 150 is the tip's block height
+MAX_PROCESSING_AGE = 150
+# Readers get None instead of a hash this old
+MAX_AGE = 10.0
+
+
+class BlockhashCache:
+    """
+    Recent blockhash and lastValidBlockHeight, refreshed by a background task.
+    Reads are plain attribute access, so confirmation and expiry checks never await.
+    The hash is fetched at confirmed commitment, since a processed one can belong to
+    a fork that is dropped; its lag is measured against the processed tip slot.
+    """
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL, max_age: float = MAX_AGE):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.blockhash = None
+        self.last_valid_block_height = None
+        self.slot = None
+        self.tip_slot = None
+        self.fetched_at = 0.0
+        self._task = None
+        self.stats = {
+            "refreshes": 0,
+            "errors": 0,
+            "last_refresh_ms": 0.0,
+        }
+
+    def latest(self):
+        """(blockhash, last_valid_block_height), or None if the cache is empty or too old"""
+        if self.blockhash is None or self.age > self.max_age:
+            return None
+        return self.blockhash, self.last_valid_block_height
+
+    @property
+    def block_height(self):
+        """Estimated chain tip block height at the last refresh"""
+        if self.last_valid_block_height is None or self.age > self.max_age:
+            return None
+        return self.last_valid_block_height - MAX_PROCESSING_AGE
+
+    @property
+    def age(self) -> float:
+        """Seconds since the cached blockhash was fetched"""
+        return time.monotonic() - self.fetched_at if self.fetched_at else float("inf")
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        age = self.age
+        stats["age_ms"] = round(age * 1000, 1) if self.fetched_at else None
+        stats["slot"] = self.slot
+        stats["tip_slot"] = self.tip_slot
+        # How far the cached hash's slot was behind the chain tip when it was fetched
+        stats["slots_behind_tip"] = (max(0, self.tip_slot - self.slot)
+                                     if self.slot is not None and self.tip_slot is not None else None)
+        return stats
+
+    async def refresh(self):
+        started = time.monotonic()
+        client = get_rpc_client()
+        # The router's slot probes already track the tip; ask for it only when nothing probes
+        tip_slot = get_tip_slot()
+        if tip_slot is None:
+            response, tip = await asyncio.gather(client.get_latest_blockhash(Confirmed), client.get_slot(Processed))
+            tip_slot = tip.value
+        else:
+            response = await client.get_latest_blockhash(Confirmed)
+        self.blockhash = response.value.blockhash
+        self.last_valid_block_height = response.value.last_valid_block_height
+        self.slot = response.context.slot
+        self.tip_slot = tip_slot
+        self.fetched_at = time.monotonic()
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = round((self.fetched_at - started) * 1000, 1)
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Blockhash refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+blockhash_cache = BlockhashCache()
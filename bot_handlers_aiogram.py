@@ -1,4 +1,5 @@
 import sys
+import asyncio
 import logging
 import json
 import datetime
@@ -19,11 +20,13 @@ from aiogram.types import (
     InlineKeyboardButton
 )
 
-from tokenInfo import TokenInfo
+from tokenInfo import TokenInfo, SOL_MINT
+from price_service import price_service
+from price_ticker import price_ticker
 from translations import get_text
 import db_handler_aio
 from db_handler_aio import get_user_positions, get_user_coins, update_position, get_user, add_position
-import wallet
+from balance_cache import balance_cache
 import menus
 from menus import (
     make_positions_menu, make_coin_list_keyboard, make_coin_position_keyboard,
@@ -209,6 +212,10 @@ async def view_all_positions_handler(query: CallbackQuery, state: FSMContext):
     
     message_text = f"<b>{get_text(lang, 'positions_menu')} - {get_text(lang, 'view_all_positions')}</b>\n\n"
     
+    # Value every position from a single price snapshot
+    prices = await get_position_prices(position['token_address'] for position in positions)
+    sol_price = prices.get(SOL_MINT, 0)
+    
     for position in positions:
         token_symbol = position['token_symbol']
         token_address = position['token_address']
@@ -217,17 +224,11 @@ async def view_all_positions_handler(query: CallbackQuery, state: FSMContext):
         amount_token = position['amount_token']
         open_date = position['open_date']
         
-        # Get current price
-        try:
-            token_info = await get_token_info(token_address)
-            current_price = token_info['price_usd'] if token_info and 'price_usd' in token_info else 0
-        except Exception as e:
-            logger.error(f"Error getting token price: {e}")
-            current_price = 0
+        current_price = prices.get(token_address, 0)
         
         # Calculate PnL
         current_value = amount_token * current_price
-        invested_value = amount_sol * (await get_sol_price())
+        invested_value = amount_sol * sol_price
         profit_loss = current_value - invested_value
         profit_percentage = (profit_loss / invested_value) * 100 if invested_value > 0 else 0
         
@@ -305,10 +306,13 @@ async def select_coin_handler(query: CallbackQuery, state: FSMContext):
     
     if not positions:
         # No positions for this token - show options to open position
-        token_info = await get_token_info(token_address)
+        token_info, prices = await asyncio.gather(
+            TokenInfo.get_token_metadata(token_address),
+            get_position_prices([token_address])
+        )
         token_symbol = token_info.get('symbol', 'Unknown')
         token_name = token_info.get('name', 'Unknown Token')
-        current_price = token_info.get('price_usd', 0)
+        current_price = prices.get(token_address, 0)
         
         message_text = f"<b>{token_symbol} ({token_name})</b>\n\n"
         message_text += f"{get_text(lang, 'current_price')}: ${current_price:.4f}\n\n"
@@ -321,15 +325,15 @@ async def select_coin_handler(query: CallbackQuery, state: FSMContext):
         await query.answer()
         return
     
-    # Calculate total position value and PnL
-    token_info = await get_token_info(token_address)
-    token_symbol = token_info.get('symbol', positions[0]['token_symbol'])
-    token_name = token_info.get('name', positions[0]['token_name'])
-    current_price = token_info.get('price_usd', 0)
+    # Calculate total position value and PnL from one price snapshot
+    prices = await get_position_prices([token_address])
+    token_symbol = positions[0]['token_symbol']
+    token_name = positions[0]['token_name']
+    current_price = prices.get(token_address, 0)
     
     total_token_amount = sum(position['amount_token'] for position in positions)
     total_sol_invested = sum(position['amount_sol'] for position in positions)
-    sol_price = await get_sol_price()
+    sol_price = prices.get(SOL_MINT, 0)
     total_invested_usd = total_sol_invested * sol_price
     current_value = total_token_amount * current_price
     profit_loss = current_value - total_invested_usd
@@ -463,10 +467,10 @@ async def close_position_handler(query: CallbackQuery, state: FSMContext):
         await query.answer(get_text(lang, 'no_positions'), show_alert=True)
         return
     
-    # Get token info
-    token_info = await get_token_info(token_address)
-    token_symbol = token_info.get('symbol', positions[0]['token_symbol'])
-    current_price = token_info.get('price_usd', 0)
+    # Value the closing positions from one price snapshot
+    prices = await get_position_prices([token_address])
+    token_symbol = positions[0]['token_symbol']
+    current_price = prices.get(token_address, 0)
     
     # Close all positions for this token
     for position in positions:
@@ -475,7 +479,7 @@ async def close_position_handler(query: CallbackQuery, state: FSMContext):
     # Calculate the final PnL
     total_token_amount = sum(position['amount_token'] for position in positions)
     total_sol_invested = sum(position['amount_sol'] for position in positions)
-    sol_price = await get_sol_price()
+    sol_price = prices.get(SOL_MINT, 0)
     total_invested_usd = total_sol_invested * sol_price
     current_value = total_token_amount * current_price
     profit_loss = current_value - total_invested_usd
@@ -527,7 +531,7 @@ async def position_amount_handler(message: types.Message, state: FSMContext):
     private_key = user['private_key']
     
     # Check balance
-    sol_balance = await wallet.get_balance(wallet_address)
+    sol_balance = (await balance_cache.get(wallet_address, SOL_MINT))['balance']['float']
     if sol_balance < amount:
         await message.reply(get_text(lang, 'insufficient_balance'))
         return
@@ -687,8 +691,10 @@ def register_position_handlers(dp: Dispatcher):
 async def get_token_info(token_address):
     return await TokenInfo.get_token_info(token_address)
 
+async def get_position_prices(mints):
+    """Prices from the ticker's in-memory table; only mints it has not priced yet hit the network"""
+    return await price_ticker.get_or_fetch_prices(mints)
+
 async def get_sol_price():
-    # Get SOL price from the token info
-    sol_address = "So11111111111111111111111111111111111111112"  # SOL token address
-    sol_info = await get_token_info(sol_address)
-    return sol_info.get('price_usd', 0) if sol_info else 0
\ No newline at end of file
+    # Get SOL price from the batched price service
+    return await price_service.get_price(SOL_MINT)
\ No newline at end of file
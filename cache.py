@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Marks a key the upstream reported as unknown (negative cache entry)
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache with per-entry TTL, negative caching and stale-while-revalidate"""
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float = None,
+                 stale_ttl: float = 0.0, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._data = OrderedDict()  # key -> (value, fresh_until, stale_until)
+        self._refreshing = {}
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        entry = self._data.get(key)
+        return entry is not None and entry[2] > time.monotonic()
+
+    def set(self, key, value, ttl: float = None):
+        """Store a value; value=MISSING stores a negative entry"""
+        if ttl is None:
+            ttl = self.negative_ttl if value is MISSING else self.ttl
+        now = time.monotonic()
+        # Negative entries are never served stale
+        stale = 0.0 if value is MISSING else self.stale_ttl
+        self._data[key] = (value, now + ttl, now + ttl + stale)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key, default=None):
+        """Return a fresh or stale cached value without touching the network"""
+        entry = self._data.get(key)
+        if entry is None or entry[2] <= time.monotonic():
+            return default
+        self._data.move_to_end(key)
+        return None if entry[0] is MISSING else entry[0]
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(self, key, fetch):
+        """
+        Return the cached value for key, calling `await fetch()` on a miss.
+        fetch returns None for unknown keys, which are cached negatively.
+        A stale entry is served immediately while a background refresh runs.
+        """
+        entry = self._data.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self._data.move_to_end(key)
+                if value is MISSING:
+                    self.stats["negative_hits"] += 1
+                    return None
+                self.stats["hits"] += 1
+                return value
+            if now < stale_until:
+                self._data.move_to_end(key)
+                self.stats["stale_hits"] += 1
+                self._schedule_refresh(key, fetch)
+                return value
+            del self._data[key]
+
+        self.stats["misses"] += 1
+        value = await fetch()
+        self.set(key, MISSING if value is None else value)
+        return value
+
+    def _schedule_refresh(self, key, fetch):
+        if key in self._refreshing:
+            return
+        self.stats["refreshes"] += 1
+        task = asyncio.create_task(self._refresh(key, fetch))
+        self._refreshing[key] = task
+
+    async def _refresh(self, key, fetch):
+        try:
+            value = await fetch()
+            self.set(key, MISSING if value is None else value)
+        except Exception as e:
+            # Keep serving the stale value until it expires
+            self.stats["refresh_errors"] += 1
+            logger.warning(f"{self.name}: background refresh of {key} failed: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        stats = dict(self.stats)
+        stats["size"] = len(self._data)
+        stats["maxsize"] = self.maxsize
+        stats["hit_rate"] = round((lookups - self.stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
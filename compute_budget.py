@@ -0,0 +1,209 @@
+import base64
+import logging
+import math
+
+from solders.compute_budget import ID as COMPUTE_BUDGET_PROGRAM_ID, set_compute_unit_limit, set_compute_unit_price # type: ignore
+from solders.instruction import CompiledInstruction # type: ignore
+from solders.message import Message, MessageHeader, MessageV0 # type: ignore
+from solders.signature import Signature # type: ignore
+from solders.transaction import VersionedTransaction # type: ignore
+
+from cache import TTLCache
+from rpc_transport import rpc_request
+
+logger = logging.getLogger(__name__)
+
+# ComputeBudget instruction discriminators
+SET_COMPUTE_UNIT_LIMIT = 2
+SET_COMPUTE_UNIT_PRICE = 3
+
+# What the runtime grants when a transaction sets no limit
+DEFAULT_UNITS_PER_INSTRUCTION = 200_000
+MAX_COMPUTE_UNIT_LIMIT = 1_400_000
+
+# Right-sizing: simulated units plus headroom, since pool state moves between runs
+UNITS_MARGIN = 1.2
+UNITS_PADDING = 5_000
+SIMULATION_TTL = 600
+SIMULATION_ERROR_TTL = 30
+
+
+def _compute_budget_index(message):
+    for index, key in enumerate(message.account_keys):
+        if key == COMPUTE_BUDGET_PROGRAM_ID:
+            return index
+    return None
+
+
+def get_compute_unit_limit(message) -> int:
+    """Compute-unit limit the message requests (or the runtime default)"""
+    program_index = _compute_budget_index(message)
+    for instruction in message.instructions:
+        data = bytes(instruction.data)
+        if instruction.program_id_index == program_index and data[:1] == bytes([SET_COMPUTE_UNIT_LIMIT]):
+            return int.from_bytes(data[1:5], "little")
+    other = sum(1 for instruction in message.instructions if instruction.program_id_index != program_index)
+    return min(MAX_COMPUTE_UNIT_LIMIT, DEFAULT_UNITS_PER_INSTRUCTION * other)
+
+
+def get_compute_unit_price(message) -> int:
+    """Priority fee in micro-lamports per compute unit (0 when unset)"""
+    program_index = _compute_budget_index(message)
+    for instruction in message.instructions:
+        data = bytes(instruction.data)
+        if instruction.program_id_index == program_index and data[:1] == bytes([SET_COMPUTE_UNIT_PRICE]):
+            return int.from_bytes(data[1:9], "little")
+    return 0
+
+
+def writable_accounts(message) -> list:
+    """Statically listed write-locked accounts other than the signers"""
+    header = message.header
+    keys = message.account_keys
+    writable_end = len(keys) - header.num_readonly_unsigned_accounts
+    return [str(key) for key in keys[header.num_required_signatures:writable_end]]
+
+
+def with_compute_budget(message, unit_price: int = None, unit_limit: int = None):
+    """
+    Copy of a (legacy or v0) message with its ComputeBudget price and/or limit set.
+    Existing ComputeBudget instructions are rewritten in place; missing ones are
+    prepended, adding the program to the static keys if the message lacks it.
+    Must run before signing, since it changes the message bytes.
+    """
+    wanted = {}
+    if unit_limit is not None:
+        wanted[SET_COMPUTE_UNIT_LIMIT] = bytes(set_compute_unit_limit(int(unit_limit)).data)
+    if unit_price is not None:
+        wanted[SET_COMPUTE_UNIT_PRICE] = bytes(set_compute_unit_price(int(unit_price)).data)
+    if not wanted:
+        return message
+
+    header = message.header
+    account_keys = list(message.account_keys)
+    instructions = list(message.instructions)
+    program_index = _compute_budget_index(message)
+
+    if program_index is None:
+        # Append as a read-only non-signer; table-loaded indices that follow move up by one
+        program_index = len(account_keys)
+        account_keys.append(COMPUTE_BUDGET_PROGRAM_ID)
+        header = MessageHeader(
+            header.num_required_signatures,
+            header.num_readonly_signed_accounts,
+            header.num_readonly_unsigned_accounts + 1,
+        )
+        instructions = [
+            CompiledInstruction(
+                instruction.program_id_index + (instruction.program_id_index >= program_index),
+                instruction.data,
+                bytes(index + 1 if index >= program_index else index for index in bytes(instruction.accounts)),
+            )
+            for instruction in instructions
+        ]
+
+    patched = []
+    for instruction in instructions:
+        data = bytes(instruction.data)
+        if instruction.program_id_index == program_index and data[:1] and data[0] in wanted:
+            instruction = CompiledInstruction(program_index, wanted.pop(data[0]), bytes(instruction.accounts))
+        patched.append(instruction)
+    prepended = [CompiledInstruction(program_index, data, b"") for data in wanted.values()]
+    instructions = prepended + patched
+
+    if isinstance(message, MessageV0):
+        return MessageV0(header, account_keys, message.recent_blockhash, instructions,
+                         list(message.address_table_lookups))
+    return Message.new_with_compiled_instructions(
+        header.num_required_signatures,
+        header.num_readonly_signed_accounts,
+        header.num_readonly_unsigned_accounts,
+        account_keys,
+        message.recent_blockhash,
+        instructions,
+    )
+
+
+def route_shape(message) -> tuple:
+    """
+    Amount-independent fingerprint of a swap: the top-level programs in order with
+    their account counts, plus the lookup tables the route loads.
+    """
+    keys = message.account_keys
+    instructions = tuple((str(keys[instruction.program_id_index]), len(bytes(instruction.accounts)))
+                         for instruction in message.instructions)
+    tables = tuple(str(lookup.account_key) for lookup in getattr(message, "address_table_lookups", []))
+    return instructions, tables
+
+
+def route_plan_key(route_plan) -> tuple:
+    """The pools a quote's routePlan swaps through, in order"""
+    return tuple((step["swapInfo"]["ammKey"], step.get("percent")) for step in route_plan or ())
+
+
+class ComputeUnitSizer:
+    """
+    Replaces a transaction's generic compute-unit limit with a tight one.
+    The first transaction of each (route plan, transaction shape, input mint,
+    output mint) is simulated; repeats reuse the cached units consumed.
+    """
+
+    def __init__(self, margin: float = UNITS_MARGIN, padding: int = UNITS_PADDING, ttl: float = SIMULATION_TTL):
+        self.margin = margin
+        self.padding = padding
+        self.units = TTLCache(maxsize=2000, ttl=ttl, negative_ttl=SIMULATION_ERROR_TTL, name="compute_units")
+        self.stats = {
+            "sized": 0,
+            "simulations": 0,
+            "simulation_errors": 0,
+            "units_saved": 0,
+            "fee_saved_lamports": 0,
+        }
+
+    async def right_size(self, message, input_mint: str, output_mint: str, unit_price: int = 0,
+                         route_plan=None) -> tuple:
+        """
+        (message, sized): the message with its compute-unit limit set from (cached) simulation,
+        and whether it was changed. route_plan is the quote's routePlan; without it routes
+        that share a transaction shape share a cache entry.
+        """
+        key = (route_plan_key(route_plan), route_shape(message), input_mint, output_mint)
+        units = await self.units.get_or_fetch(key, lambda: self._simulate(message))
+        if units is None:
+            return message, False
+        limit = min(MAX_COMPUTE_UNIT_LIMIT, math.ceil(units * self.margin) + self.padding)
+        previous = get_compute_unit_limit(message)
+        if limit >= previous:
+            return message, False
+        self.stats["sized"] += 1
+        self.stats["units_saved"] += previous - limit
+        # Priority fee is price x limit, so every unit trimmed is fee not paid
+        self.stats["fee_saved_lamports"] += (previous - limit) * unit_price // 1_000_000
+        return with_compute_budget(message, unit_limit=limit), True
+
+    async def _simulate(self, message):
+        self.stats["simulations"] += 1
+        transaction = VersionedTransaction.populate(message, [Signature.default()] * message.header.num_required_signatures)
+        try:
+            result = await rpc_request("simulateTransaction", [
+                base64.b64encode(bytes(transaction)).decode(),
+                {"encoding": "base64", "sigVerify": False, "replaceRecentBlockhash": True, "commitment": "processed"},
+            ])
+        except Exception as e:
+            self.stats["simulation_errors"] += 1
+            logger.warning(f"Compute-unit simulation failed: {e}")
+            return None
+        value = result["value"]
+        if value.get("err") is not None or not value.get("unitsConsumed"):
+            self.stats["simulation_errors"] += 1
+            logger.info(f"Compute-unit simulation returned {value.get('err')}; keeping the default limit")
+            return None
+        return value["unitsConsumed"]
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["cache"] = self.units.get_stats()
+        return stats
+
+
+compute_unit_sizer = ComputeUnitSizer()
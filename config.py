@@ -1,4 +1,17 @@
 from secret import * 
 
 TELEGRAM_BOT_TOKEN = TELEGRAM_BOT_TOKEN
-RPC_URL = RPC_URL
\ No newline at end of file
+RPC_URL = RPC_URL
+# Extra endpoints for the RPC router; secret.py may define RPC_URLS, RPC_URL alone works too
+RPC_URLS = globals().get("RPC_URLS") or [RPC_URL]
+# Websocket endpoint for account subscriptions; derived from RPC_URL unless secret.py sets it
+RPC_WS_URL = globals().get("RPC_WS_URL") or RPC_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+# Hedge reads to a second endpoint when the first is slower than its p95
+RPC_HEDGE_READS = True
+
+# Seconds between background price refreshes for hot mints
+PRICE_TICKER_INTERVAL = 5
+
+# Client-side request quotas (requests per second); None disables the limiter
+RPC_REQUESTS_PER_SECOND = 40
+JUPITER_REQUESTS_PER_SECOND = 10
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import time
+
+from solders.signature import Signature # type: ignore
+from solders.transaction_status import TransactionConfirmationStatus # type: ignore
+
+from blockhash_cache import blockhash_cache
+from db_handler_aio import update_transaction_statuses
+from rpc_transport import get_rpc_client
+from ws_manager import ws_manager
+
+logger = logging.getLogger(__name__)
+
+# getSignatureStatuses accepts at most 256 signatures per call
+MAX_SIGNATURES_PER_REQUEST = 256
+POLL_INTERVAL = 0.5
+# With signature subscriptions live, polling only backstops missed pushes and expiry
+SUBSCRIBED_POLL_INTERVAL = 5.0
+# Fallback expiry when the caller does not know the blockhash's last valid block height
+DEFAULT_TIMEOUT = 90
+
+COMMITMENT_LEVELS = {"processed": 0, "confirmed": 1, "finalized": 2}
+# solders' TransactionConfirmationStatus is not hashable, so compare rather than look up
+STATUS_LEVELS = (
+    (TransactionConfirmationStatus.Processed, 0),
+    (TransactionConfirmationStatus.Confirmed, 1),
+    (TransactionConfirmationStatus.Finalized, 2),
+)
+
+
+class PendingSignature:
+    __slots__ = ("signature", "parsed", "future", "commitment", "last_valid_block_height",
+                 "deadline", "update_db", "callbacks", "registered_at", "listener")
+
+    def __init__(self, signature, parsed, commitment, last_valid_block_height, deadline, update_db):
+        self.signature = signature
+        self.parsed = parsed
+        self.future = asyncio.get_running_loop().create_future()
+        self.commitment = commitment
+        self.last_valid_block_height = last_valid_block_height
+        self.deadline = deadline
+        self.update_db = update_db
+        self.callbacks = []
+        self.registered_at = time.monotonic()
+        self.listener = None
+
+
+class ConfirmationTracker:
+    """
+    Tracks every pending signature in the process.
+    Each signature gets a signatureSubscribe through the shared ws_manager; one
+    background task backstops them with batched getSignatureStatuses polls (fast
+    while the websocket is down) and resolves per-signature futures with
+    (success, error) once they land or expire.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL, timeout: float = DEFAULT_TIMEOUT,
+                 batch_size: int = MAX_SIGNATURES_PER_REQUEST):
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._pending = {}
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self.stats = {
+            "registered": 0,
+            "landed": 0,
+            "failed": 0,
+            "expired": 0,
+            "polls": 0,
+            "rpc_calls": 0,
+            "pushed": 0,
+        }
+
+    def register(self, signature: str, last_valid_block_height: int = None,
+                 commitment: str = "processed", update_db: bool = True, callback=None) -> asyncio.Future:
+        """
+        Start tracking a signature; returns a future resolving to (success, error).
+        callback(signature, success, error) is called too when given.
+        Raises ValueError if signature is not a valid transaction signature.
+        """
+        pending = self._pending.get(signature)
+        if pending is None:
+            # Rejected here so one bad entry cannot break the batched polls
+            try:
+                parsed = Signature.from_string(signature)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid transaction signature {signature!r}: {e}") from None
+            pending = PendingSignature(
+                signature, parsed, commitment, last_valid_block_height,
+                time.monotonic() + self.timeout, update_db,
+            )
+            self._pending[signature] = pending
+            self.stats["registered"] += 1
+            pending.listener = ws_manager.subscribe(
+                "signature",
+                [signature, {"commitment": commitment}],
+                callback=lambda result: self._on_notification(signature, result),
+            )
+        if callback is not None:
+            pending.callbacks.append(callback)
+        self._ensure_running()
+        self._wakeup.set()
+        return pending.future
+
+    async def wait(self, signature: str, **kwargs):
+        """Register a signature and wait for its outcome"""
+        return await asyncio.shield(self.register(signature, **kwargs))
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def start(self):
+        self._ensure_running()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                await self._wakeup.wait()
+            # A registration after this point cuts the next wait short
+            self._wakeup.clear()
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Confirmation poll failed: {e}")
+                # Waiters must not hang forever while the RPC is unreachable
+                now = time.monotonic()
+                overdue = {sig: (False, f"Could not confirm transaction: {e}")
+                           for sig, pending in self._pending.items() if now > pending.deadline}
+                if overdue:
+                    await self._resolve(overdue)
+            # An empty set is not "subscribed": the next registration needs a prompt first poll
+            subscribed = bool(self._pending) and all(
+                pending.listener is not None and pending.listener.active for pending in self._pending.values())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(),
+                                       SUBSCRIBED_POLL_INTERVAL if subscribed else self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_notification(self, signature: str, result: dict):
+        value = result.get("value")
+        if not isinstance(value, dict) or signature not in self._pending:
+            return  # "receivedSignature" or already resolved by a poll
+        self.stats["pushed"] += 1
+        error = value.get("err")
+        task = asyncio.create_task(self._resolve({signature: (error is None, error)}))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def poll(self):
+        """Check every pending signature once and resolve the finished ones"""
+        if not self._pending:
+            return
+        self.stats["polls"] += 1
+        client = get_rpc_client()
+        signatures = list(self._pending)
+        chunks = [signatures[i:i + self.batch_size] for i in range(0, len(signatures), self.batch_size)]
+
+        calls = [client.get_signature_statuses([self._pending[sig].parsed for sig in chunk]) for chunk in chunks]
+        # The blockhash cache already knows the tip height; only ask the RPC when it is stale
+        block_height = blockhash_cache.block_height
+        needs_height = block_height is None and any(
+            self._pending[sig].last_valid_block_height is not None for sig in signatures)
+        if needs_height:
+            calls.append(client.get_block_height())
+        responses = await asyncio.gather(*calls)
+        self.stats["rpc_calls"] += len(calls)
+        if needs_height:
+            block_height = responses.pop().value
+
+        finished = {}
+        now = time.monotonic()
+        for chunk, response in zip(chunks, responses):
+            for signature, status in zip(chunk, response.value):
+                pending = self._pending.get(signature)
+                if pending is None:
+                    continue  # resolved by a websocket push while the poll was in flight
+                if status is not None and self._reached(status, pending.commitment):
+                    if status.err is None:
+                        finished[signature] = (True, None)
+                    else:
+                        finished[signature] = (False, status.err)
+                elif self._expired(pending, block_height, now):
+                    finished[signature] = (False, "Transaction expired before it was confirmed")
+
+        if finished:
+            await self._resolve(finished)
+
+    @staticmethod
+    def _reached(status, commitment: str) -> bool:
+        if status.confirmation_status is None:
+            # Rooted transactions report no confirmation status
+            return True
+        level = next((level for confirmation_status, level in STATUS_LEVELS
+                      if status.confirmation_status == confirmation_status), 0)
+        return level >= COMMITMENT_LEVELS[commitment]
+
+    @staticmethod
+    def _expired(pending: PendingSignature, block_height, now: float) -> bool:
+        if pending.last_valid_block_height is not None and block_height is not None:
+            return block_height > pending.last_valid_block_height
+        return now > pending.deadline
+
+    async def _resolve(self, finished: dict):
+        db_statuses = {}
+        for signature, (success, error) in finished.items():
+            pending = self._pending.pop(signature, None)
+            if pending is None:
+                continue
+            if pending.listener is not None:
+                ws_manager.unsubscribe(pending.listener)
+            if success:
+                self.stats["landed"] += 1
+            elif isinstance(error, str):
+                self.stats["expired"] += 1
+            else:
+                self.stats["failed"] += 1
+            if pending.update_db:
+                db_statuses[signature] = "success" if success else "failed"
+            if not pending.future.done():
+                pending.future.set_result((success, error))
+            for callback in pending.callbacks:
+                try:
+                    callback(signature, success, error)
+                except Exception as e:
+                    logger.error(f"Confirmation callback for {signature} failed: {e}")
+        await update_transaction_statuses(db_statuses)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["pending"] = len(self._pending)
+        return stats
+
+
+confirmation_tracker = ConfirmationTracker()
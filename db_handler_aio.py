@@ -4,6 +4,8 @@ import asyncio
 import logging
 from datetime import datetime
 
+from singleflight import SingleFlight
+
 # Setup logging configuration
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +17,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrent reads of the same user row share one query
+user_flight = SingleFlight("user_row", timeout=5)
+
 #create a error decorator
 def error_decorator(func):
     async def wrapper(*args, **kwargs):
@@ -110,6 +115,48 @@ async def create_db_and_table():
                 )
             ''')
             
+            # Raw balance samples and their minute/hour/day rollups
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS balance_samples (
+                    wallet TEXT NOT NULL,
+                    mint TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    balance REAL NOT NULL
+                )
+            ''')
+            await db.execute('''
+                CREATE INDEX IF NOT EXISTS idx_balance_samples_key_ts
+                ON balance_samples (wallet, mint, ts)
+            ''')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS balance_rollups (
+                    wallet TEXT NOT NULL,
+                    mint TEXT NOT NULL,
+                    resolution INTEGER NOT NULL,
+                    bucket REAL NOT NULL,
+                    open REAL NOT NULL,
+                    high REAL NOT NULL,
+                    low REAL NOT NULL,
+                    close REAL NOT NULL,
+                    samples INTEGER NOT NULL,
+                    PRIMARY KEY (wallet, mint, resolution, bucket)
+                ) WITHOUT ROWID
+            ''')
+            
+            # Mint metadata; decimals never change, supply/authorities are refreshed on demand
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS mint_info (
+                    mint TEXT PRIMARY KEY,
+                    decimals INTEGER NOT NULL,
+                    supply TEXT,
+                    mint_authority TEXT,
+                    freeze_authority TEXT,
+                    token_program TEXT,
+                    source TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            
             await db.commit()
         logging.info("Database and tables created successfully!")
     except Exception as e:
@@ -127,6 +174,12 @@ async def insert_user(user_id, wallet_address, private_key, trades, slippage, mo
 
 
 async def get_user(user_id):
+    row = await user_flight.do(user_id, lambda: _fetch_user(user_id))
+    # Every waiter gets its own copy of the shared row
+    return dict(row) if row is not None else None
+
+
+async def _fetch_user(user_id):
     async with aiosqlite.connect('users.db') as db:
         # Change the row factory to dictionary
         db.row_factory = aiosqlite.Row
@@ -254,6 +307,46 @@ async def update_transaction_status(transaction_hash, status):
     logger.info(f"Updated transaction status: {transaction_hash} to {status}")
     return True
 
+@error_decorator
+async def update_transaction_hash(transaction_hash, new_hash, status):
+    """
+    Replace a placeholder transaction hash with the real one once it is known
+    :param transaction_hash: Placeholder hash the row was added with
+    :param new_hash: Solana transaction hash
+    :param status: 'pending', 'processing', 'success', 'failed'
+    :return: Success status
+    """
+    async with aiosqlite.connect('users.db') as db:
+        await db.execute('''
+            UPDATE transactions
+            SET transaction_hash = ?, status = ?
+            WHERE transaction_hash = ?
+        ''', (new_hash, status, transaction_hash))
+        await db.commit()
+
+    logger.info(f"Updated transaction hash: {transaction_hash} to {new_hash} ({status})")
+    return True
+
+@error_decorator
+async def update_transaction_statuses(statuses):
+    """
+    Update the status of many transactions in one database round trip
+    :param statuses: Dictionary of transaction_hash -> status
+    :return: Success status
+    """
+    if not statuses:
+        return True
+    async with aiosqlite.connect('users.db') as db:
+        await db.executemany('''
+            UPDATE transactions
+            SET status = ?
+            WHERE transaction_hash = ?
+        ''', [(status, transaction_hash) for transaction_hash, status in statuses.items()])
+        await db.commit()
+
+    logger.info(f"Updated status of {len(statuses)} transactions")
+    return True
+
 @error_decorator
 async def get_user_transactions(user_id, limit=10):
     """
@@ -469,6 +562,143 @@ async def get_position(position_id):
         logging.error(f"Error getting position: {e}")
         raise
 
+@error_decorator
+async def get_active_position_mints():
+    """
+    Get every token address that has at least one active position, across all users
+    
+    :return: List of token addresses
+    """
+    try:
+        async with aiosqlite.connect("users.db") as db:
+            cursor = await db.execute(
+                "SELECT DISTINCT token_address FROM positions WHERE is_active = 1"
+            )
+            rows = await cursor.fetchall()
+            return [row[0] for row in rows]
+    except Exception as e:
+        logging.error(f"Error getting active position mints: {e}")
+        raise
+
+@error_decorator
+async def write_balance_history(samples, rollups):
+    """
+    Append raw balance samples and merge their pre-aggregated buckets into the
+    rollup table in one transaction, so a failed batch can be retried whole
+    
+    :param samples: List of (wallet, mint, ts, balance) tuples
+    :param rollups: List of (wallet, mint, resolution, bucket, open, high, low, close, samples) tuples
+    :return: Success status
+    """
+    if not samples and not rollups:
+        return True
+    async with aiosqlite.connect("users.db") as db:
+        # Nothing is committed unless both statements succeed; closing without commit rolls back
+        await db.executemany(
+            "INSERT INTO balance_samples (wallet, mint, ts, balance) VALUES (?, ?, ?, ?)",
+            samples
+        )
+        await db.executemany('''
+            INSERT INTO balance_rollups (wallet, mint, resolution, bucket, open, high, low, close, samples)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (wallet, mint, resolution, bucket) DO UPDATE SET
+                high = MAX(high, excluded.high),
+                low = MIN(low, excluded.low),
+                close = excluded.close,
+                samples = samples + excluded.samples
+        ''', rollups)
+        await db.commit()
+    return True
+
+@error_decorator
+async def get_balance_samples(wallet, mint, start, end, limit=None):
+    """
+    Get raw balance samples for a wallet/mint in a time range
+    
+    :param start: Range start (unix seconds, inclusive)
+    :param end: Range end (unix seconds, inclusive)
+    :param limit: Only return the most recent `limit` samples
+    :return: List of (ts, balance) tuples, oldest first
+    """
+    async with aiosqlite.connect("users.db") as db:
+        cursor = await db.execute('''
+            SELECT ts, balance FROM balance_samples
+            WHERE wallet = ? AND mint = ? AND ts BETWEEN ? AND ?
+            ORDER BY ts DESC
+            LIMIT ?
+        ''', (wallet, mint, start, end, -1 if limit is None else limit))
+        rows = await cursor.fetchall()
+    return [tuple(row) for row in reversed(rows)]
+
+@error_decorator
+async def get_balance_rollups(wallet, mint, resolution, start, end):
+    """
+    Get downsampled balance buckets for a wallet/mint in a time range
+    
+    :param resolution: Bucket width in seconds (60, 3600 or 86400)
+    :return: List of (bucket, open, high, low, close) tuples, oldest first
+    """
+    async with aiosqlite.connect("users.db") as db:
+        cursor = await db.execute('''
+            SELECT bucket, open, high, low, close FROM balance_rollups
+            WHERE wallet = ? AND mint = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+            ORDER BY bucket
+        ''', (wallet, mint, resolution, start, end))
+        rows = await cursor.fetchall()
+    return [tuple(row) for row in rows]
+
+@error_decorator
+async def prune_balance_history(sample_cutoff, rollup_cutoffs):
+    """
+    Delete balance history past its retention
+    
+    :param sample_cutoff: Delete raw samples older than this (unix seconds)
+    :param rollup_cutoffs: Dictionary of resolution -> cutoff (unix seconds)
+    :return: Success status
+    """
+    async with aiosqlite.connect("users.db") as db:
+        await db.execute("DELETE FROM balance_samples WHERE ts < ?", (sample_cutoff,))
+        await db.executemany(
+            "DELETE FROM balance_rollups WHERE resolution = ? AND bucket < ?",
+            list(rollup_cutoffs.items())
+        )
+        await db.commit()
+    return True
+
+@error_decorator
+async def upsert_mint_info(rows):
+    """
+    Insert or replace mint metadata in one batch
+    
+    :param rows: List of (mint, decimals, supply, mint_authority, freeze_authority, token_program, source, updated_at) tuples
+    :return: Success status
+    """
+    if not rows:
+        return True
+    async with aiosqlite.connect("users.db") as db:
+        await db.executemany('''
+            INSERT OR REPLACE INTO mint_info
+                (mint, decimals, supply, mint_authority, freeze_authority, token_program, source, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        await db.commit()
+    return True
+
+@error_decorator
+async def get_all_mint_info():
+    """
+    Get every stored mint
+    
+    :return: List of (mint, decimals, supply, mint_authority, freeze_authority, token_program, source, updated_at) tuples
+    """
+    async with aiosqlite.connect("users.db") as db:
+        cursor = await db.execute('''
+            SELECT mint, decimals, supply, mint_authority, freeze_authority, token_program, source, updated_at
+            FROM mint_info
+        ''')
+        rows = await cursor.fetchall()
+    return [tuple(row) for row in rows]
+
 if __name__ == '__main__':
     loop = asyncio.get_event_loop()
     asyncio.run(create_db_and_table())
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from rpc_transport import rpc_request
+
+logger = logging.getLogger(__name__)
+
+# Landing speed -> percentile of recent per-slot prioritization fees
+SPEED_PERCENTILES = {
+    "normal": 50,
+    "fast": 75,
+    "turbo": 90,
+}
+DEFAULT_SPEED = "fast"
+PERCENTILES = (25, 50, 75, 90, 95)
+
+REFRESH_INTERVAL = 5.0
+# getRecentPrioritizationFees reports the last 150 slots; keep a little more across refreshes
+WINDOW_SLOTS = 300
+MAX_TRACKED_ACCOUNTS = 32
+ACCOUNT_TTL = 600
+
+# Micro-lamports per compute unit
+MIN_UNIT_PRICE = 1_000
+MAX_UNIT_PRICE = 5_000_000
+# Never spend more than this on priority fees for one transaction
+MAX_PRIORITY_FEE_LAMPORTS = 5_000_000
+
+
+class FeeSeries:
+    """Per-slot fees for one key (global or an account), with percentiles cached at refresh"""
+
+    __slots__ = ("fees", "percentiles", "updated_at")
+
+    def __init__(self):
+        self.fees = {}  # slot -> micro-lamports per CU
+        self.percentiles = {}
+        self.updated_at = 0.0
+
+    def update(self, samples, window: int = WINDOW_SLOTS):
+        for sample in samples:
+            self.fees[sample["slot"]] = sample["prioritizationFee"]
+        if self.fees:
+            newest = max(self.fees)
+            self.fees = {slot: fee for slot, fee in self.fees.items() if slot > newest - window}
+            ordered = sorted(self.fees.values())
+            self.percentiles = {p: ordered[min(len(ordered) - 1, len(ordered) * p // 100)] for p in PERCENTILES}
+        self.updated_at = time.monotonic()
+
+
+class FeeEstimator:
+    """
+    Background sampler of getRecentPrioritizationFees, globally and for the
+    write-locked accounts recent swaps touched. estimate() only reads the
+    percentiles computed by the last refresh, so it never costs a round trip.
+    """
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL,
+                 max_accounts: int = MAX_TRACKED_ACCOUNTS, account_ttl: float = ACCOUNT_TTL):
+        self.refresh_interval = refresh_interval
+        self.max_accounts = max_accounts
+        self.account_ttl = account_ttl
+        self.global_fees = FeeSeries()
+        self._accounts = OrderedDict()  # account -> FeeSeries, least recently used first
+        self._last_used = {}
+        self._task = None
+        self.stats = {
+            "refreshes": 0,
+            "errors": 0,
+            "estimates": 0,
+            "account_hits": 0,
+        }
+
+    def track(self, accounts):
+        """Sample these accounts from the next refresh on"""
+        now = time.monotonic()
+        for account in accounts:
+            if account not in self._accounts:
+                self._accounts[account] = FeeSeries()
+            self._accounts.move_to_end(account)
+            self._last_used[account] = now
+        while len(self._accounts) > self.max_accounts:
+            account, _ = self._accounts.popitem(last=False)
+            self._last_used.pop(account, None)
+
+    def estimate(self, accounts=(), speed=DEFAULT_SPEED) -> int:
+        """
+        Priority fee in micro-lamports per CU for a landing speed ("normal", "fast",
+        "turbo" or a percentile): the highest of the global and per-account percentiles.
+        """
+        percentile = SPEED_PERCENTILES.get(speed, speed)
+        if percentile not in PERCENTILES:
+            raise ValueError(f"Unsupported fee percentile: {speed}")
+        self.stats["estimates"] += 1
+        accounts = list(accounts)
+        self.track(accounts)
+        fee = self.global_fees.percentiles.get(percentile, 0)
+        for account in accounts:
+            series = self._accounts.get(account)
+            if series is not None and series.percentiles:
+                self.stats["account_hits"] += 1
+                fee = max(fee, series.percentiles[percentile])
+        return min(MAX_UNIT_PRICE, max(MIN_UNIT_PRICE, fee))
+
+    @staticmethod
+    def cap_unit_price(unit_price: int, compute_unit_limit: int) -> int:
+        """Lower unit_price so the whole priority fee stays under MAX_PRIORITY_FEE_LAMPORTS"""
+        if compute_unit_limit <= 0:
+            return unit_price
+        return min(unit_price, MAX_PRIORITY_FEE_LAMPORTS * 1_000_000 // compute_unit_limit)
+
+    async def refresh(self):
+        cutoff = time.monotonic() - self.account_ttl
+        for account in [a for a, used in self._last_used.items() if used < cutoff]:
+            self._accounts.pop(account, None)
+            self._last_used.pop(account, None)
+        accounts = list(self._accounts)
+        # solana-py has no wrapper for getRecentPrioritizationFees, so call it raw
+        responses = await asyncio.gather(
+            rpc_request("getRecentPrioritizationFees"),
+            *(rpc_request("getRecentPrioritizationFees", [[account]]) for account in accounts),
+            return_exceptions=True,
+        )
+        global_samples, *account_samples = responses
+        if isinstance(global_samples, Exception):
+            raise global_samples
+        self.global_fees.update(global_samples)
+        for account, samples in zip(accounts, account_samples):
+            series = self._accounts.get(account)
+            if series is not None and not isinstance(samples, Exception):
+                series.update(samples)
+        self.stats["refreshes"] += 1
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Priority fee refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["global_percentiles"] = dict(self.global_fees.percentiles)
+        stats["tracked_accounts"] = len(self._accounts)
+        return stats
+
+
+fee_estimator = FeeEstimator()
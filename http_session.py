@@ -0,0 +1,110 @@
+import logging
+from urllib.parse import urlsplit
+
+import httpx
+
+from rate_limiter import RateLimiter, RateLimitedTransport, get_limiter, jupiter_priority
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # HTTP/2 needs the optional h2 package
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Pool tuning for the upstream APIs (Jupiter, price feeds, ...)
+MAX_CONNECTIONS_PER_HOST = 20
+MAX_KEEPALIVE_PER_HOST = 10
+KEEPALIVE_EXPIRY = 60.0
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 10.0
+
+
+class HttpSession:
+    """
+    Process-wide pool of keep-alive HTTP clients, one per upstream host.
+    Hosts listed in rate_limits ({base_url: requests per second}) share a priority rate limiter.
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS_PER_HOST,
+                 max_keepalive: int = MAX_KEEPALIVE_PER_HOST,
+                 keepalive_expiry: float = KEEPALIVE_EXPIRY,
+                 connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = READ_TIMEOUT,
+                 http2: bool = HTTP2_AVAILABLE,
+                 rate_limits: dict = None):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.rate_limits = {self._host(url): rate for url, rate in (rate_limits or {}).items()}
+        self._clients = {}
+        self.closed = False
+
+    @staticmethod
+    def _host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        """Get the shared client for the host of base_url, creating it on first use"""
+        if self.closed:
+            raise RuntimeError("HTTP session is closed")
+        host = self._host(base_url)
+        client = self._clients.get(host)
+        if client is None:
+            transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+            rate = self.rate_limits.get(host)
+            if rate:
+                transport = RateLimitedTransport(transport, RateLimiter(host, rate), classify=jupiter_priority)
+            client = httpx.AsyncClient(
+                base_url=host,
+                transport=transport,
+                timeout=self.timeout,
+            )
+            self._clients[host] = client
+            logger.info(f"Opened HTTP pool for {host} (http2={self.http2})")
+        return client
+
+    async def close(self):
+        """Close every pooled client"""
+        self.closed = True
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+_session = None
+
+
+async def open_http_session(**kwargs) -> HttpSession:
+    """Open the process-wide HTTP session (called from main())"""
+    global _session
+    if _session is None or _session.closed:
+        _session = HttpSession(**kwargs)
+    return _session
+
+
+async def close_http_session():
+    """Close the process-wide HTTP session on shutdown"""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """Shared client for base_url; opens the session lazily for scripts that skip main()"""
+    global _session
+    if _session is None or _session.closed:
+        _session = HttpSession()
+    return _session.client(base_url)
+
+
+def get_rate_limiter(base_url: str):
+    """Rate limiter of base_url's host, None if the host is not limited or has no client yet"""
+    return get_limiter(HttpSession._host(base_url))
@@ -0,0 +1,110 @@
+import base64
+import logging
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from solders.instruction import AccountMeta, Instruction # type: ignore
+from solders.pubkey import Pubkey # type: ignore
+
+from http_session import get_http_client
+
+logger = logging.getLogger(__name__)
+
+JUPITER_SWAP_API_URL = "https://quote-api.jup.ag/v6"
+QUOTE_TIMEOUT = 5.0
+SWAP_TIMEOUT = 10.0
+
+
+class JupiterError(Exception):
+    """Non-200 answer from the Jupiter API"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Jupiter API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class SwapTransaction(NamedTuple):
+    transaction: bytes  # unsigned, serialized
+    last_valid_block_height: int
+
+
+def instruction_from_json(instruction: dict) -> Instruction:
+    """solders Instruction from a /swap-instructions entry"""
+    return Instruction(
+        Pubkey.from_string(instruction["programId"]),
+        base64.b64decode(instruction["data"]),
+        [AccountMeta(Pubkey.from_string(account["pubkey"]), account["isSigner"], account["isWritable"])
+         for account in instruction["accounts"]],
+    )
+
+
+class JupiterClient:
+    """
+    Jupiter v6 swap API over the shared keep-alive HTTP session.
+    Quoting and building are separate calls, so a quote can be chosen (or
+    prefetched) first and built into a transaction later.
+    """
+
+    def __init__(self, base_url: str = JUPITER_SWAP_API_URL,
+                 quote_timeout: float = QUOTE_TIMEOUT, swap_timeout: float = SWAP_TIMEOUT):
+        self.base_url = base_url
+        self.prefix = urlsplit(base_url).path.rstrip("/")
+        self.quote_timeout = quote_timeout
+        self.swap_timeout = swap_timeout
+
+    async def _request(self, method: str, path: str, timeout: float, **kwargs) -> dict:
+        response = await get_http_client(self.base_url).request(
+            method, f"{self.prefix}{path}", timeout=timeout, **kwargs)
+        if response.status_code != 200:
+            try:
+                message = response.json().get("error") or response.text
+            except ValueError:
+                message = response.text
+            raise JupiterError(response.status_code, message)
+        return response.json()
+
+    async def quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int,
+                    only_direct_routes: bool = False, max_accounts: int = None,
+                    swap_mode: str = "ExactIn") -> dict:
+        """Quote response, to be passed back unchanged to swap_transaction/swap_instructions"""
+        params = {
+            "inputMint": input_mint,
+            "outputMint": output_mint,
+            "amount": str(amount),
+            "slippageBps": str(slippage_bps),
+            "swapMode": swap_mode,
+            "onlyDirectRoutes": "true" if only_direct_routes else "false",
+        }
+        if max_accounts:
+            params["maxAccounts"] = str(max_accounts)
+        return await self._request("GET", "/quote", self.quote_timeout, params=params)
+
+    def _swap_body(self, quote_response: dict, user_public_key: str, wrap_and_unwrap_sol: bool, options: dict) -> dict:
+        body = {
+            "quoteResponse": quote_response,
+            "userPublicKey": user_public_key,
+            "wrapAndUnwrapSol": wrap_and_unwrap_sol,
+        }
+        # Any other /swap option, in Jupiter's camelCase (e.g. dynamicComputeUnitLimit=True)
+        body.update(options)
+        return body
+
+    async def swap_transaction(self, quote_response: dict, user_public_key: str,
+                               wrap_and_unwrap_sol: bool = True, **options) -> SwapTransaction:
+        """Unsigned swap transaction for a quote"""
+        result = await self._request("POST", "/swap", self.swap_timeout,
+                                     json=self._swap_body(quote_response, user_public_key, wrap_and_unwrap_sol, options))
+        return SwapTransaction(base64.b64decode(result["swapTransaction"]), result.get("lastValidBlockHeight"))
+
+    async def swap_instructions(self, quote_response: dict, user_public_key: str,
+                                wrap_and_unwrap_sol: bool = True, **options) -> dict:
+        """
+        The swap's instructions, for composing a custom transaction:
+        computeBudgetInstructions, setupInstructions, swapInstruction, cleanupInstruction
+        and addressLookupTableAddresses (decode entries with instruction_from_json)
+        """
+        return await self._request("POST", "/swap-instructions", self.swap_timeout,
+                                   json=self._swap_body(quote_response, user_public_key, wrap_and_unwrap_sol, options))
+
+
+jupiter_client = JupiterClient()
@@ -4,6 +4,7 @@ import logging
 import math
 import sys
 from typing import Any, Dict
+import uuid
 
 from aiogram import Bot, Dispatcher, F, Router, html
 from aiogram.enums import ParseMode
@@ -25,12 +26,28 @@ import sys
 
 sys.path.append('..')
 
-from swap import Swap
+from swap import to_base_units
+from balances import SOL_DECIMALS
 from config import *
 from bot_handlers_aiogram import register_position_handlers
 from menus import *
 from db_handler_aio import *
-from tokenInfo import TokenInfo
+from tokenInfo import TokenInfo, SOL_MINT, JUPITER_API_URL
+from http_session import open_http_session, close_http_session
+from price_ticker import price_ticker
+from token_registry import token_registry
+from swap_registry import swap_registry
+from rpc_transport import open_rpc_transport, close_rpc_transport
+from confirmation_tracker import confirmation_tracker
+from blockhash_cache import blockhash_cache
+from ws_manager import ws_manager
+from fee_estimator import fee_estimator
+from tx_sender import tx_sender
+from balance_history import balance_history
+from jupiter_client import JUPITER_SWAP_API_URL
+from quote_prefetch import quote_prefetcher
+from mint_info import mint_info_cache
+from swap_executor import swap_executor, SwapQueueFull
 from translations import get_text
 
 TOKEN = TELEGRAM_BOT_TOKEN
@@ -145,7 +162,9 @@ async def process_private_key(message: Message, state: FSMContext) -> None:
     private_key = message.text
     # Save the private key to the database
 
-    wallet = Wallet(RPC_URL, private_key)
+    # The registry is keyed by user id; drop any Swap built from the previous key
+    await swap_registry.invalidate(userId)
+    wallet = await swap_registry.get(userId, private_key)
     wallet_address = wallet.wallet.pubkey().__str__()
 
     if wallet_address:
@@ -173,13 +192,24 @@ async def show_wallet_data(message: Message, state: FSMContext) -> None:
         await message.edit_text(get_text(lang, "no_wallet_set"), reply_markup=go_back_btn(lang))
         await state.set_state(Form.wallet_menu)
     else:
-        wallet = Wallet(RPC_URL, userData['private_key'])
-        balance = await wallet.get_token_balance(userData['wallet_address'])
+        wallet = await swap_registry.get(data.get("userId"), userData['private_key'])
+        # Everything the wallet holds, valued, from a short-lived cached snapshot
+        portfolio = await wallet.get_portfolio()
+        holdings = portfolio['holdings']
+        sol_balance = next(holding['amount'] for holding in holdings if holding['mint'] == SOL_MINT)
         
         # Format wallet data with HTML tags for better presentation
         wallet_address = f"<b>💼 {get_text(lang, 'wallet_address')}:</b>\n<code>{userData['wallet_address']}</code>"
         private_key = f"\n\n<b>🔑 {get_text(lang, 'private_key')}:</b>\n<code>{userData['private_key']}</code>"
-        balance_text = f"\n\n<b>💰 {get_text(lang, 'current_balance')}:</b>\n<code>{balance['balance']['float']} SOL</code>"
+        balance_text = f"\n\n<b>💰 {get_text(lang, 'current_balance')}:</b>\n<code>{sol_balance} SOL</code>"
+        
+        coin_lines = [
+            f"<code>{holding['amount']} {holding['symbol']}</code> (${holding['value_usd']:.2f})"
+            for holding in holdings if holding['mint'] != SOL_MINT
+        ]
+        if coin_lines:
+            balance_text += f"\n\n<b>🪙 {get_text(lang, 'my_coins')}:</b>\n" + "\n".join(coin_lines)
+        balance_text += f"\n\n<b>📊 {get_text(lang, 'current_value')}:</b> <code>${portfolio['total_usd']:.2f}</code>"
         
         # Create formatted wallet information
         formatted_wallet_data = f"{wallet_address}{private_key}{balance_text}"
@@ -213,6 +243,7 @@ async def reset_wallet(message: Message, state: FSMContext) -> None:
     
     if userData.get("wallet_address"):
         await update_user(user_id=userId, wallet_address="", private_key="", trades="{}", slippage=10)
+        await swap_registry.invalidate(userId)
         # Format reset wallet message with translations
         reset_message = f"{get_text(lang, 'wallet_reset')}\n\n"
         reset_message += f"{get_text(lang, 'wallet_address')}: {userData['wallet_address']}\n"
@@ -231,14 +262,20 @@ async def buy_token(message: Message, state: FSMContext) -> None:
     data = await state.get_data()
     userData = data.get("userData")
     lang = data.get("lang", "en")
-    token_address = message.text
-    swapClient = Swap(RPC_URL, userData.get("private_key"))
+    # Accept a symbol such as "BONK" or "$BONK" as well as a full mint address
+    token_address = token_registry.resolve(message.text) or message.text.strip()
+    # Keep this mint in the background ticker's hot set while people look at it
+    price_ticker.track(token_address)
+    swapClient = await swap_registry.get(data.get("userId"), userData.get("private_key"))
     account_token_info = await swapClient.get_wallet_token_balance(token_address)
     token_info = await TokenInfo.get_token_info(token_address)
     print(token_info, "token_info")
     await state.update_data(token_info=token_info)
     await state.update_data(token_address=token_address)
     await state.update_data(account_token_info=account_token_info)
+    # Warms the decimals swap_token needs for a sell
+    await mint_info_cache.decimals(token_address)
+    prefetch_preset_quotes(data.get("userId"), token_address, userData.get("slippage"))
 
     # Format token information with HTML
     token_balance = f"<b>{get_text(lang, 'current_balance')}:</b> <code>{account_token_info['balance']['float']} {token_info['symbol']}</code>"
@@ -286,6 +323,19 @@ async def buy_token(message: Message, state: FSMContext) -> None:
     await state.set_state(Form.buy_token)
 
 
+def sell_amount(fraction, balance: float) -> float:
+    """Token amount for selling a fraction of the balance, rounded down to 2 decimal places"""
+    return math.floor(float(fraction) * balance * 100) / 100.0
+
+
+def prefetch_preset_quotes(userId, token_address: str, slippage) -> None:
+    """Quote the token card's preset buys in the background, keyed exactly as swap_token asks for them"""
+    slippage_bps = int(slippage*100)
+    quote_prefetcher.prefetch(userId, [
+        (SOL_MINT, token_address, to_base_units(float(amount), SOL_DECIMALS), slippage_bps) for amount in BUY_PRESETS
+    ])
+
+
 async def start_transaction(message: Message, state: FSMContext) -> None:
     data = await state.get_data()
     userId = data.get("userId")
@@ -297,15 +347,37 @@ async def start_transaction(message: Message, state: FSMContext) -> None:
     if userData.get("private_key") is None or token_address is None:
         await message.answer("Please set your wallet first", reply_markup=make_wallet_menu_keyboard(lang))
     else:
-        await message.edit_text(f"Starting Transaction for {swapData.get('amount')} {data.get('token_info')['symbol']} {swapData.get('action')}ing.......\nPlease Wait....")
-        swapClient = Swap(RPC_URL, userData.get("private_key"))
-        token_address = data.get("token_address")
-        token_info = data.get("token_info")
-        
+        # Queued on the wallet's lane; the job reports back to the chat when it finishes
+        try:
+            ahead = swap_executor.submit(
+                userData.get("wallet_address") or userId,
+                lambda: execute_transaction(message, userId, userData, data),
+            )
+        except SwapQueueFull as e:
+            await message.answer(f"Too many pending swaps, please wait. {e}")
+        else:
+            queued = f"\n{ahead} swap(s) ahead of it for this wallet." if ahead else ""
+            await message.edit_text(f"Starting Transaction for {swapData.get('amount')} {data.get('token_info')['symbol']} {swapData.get('action')}ing.......\nPlease Wait....{queued}")
+
+    await state.set_state(Form.start_menu)
+
+
+async def execute_transaction(message: Message, userId, userData: dict, data: dict) -> None:
+    """Run a queued swap and report its progress and outcome to the chat"""
+    swapData = data.get("swapData")
+    lang = data.get("lang", "en")
+    token_address = data.get("token_address")
+    token_info = data.get("token_info")
+    main_menu = make_main_menu_keyboard(lang)
+    # Each swap's row gets its own placeholder hash, so concurrent swaps never update each other's
+    pending_hash = f"pending-{uuid.uuid4().hex}"
+
+    try:
+        swapClient = await swap_registry.get(userId, userData.get("private_key"))
         # Store pending transaction in database
-        await add_transaction(
+        recorded = await add_transaction(
             user_id=userId,
-            transaction_hash="pending", # Will update this once we have the actual transaction hash
+            transaction_hash=pending_hash, # Will update this once we have the actual transaction hash
             token_address=token_address,
             token_symbol=token_info["symbol"],
             amount=float(swapData.get("amount")),
@@ -314,7 +386,14 @@ async def start_transaction(message: Message, state: FSMContext) -> None:
             price_usd=token_info.get("price_in_usd"),
             price_sol=token_info.get("price_in_sol")
         )
-        
+    except Exception as e:
+        await message.answer(f"Transaction failed: {e}", reply_markup=main_menu)
+        return
+    if not recorded:
+        await message.answer("Transaction failed: it could not be recorded. Please Retry.", reply_markup=main_menu)
+        return
+
+    try:
         if swapData.get("action") == "buy":
             print("Buying")
             amount = float(swapData.get("amount"))
@@ -327,9 +406,8 @@ async def start_transaction(message: Message, state: FSMContext) -> None:
             )
         elif swapData.get("action") == "sell":
             print("Selling")
-            product = (float(swapData.get("amount")) * data.get("account_token_info")["balance"]["float"]) #rounding down to near 2 decimal places
             slippage = userData.get("slippage")
-            rounded_down_product = math.floor(product * 100) / 100.0
+            rounded_down_product = sell_amount(swapData.get("amount"), data.get("account_token_info")["balance"]["float"])
             tansactionStatus, transactionId = await swapClient.swap_token(
                 input_mint=token_address,
                 output_mint="So11111111111111111111111111111111111111112",
@@ -337,54 +415,41 @@ async def start_transaction(message: Message, state: FSMContext) -> None:
                 slippage_bps=slippage
             )
         else:
+            await update_transaction_status(pending_hash, "failed")
             await message.answer("Invalid Action")
-            await state.set_state(Form.start_menu)
             return
-
-        # Update the transaction in the database with the actual hash
-        if tansactionStatus:
-            # Update transaction with the actual hash
-            await update_transaction_status("pending", "processing")
-            
-            # Add transaction with real hash
-            await add_transaction(
-                user_id=userId,
-                transaction_hash=transactionId,
-                token_address=token_address,
-                token_symbol=token_info["symbol"],
-                amount=float(swapData.get("amount")),
-                transaction_type=swapData.get("action"),
-                status="processing",
-                price_usd=token_info.get("price_in_usd"),
-                price_sol=token_info.get("price_in_sol")
-            )
-            
-            main_menu = make_main_menu_keyboard(lang)
-            await message.answer(f"TX ID:{transactionId}\nTransaction sent: [View on Solana Explorer](https://explorer.solana.com/tx/{transactionId})\n--------------\nNow Checking for Transaction Status", parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True, reply_markup=main_menu)
-            swap_status, swap_msg = await swapClient.swap_status(transactionId)
-            
-            # Update final transaction status
-            final_status = "success" if swap_status else "failed"
-            await update_transaction_status(transactionId, final_status)
+    except Exception as e:
+        # e.g. no quote source answered
+        tansactionStatus, transactionId = False, str(e)
+    # The user has left the token card
+    quote_prefetcher.cancel(userId)
+
+    # Update the transaction in the database with the actual hash
+    if tansactionStatus:
+        # Update transaction with the actual hash
+        await update_transaction_hash(pending_hash, transactionId, "processing")
+        
+        await message.answer(f"TX ID:{transactionId}\nTransaction sent: [View on Solana Explorer](https://explorer.solana.com/tx/{transactionId})\n--------------\nNow Checking for Transaction Status", parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True, reply_markup=main_menu)
+        swap_status, swap_msg = await swapClient.swap_status(transactionId)
+        # The tracker records the outcome too, but it can resolve before the row above exists
+        await update_transaction_status(transactionId, "success" if swap_status else "failed")
+        
+        if swap_status:
+            await message.answer(f"Transaction SUCCESS! | [View on Solana Explorer](https://explorer.solana.com/tx/{transactionId})", parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True)
             
-            if swap_status:
-                await message.answer(f"Transaction SUCCESS! | [View on Solana Explorer](https://explorer.solana.com/tx/{transactionId})", parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True)
-                
-                # Track balance changes after successful transaction
-                if swapData.get("action") == "buy":
-                    balance_info = await swapClient.track_balance_changes(token_address)
-                    await message.answer(f"Your {token_info['symbol']} balance is now {balance_info[0]} tokens")
-                else:
-                    balance_info = await swapClient.track_balance_changes(swapClient.wallet.pubkey().__str__())
-                    await message.answer(f"Your SOL balance is now {balance_info[0]} SOL")
+            # Track balance changes after successful transaction
+            if swapData.get("action") == "buy":
+                balance_info = await swapClient.track_balance_changes(token_address)
+                await message.answer(f"Your {token_info['symbol']} balance is now {balance_info[0]} tokens")
             else:
-                await message.answer(f"Check Transaction Status FAILED! Please Retry. {swap_msg}", reply_markup=main_menu)
+                balance_info = await swapClient.track_balance_changes(swapClient.wallet.pubkey().__str__())
+                await message.answer(f"Your SOL balance is now {balance_info[0]} SOL")
         else:
-            # Mark transaction as failed
-            await update_transaction_status("pending", "failed")
-            await message.answer(f"Transaction failed: {transactionId}", reply_markup=main_menu)
-
-    await state.set_state(Form.start_menu)
+            await message.answer(f"Check Transaction Status FAILED! Please Retry. {swap_msg}", reply_markup=main_menu)
+    else:
+        # Mark transaction as failed
+        await update_transaction_status(pending_hash, "failed")
+        await message.answer(f"Transaction failed: {transactionId}", reply_markup=main_menu)
 
 async def buy_handler(message_or_callback, state: FSMContext) -> None:
     data = await state.get_data()
@@ -522,6 +587,16 @@ async def handle_callback(callback_query: CallbackQuery, state: FSMContext) -> N
     button_message = callback_query.data
     user_data = await state.get_data()
     lang = user_data.get('lang', 'en')
+
+    # Preset amounts on the token card
+    action, _, amount = button_message.partition("_")
+    if (action == "buy" and amount in BUY_PRESETS) or (action == "sell" and amount in SELL_PRESETS):
+        await callback_query.answer()
+        await state.update_data(swapData={"action": action, "amount": amount})
+        await start_transaction(callback_query.message, state)
+        return
+    # Any other button leaves the token card, so its prefetched quotes are not needed
+    quote_prefetcher.cancel(user_data.get("userId"))
     
     if button_message == "swap_menu":
         await swap_menu(callback_query, state)
@@ -652,8 +727,41 @@ async def main():
     
     # Create database tables if they don't exist
     await create_db_and_table()
+    await mint_info_cache.load()
     logger.info("Database initialized")
     
+    # Open the shared HTTP pool used for Jupiter lookups, within the Jupiter quota
+    await open_http_session(rate_limits={
+        JUPITER_API_URL: JUPITER_REQUESTS_PER_SECOND,
+        JUPITER_SWAP_API_URL: JUPITER_REQUESTS_PER_SECOND,
+    })
+    
+    # Keep prices for hot mints fresh in the background
+    await price_ticker.start(interval=PRICE_TICKER_INTERVAL)
+    
+    # Balance samples are written behind to SQLite in batches
+    await balance_history.start()
+    
+    # Serve token lookups from the local registry snapshot, refreshed in the background
+    await token_registry.start()
+    
+    # One pooled RPC transport shared by every wallet, routed across all configured endpoints
+    open_rpc_transport(RPC_URLS, hedge=RPC_HEDGE_READS, requests_per_second=RPC_REQUESTS_PER_SECOND)
+    swap_registry.open(RPC_URL)
+    
+    # One multiplexed websocket pool for account and signature subscriptions
+    await ws_manager.start(RPC_WS_URL)
+    
+    # Recent blockhash kept fresh for expiry checks, plus batched confirmation tracking
+    await blockhash_cache.start()
+    await confirmation_tracker.start()
+    
+    # Recent prioritization fees sampled in the background for swap fee estimates
+    await fee_estimator.start()
+    
+    # Swaps run on a bounded worker pool, one FIFO lane per wallet
+    await swap_executor.start()
+    
     # Initialize bot and dispatcher
     bot = Bot(token=TOKEN, parse_mode=ParseMode.HTML)
     dp = Dispatcher()
@@ -672,7 +780,24 @@ async def main():
     register_position_handlers(dp)
     
     # Start polling for updates
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await price_ticker.stop()
+        await balance_history.stop()
+        await token_registry.stop()
+        await swap_executor.stop()
+        await quote_prefetcher.stop()
+        await mint_info_cache.flush()
+        await tx_sender.stop()
+        await fee_estimator.stop()
+        await confirmation_tracker.stop()
+        await blockhash_cache.stop()
+        await ws_manager.stop()
+        await swap_registry.close()
+        await close_rpc_transport()
+        await close_http_session()
+        logger.info("HTTP session closed")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
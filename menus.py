@@ -40,15 +40,21 @@ def make_wallet_menu_keyboard(lang="en") -> None:
     ])
     return wallet_keyboard
 
+# Preset amounts on the token card: SOL to spend, and fractions of the token balance to sell
+BUY_PRESETS = ("0.01", "0.1", "0.5")
+SELL_PRESETS = ("0.25", "0.5", "1")
+
 def make_swap_menu_keyboard(lang="en") -> None:
-    buy_0_25_btn = InlineKeyboardButton(text=f"{get_text(lang, 'buy')} 0.01 SOL", callback_data="buy_0.01")
-    buy_0_5_btn = InlineKeyboardButton(text=f"{get_text(lang, 'buy')} 0.1 SOL", callback_data="buy_0.1")
-    buy_1_0_btn = InlineKeyboardButton(text=f"{get_text(lang, 'buy')} 0.5 SOL", callback_data="buy_0.5")
+    buy_0_25_btn, buy_0_5_btn, buy_1_0_btn = (
+        InlineKeyboardButton(text=f"{get_text(lang, 'buy')} {amount} SOL", callback_data=f"buy_{amount}")
+        for amount in BUY_PRESETS
+    )
     buy_option_btn = InlineKeyboardButton(text=f"{get_text(lang, 'buy')} _ SOL", callback_data="buy_option")
 
-    sell_0_25_btn = InlineKeyboardButton(text=f"{get_text(lang, 'sell')} 25 %", callback_data="sell_0.25")
-    sell_0_5_btn = InlineKeyboardButton(text=f"{get_text(lang, 'sell')} 50 %", callback_data="sell_0.5")
-    sell_1_0_btn = InlineKeyboardButton(text=f"{get_text(lang, 'sell')} 100 %", callback_data="sell_1")
+    sell_0_25_btn, sell_0_5_btn, sell_1_0_btn = (
+        InlineKeyboardButton(text=f"{get_text(lang, 'sell')} {float(fraction) * 100:g} %", callback_data=f"sell_{fraction}")
+        for fraction in SELL_PRESETS
+    )
     sell_option_btn = InlineKeyboardButton(text=f"{get_text(lang, 'sell')} _ %", callback_data="sell_option")
 
     set_slippage_btn = InlineKeyboardButton(text=get_text(lang, "set_slippage"), callback_data="set_slippage")
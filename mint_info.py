@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from typing import NamedTuple
+
+from solders.pubkey import Pubkey # type: ignore
+
+from balances import SOL_DECIMALS, TOKEN_PROGRAM_ID, fetch_accounts
+from db_handler_aio import get_all_mint_info, upsert_mint_info
+from singleflight import SingleFlight
+from tokenInfo import SOL_MINT
+from token_registry import token_registry
+
+logger = logging.getLogger(__name__)
+
+# SPL mint layout (Token-2022 mints share it): COption<Pubkey> mint authority,
+# u64 supply, u8 decimals, bool initialized, COption<Pubkey> freeze authority
+MINT_AUTHORITY_OFFSET = 0
+SUPPLY_OFFSET = 36
+DECIMALS_OFFSET = 44
+FREEZE_AUTHORITY_OFFSET = 46
+MINT_SIZE = 82
+
+# Supply and authorities can change; decimals cannot
+INFO_MAX_AGE = 3600
+
+
+class MintInfo(NamedTuple):
+    mint: str
+    decimals: int
+    supply: int  # None when only the registry has been consulted
+    mint_authority: str
+    freeze_authority: str
+    token_program: str
+    source: str  # "chain" or "registry"
+    updated_at: float
+
+
+def _coption_pubkey(data: bytes, offset: int) -> str:
+    if int.from_bytes(data[offset:offset + 4], "little") == 0:
+        return None
+    return str(Pubkey.from_bytes(data[offset + 4:offset + 36]))
+
+
+def decode_mint(mint: str, data: bytes, owner) -> MintInfo:
+    """MintInfo from raw mint account data"""
+    if len(data) < MINT_SIZE:
+        raise ValueError(f"{mint} is not a token mint")
+    return MintInfo(
+        mint=mint,
+        decimals=data[DECIMALS_OFFSET],
+        supply=int.from_bytes(data[SUPPLY_OFFSET:SUPPLY_OFFSET + 8], "little"),
+        mint_authority=_coption_pubkey(data, MINT_AUTHORITY_OFFSET),
+        freeze_authority=_coption_pubkey(data, FREEZE_AUTHORITY_OFFSET),
+        token_program=str(owner),
+        source="chain",
+        updated_at=time.time(),
+    )
+
+
+class MintInfoCache:
+    """
+    Mint decimals, supply and authorities, kept in memory and in SQLite.
+    Decimals come from the token registry when it knows the mint and from the
+    mint account (getAccountInfo) otherwise; once known they are never refetched,
+    so raw amounts can be computed without a round trip.
+    """
+
+    def __init__(self, max_age: float = INFO_MAX_AGE):
+        self.max_age = max_age
+        self._mints = {
+            SOL_MINT: MintInfo(SOL_MINT, SOL_DECIMALS, None, None, None, str(TOKEN_PROGRAM_ID), "chain", 0.0),
+        }
+        self._flight = SingleFlight("mint_info", timeout=15)
+        self._pending_writes = set()
+        self.stats = {
+            "hits": 0,
+            "registry": 0,
+            "fetches": 0,
+            "loaded": 0,
+        }
+
+    async def load(self):
+        """Load the stored mints; call once at startup"""
+        rows = await get_all_mint_info() or []
+        for row in rows:
+            record = MintInfo(row[0], row[1], None if row[2] is None else int(row[2]), *row[3:])
+            self._mints.setdefault(record.mint, record)
+        self.stats["loaded"] = len(rows)
+        logger.info(f"Loaded {len(rows)} mints")
+
+    async def decimals(self, mint: str) -> int:
+        """Decimals of a mint; served from memory once known"""
+        record = self._mints.get(mint)
+        if record is not None:
+            self.stats["hits"] += 1
+            return record.decimals
+        token = token_registry.get(mint)
+        # The registry reports a missing value as 0, so only trust it for non-zero decimals
+        if token is not None and token.decimals:
+            self.stats["registry"] += 1
+            self._store(MintInfo(mint, token.decimals, None, None, None, None, "registry", time.time()))
+            return token.decimals
+        return (await self.get(mint)).decimals
+
+    async def get(self, mint: str, max_age: float = None) -> MintInfo:
+        """Full mint info from the chain unless a chain-sourced record younger than max_age is cached"""
+        max_age = self.max_age if max_age is None else max_age
+        record = self._mints.get(mint)
+        if record is not None and record.source == "chain" and (
+                mint == SOL_MINT or time.time() - record.updated_at < max_age):
+            self.stats["hits"] += 1
+            return record
+        return await self._flight.do(mint, lambda: self._fetch(mint))
+
+    async def _fetch(self, mint: str) -> MintInfo:
+        self.stats["fetches"] += 1
+        account = (await fetch_accounts([mint])).get(mint)
+        if account is None:
+            raise ValueError(f"Mint {mint} does not exist")
+        record = decode_mint(mint, bytes(account.data), account.owner)
+        self._store(record)
+        return record
+
+    def _store(self, record: MintInfo):
+        self._mints[record.mint] = record
+        # Persisted in the background; the in-memory copy is authoritative for this run
+        row = (record.mint, record.decimals, None if record.supply is None else str(record.supply),
+               record.mint_authority, record.freeze_authority, record.token_program, record.source, record.updated_at)
+        task = asyncio.create_task(upsert_mint_info([row]))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def flush(self):
+        """Wait for background writes; call before shutdown"""
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["mints"] = len(self._mints)
+        return stats
+
+
+mint_info_cache = MintInfoCache()
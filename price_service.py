@@ -0,0 +1,77 @@
+import asyncio
+import logging
+
+from http_session import get_http_client
+from singleflight import SingleFlight
+from tokenInfo import JUPITER_API_URL, SOL_MINT, token_price_cache
+
+logger = logging.getLogger(__name__)
+
+# Jupiter price v2 accepts at most 100 ids per request
+MAX_IDS_PER_REQUEST = 100
+
+price_flight = SingleFlight("prices", timeout=10)
+
+
+class PriceService:
+    """Batched USD price lookups against Jupiter's price v2 endpoint"""
+
+    def __init__(self, chunk_size: int = MAX_IDS_PER_REQUEST):
+        self.chunk_size = chunk_size
+
+    async def get_prices(self, mints) -> dict:
+        """
+        Get USD prices for many mints at once.
+        SOL is always included so callers can value SOL amounts from the same snapshot.
+        Mints without a price are left out of the result.
+        """
+        ids = list(dict.fromkeys([SOL_MINT, *mints]))
+        chunks = [ids[i:i + self.chunk_size] for i in range(0, len(ids), self.chunk_size)]
+        results = await asyncio.gather(*(self._fetch_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+        prices = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching prices for {len(chunk)} mints: {result}")
+                continue
+            prices.update(result)
+
+        self._seed_token_cache(prices)
+        return prices
+
+    async def get_price(self, mint: str) -> float:
+        """Get the USD price of a single mint, 0 if unknown"""
+        return (await self.get_prices([mint])).get(mint, 0)
+
+    async def _fetch_chunk(self, chunk) -> dict:
+        # Identical id sets requested at the same time share one request
+        return await price_flight.do(tuple(sorted(chunk)), lambda: self._request_chunk(chunk))
+
+    async def _request_chunk(self, chunk) -> dict:
+        client = get_http_client(JUPITER_API_URL)
+        response = await client.get("/price/v2", params={"ids": ",".join(chunk)})
+        response.raise_for_status()
+        prices = {}
+        for mint, item in (response.json().get('data') or {}).items():
+            if item and item.get('price') is not None:
+                prices[mint] = float(item['price'])
+        return prices
+
+    @staticmethod
+    def _seed_token_cache(prices: dict):
+        """Share the snapshot with TokenInfo so token cards reuse it"""
+        sol_price = prices.get(SOL_MINT)
+        if not sol_price:
+            return
+        for mint, price in prices.items():
+            token_price_cache.set(mint, {
+                'price_in_usd': round(price, 2),
+                'price_in_sol': round(price / sol_price, 6),
+            })
+
+
+price_service = PriceService()
+
+
+async def get_prices(mints) -> dict:
+    return await price_service.get_prices(mints)
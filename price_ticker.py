@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from db_handler_aio import get_active_position_mints
+from price_service import price_service
+from tokenInfo import SOL_MINT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 5.0
+# How long a mint stays hot after somebody looked at it
+RECENT_TTL = 600
+MAX_RECENT_MINTS = 500
+
+
+class PriceTicker:
+    """
+    Background task that keeps USD prices for the hot set of mints in memory.
+    The hot set is every mint with an active position plus recently viewed mints.
+    Handlers read the table synchronously; only the ticker talks to the price API.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, recent_ttl: float = RECENT_TTL,
+                 max_recent: int = MAX_RECENT_MINTS):
+        self.interval = interval
+        self.recent_ttl = recent_ttl
+        self.max_recent = max_recent
+        self.prices = {}
+        self.updated_at = 0.0
+        self._recent = OrderedDict()  # mint -> last viewed (monotonic)
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self.stats = {
+            "refreshes": 0,
+            "errors": 0,
+            "hot_mints": 0,
+            "last_refresh_ms": 0.0,
+        }
+
+    def track(self, *mints):
+        """Mark mints as recently viewed; unseen mints are priced on the next tick"""
+        now = time.monotonic()
+        new = False
+        for mint in mints:
+            if not mint:
+                continue
+            new = new or (mint not in self._recent and mint not in self.prices)
+            self._recent[mint] = now
+            self._recent.move_to_end(mint)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+        if new:
+            self._wakeup.set()
+
+    def get_price(self, mint: str, default=None):
+        """Latest known USD price for mint (no network)"""
+        return self.prices.get(mint, default)
+
+    def get_prices(self, mints) -> dict:
+        """Latest known USD prices for the given mints plus SOL (no network)"""
+        prices = self.prices
+        snapshot = {mint: prices[mint] for mint in mints if mint in prices}
+        if SOL_MINT in prices:
+            snapshot[SOL_MINT] = prices[SOL_MINT]
+        return snapshot
+
+    async def get_or_fetch_prices(self, mints) -> dict:
+        """
+        Prices from the in-memory table; only mints it has not priced yet hit the network.
+        The fetched mints are not tracked: the hot set is positions and viewed token cards.
+        """
+        mints = list(mints)
+        prices = self.get_prices(mints)
+        missing = [mint for mint in mints if mint not in prices]
+        if missing or SOL_MINT not in prices:
+            prices.update(await price_service.get_prices(missing))
+        return prices
+
+    @property
+    def age(self) -> float:
+        """Seconds since the last successful refresh"""
+        return time.monotonic() - self.updated_at if self.updated_at else float("inf")
+
+    async def start(self, interval: float = None):
+        if interval is not None:
+            self.interval = interval
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Price ticker started (interval={self.interval}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Price ticker stopped")
+
+    async def refresh(self):
+        """Refresh prices for the current hot set in batched requests"""
+        started = time.monotonic()
+        hot = await self._hot_set()
+        prices = await price_service.get_prices(hot)
+        self.stats["hot_mints"] = len(hot)
+        if not prices:
+            # Every chunk failed: keep serving the last table and leave its age alone
+            self.stats["errors"] += 1
+            return
+        # Mints the API skipped this round keep their last price; mints that left the hot set drop out.
+        # Swap in a new table so readers never see a half-updated one
+        keep = {*hot, SOL_MINT}
+        table = {mint: price for mint, price in self.prices.items() if mint in keep}
+        table.update(prices)
+        self.prices = table
+        self.updated_at = time.monotonic()
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = round((self.updated_at - started) * 1000, 1)
+
+    async def _hot_set(self) -> list:
+        cutoff = time.monotonic() - self.recent_ttl
+        while self._recent and next(iter(self._recent.values())) < cutoff:
+            self._recent.popitem(last=False)
+        position_mints = await get_active_position_mints() or []
+        return list(dict.fromkeys([*position_mints, *self._recent]))
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Price ticker refresh failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+price_ticker = PriceTicker()
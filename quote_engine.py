@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import NamedTuple
+
+from jupiter_client import JUPITER_SWAP_API_URL, JupiterClient, SwapTransaction
+
+logger = logging.getLogger(__name__)
+
+# Pick the best quote among those that arrived within the deadline
+QUOTE_DEADLINE = 0.8
+# If none arrived by then, take the first one before this
+QUOTE_TIMEOUT = 5.0
+LATENCY_SAMPLES = 200
+
+
+class Quote(NamedTuple):
+    source: "QuoteSource"
+    input_mint: str
+    output_mint: str
+    in_amount: int
+    out_amount: int
+    price_impact_pct: float
+    latency: float
+    raw: dict
+
+
+class QuoteSource(ABC):
+    """A quote provider; subclasses implement fetch_quote and build_transaction"""
+
+    name = "source"
+
+    @abstractmethod
+    async def fetch_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int) -> Quote:
+        """ExactIn quote for amount (raw units) of input_mint"""
+
+    @abstractmethod
+    async def build_transaction(self, quote: Quote, user_public_key: str) -> SwapTransaction:
+        """Unsigned transaction executing the quote"""
+
+
+class JupiterQuoteSource(QuoteSource):
+    """Jupiter v6 quote/swap API with fixed route constraints"""
+
+    def __init__(self, name: str = "jupiter", base_url: str = JUPITER_SWAP_API_URL,
+                 only_direct_routes: bool = False, max_accounts: int = None):
+        self.name = name
+        self.client = JupiterClient(base_url)
+        self.only_direct_routes = only_direct_routes
+        self.max_accounts = max_accounts
+
+    async def fetch_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int) -> Quote:
+        started = time.monotonic()
+        raw = await self.client.quote(input_mint, output_mint, amount, slippage_bps,
+                                      only_direct_routes=self.only_direct_routes, max_accounts=self.max_accounts)
+        return Quote(
+            source=self,
+            input_mint=input_mint,
+            output_mint=output_mint,
+            in_amount=int(raw["inAmount"]),
+            out_amount=int(raw["outAmount"]),
+            price_impact_pct=float(raw.get("priceImpactPct") or 0),
+            latency=time.monotonic() - started,
+            raw=raw,
+        )
+
+    async def build_transaction(self, quote: Quote, user_public_key: str) -> SwapTransaction:
+        return await self.client.swap_transaction(quote.raw, user_public_key)
+
+
+class SourceStats:
+    __slots__ = ("requests", "answered", "errors", "late", "wins", "latencies")
+
+    def __init__(self):
+        self.requests = 0
+        self.answered = 0
+        self.errors = 0
+        self.late = 0
+        self.wins = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def as_dict(self) -> dict:
+        ordered = sorted(self.latencies)
+        pick = lambda p: round(ordered[min(len(ordered) - 1, len(ordered) * p // 100)] * 1000, 1) if ordered else None
+        return {
+            "requests": self.requests,
+            "answered": self.answered,
+            "errors": self.errors,
+            "late": self.late,
+            "wins": self.wins,
+            "win_rate": round(self.wins / self.requests, 4) if self.requests else 0.0,
+            "latency_p50_ms": pick(50),
+            "latency_p95_ms": pick(95),
+        }
+
+
+class QuoteEngine:
+    """
+    Queries every quote source concurrently and returns the best out-amount
+    among the answers that arrived before the deadline. Late answers still
+    count towards each source's latency stats.
+    """
+
+    def __init__(self, sources=None, deadline: float = QUOTE_DEADLINE, timeout: float = QUOTE_TIMEOUT):
+        self.sources = []
+        self.deadline = deadline
+        self.timeout = timeout
+        self._stats = {}
+        for source in sources or ():
+            self.add_source(source)
+
+    def add_source(self, source: QuoteSource):
+        self.sources.append(source)
+        self._stats[source.name] = SourceStats()
+
+    async def _fetch(self, source: QuoteSource, call: dict, *args) -> Quote:
+        stats = self._stats[source.name]
+        stats.requests += 1
+        started = time.monotonic()
+        try:
+            quote = await source.fetch_quote(*args)
+        except Exception:
+            stats.errors += 1
+            raise
+        stats.answered += 1
+        stats.latencies.append(time.monotonic() - started)
+        if call["decided"]:
+            stats.late += 1
+        return quote
+
+    async def best_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int) -> Quote:
+        """Best ExactIn quote; raises RuntimeError if no source answered in time"""
+        if not self.sources:
+            raise RuntimeError("No quote sources configured")
+        call = {"decided": False}
+        tasks = {
+            asyncio.create_task(self._fetch(source, call, input_mint, output_mint, amount, slippage_bps)): source
+            for source in self.sources
+        }
+        for task in tasks:
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        started = time.monotonic()
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        quotes, errors = self._collect(done, tasks)
+        # Nothing usable by the deadline: take the first good answer before the hard timeout
+        while not quotes and pending:
+            remaining = self.timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            new_quotes, new_errors = self._collect(done, tasks)
+            quotes += new_quotes
+            errors += new_errors
+        # Stragglers keep running (bounded by the HTTP timeout) so their latency is still recorded
+        call["decided"] = True
+
+        if not quotes:
+            raise RuntimeError(f"No quote for {input_mint} -> {output_mint}: {errors or 'timed out'}")
+        best = max(quotes, key=lambda quote: quote.out_amount)
+        self._stats[best.source.name].wins += 1
+        return best
+
+    @staticmethod
+    def _collect(done, tasks) -> tuple:
+        quotes, errors = [], []
+        for task in done:
+            if task.cancelled():
+                continue
+            if task.exception() is not None:
+                errors.append(f"{tasks[task].name}: {task.exception()}")
+            else:
+                quotes.append(task.result())
+        return quotes, errors
+
+    async def build_transaction(self, quote: Quote, user_public_key: str) -> SwapTransaction:
+        """Unsigned swap transaction from the source that produced the quote"""
+        return await quote.source.build_transaction(quote, user_public_key)
+
+    def get_stats(self) -> dict:
+        return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+
+quote_engine = QuoteEngine([
+    JupiterQuoteSource("jupiter"),
+    JupiterQuoteSource("jupiter_direct", only_direct_routes=True),
+])
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+
+from http_session import get_rate_limiter
+from jupiter_client import JUPITER_SWAP_API_URL
+from quote_engine import QuoteEngine, quote_engine
+from rate_limiter import Priority, request_priority
+
+logger = logging.getLogger(__name__)
+
+# A prefetched quote is used for a swap only while it is this young
+MAX_QUOTE_AGE = 10.0
+# While a token card is shown, its preset quotes are refetched this often...
+REFRESH_INTERVAL = 8.0
+# ...for at most this long after it was shown
+PREFETCH_WINDOW = 30.0
+# Speculative quotes ask only the first source(s) of the engine, not all of them
+PREFETCH_SOURCES = 1
+
+
+class QuotePrefetcher:
+    """
+    Speculative quotes for the amounts a user is likely to pick next.
+    prefetch() keeps quotes for an owner's candidate swaps fresh in the
+    background; best_quote() serves a fresh (or in-flight) one when the swap
+    matches and otherwise asks the quote engine. Quotes are keyed by
+    (input mint, output mint, raw amount, slippage bps), so owners share them.
+    Prefetches go out in the lowest rate-limit class, and a round is skipped
+    while other requests are queued for the upstream's limiter.
+    """
+
+    def __init__(self, engine=quote_engine, max_age: float = MAX_QUOTE_AGE,
+                 refresh_interval: float = REFRESH_INTERVAL, window: float = PREFETCH_WINDOW,
+                 prefetch_engine=None, upstream: str = JUPITER_SWAP_API_URL):
+        self.engine = engine
+        self.prefetch_engine = prefetch_engine or QuoteEngine(engine.sources[:PREFETCH_SOURCES])
+        self.upstream = upstream
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.window = window
+        self._quotes = {}  # key -> (task, started_at)
+        self._owners = {}  # owner -> (refresh task, keys)
+        self.stats = {
+            "prefetched": 0,
+            "skipped": 0,
+            "cancelled": 0,
+            "hits": 0,
+            "inflight_hits": 0,
+            "stale": 0,
+            "misses": 0,
+        }
+
+    def prefetch(self, owner, swaps):
+        """Keep quotes for swaps [(input_mint, output_mint, amount, slippage_bps)] fresh, replacing owner's previous set"""
+        self.cancel(owner)
+        self._purge()
+        keys = [tuple(swap) for swap in swaps]
+        task = asyncio.create_task(self._run(keys))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._owners[owner] = (task, keys)
+
+    def cancel(self, owner):
+        """Stop prefetching for owner (e.g. they navigated away from the card)"""
+        entry = self._owners.pop(owner, None)
+        if entry is None:
+            return
+        task, keys = entry
+        task.cancel()
+        shared = {key for _, other_keys in self._owners.values() for key in other_keys}
+        for key in keys:
+            quote = self._quotes.get(key)
+            if key not in shared and quote is not None and not quote[0].done():
+                quote[0].cancel()
+                del self._quotes[key]
+                self.stats["cancelled"] += 1
+
+    async def _run(self, keys):
+        ends_at = time.monotonic() + self.window
+        while True:
+            if self._upstream_busy():
+                # Real quotes and trades are waiting on the same budget
+                self.stats["skipped"] += 1
+            else:
+                for key in keys:
+                    self._start(key)
+            if time.monotonic() + self.refresh_interval > ends_at:
+                return
+            await asyncio.sleep(self.refresh_interval)
+
+    def _start(self, key):
+        current = self._quotes.get(key)
+        if current is not None and time.monotonic() - current[1] < self.refresh_interval:
+            return
+        task = asyncio.create_task(self._fetch(key))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._quotes[key] = (task, time.monotonic())
+        self.stats["prefetched"] += 1
+
+    async def _fetch(self, key):
+        # Set in this task's own context, so it covers the engine's requests and nothing else
+        request_priority.set(Priority.SPECULATIVE)
+        return await self.prefetch_engine.best_quote(*key)
+
+    def _upstream_busy(self) -> bool:
+        limiter = get_rate_limiter(self.upstream)
+        return limiter is not None and limiter.queued() > 0
+
+    def _purge(self):
+        cutoff = time.monotonic() - self.max_age
+        for key in [key for key, (task, started) in self._quotes.items() if started < cutoff and task.done()]:
+            del self._quotes[key]
+
+    async def best_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int):
+        """Prefetched quote if one is fresh, else a new one from the engine"""
+        key = (input_mint, output_mint, amount, slippage_bps)
+        entry = self._quotes.get(key)
+        if entry is not None:
+            task, started = entry
+            if time.monotonic() - started > self.max_age:
+                self.stats["stale"] += 1
+            else:
+                inflight = not task.done()
+                try:
+                    # Shielded so a cancelled swap does not cancel a quote other owners may share
+                    quote = await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    # Prefetch cancelled underneath us; only a cancelled swap should propagate
+                    if not task.cancelled():
+                        raise
+                    quote = None
+                except Exception:
+                    quote = None
+                if quote is not None:
+                    self.stats["inflight_hits" if inflight else "hits"] += 1
+                    return quote
+                self.stats["misses"] += 1
+        else:
+            self.stats["misses"] += 1
+        return await self.engine.best_quote(input_mint, output_mint, amount, slippage_bps)
+
+    async def stop(self):
+        for owner in list(self._owners):
+            self.cancel(owner)
+        tasks = [task for task, _ in self._quotes.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._quotes.clear()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        served = stats["hits"] + stats["inflight_hits"]
+        lookups = served + stats["stale"] + stats["misses"]
+        stats["hit_rate"] = round(served / lookups, 4) if lookups else 0.0
+        stats["owners"] = len(self._owners)
+        stats["cached"] = len(self._quotes)
+        return stats
+
+
+quote_prefetcher = QuotePrefetcher()
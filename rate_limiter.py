@@ -0,0 +1,269 @@
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from collections import deque
+from enum import IntEnum
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_limiters = {}
+
+
+class Priority(IntEnum):
+    """Request classes, most urgent first"""
+    TRADE = 0
+    CONFIRMATION = 1
+    REBROADCAST = 2  # repeat sends of a transaction that is already out
+    QUOTE = 3
+    BALANCE = 4  # balances and token metadata
+    SPECULATIVE = 5  # prefetches nobody is waiting for yet
+
+
+# Share of the burst lower classes must leave in the bucket for the classes above them
+RESERVE_FRACTION = {
+    Priority.TRADE: 0.0,
+    Priority.CONFIRMATION: 0.0,
+    Priority.REBROADCAST: 0.1,
+    Priority.QUOTE: 0.1,
+    Priority.BALANCE: 0.2,
+    Priority.SPECULATIVE: 0.3,
+}
+
+# Overrides the classifier for requests made in this context (e.g. background prefetches);
+# a single request can do the same with the "priority" request extension
+request_priority = contextvars.ContextVar("request_priority", default=None)
+
+# Adaptive backoff: halve the rate on 429 (at most once per second), creep back on success
+BACKOFF_FACTOR = 0.5
+BACKOFF_COOLDOWN = 1.0
+RECOVERY_STEP = 0.02
+MIN_RATE_FRACTION = 0.05
+DEFAULT_RETRY_AFTER = 1.0
+
+# Upper bounds of the wait-time histogram buckets in milliseconds
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+RPC_METHOD_PRIORITY = {
+    "sendTransaction": Priority.TRADE,
+    "getSignatureStatuses": Priority.CONFIRMATION,
+    "getBlockHeight": Priority.CONFIRMATION,
+    "getLatestBlockhash": Priority.CONFIRMATION,
+    "isBlockhashValid": Priority.CONFIRMATION,
+    "simulateTransaction": Priority.QUOTE,
+    "getRecentPrioritizationFees": Priority.QUOTE,
+}
+
+
+class RateLimiter:
+    """
+    Token bucket with strict priority classes and FIFO queues within a class.
+    A queued trade is always served before queued confirmations, quotes and lookups,
+    and lower classes cannot drain the last few tokens of the burst.
+    The refill rate halves on HTTP 429 and recovers gradually on successes.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float = None):
+        self.name = name
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.burst
+        self._reserve = {priority: int(self.burst * fraction) for priority, fraction in RESERVE_FRACTION.items()}
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_backoff = 0.0
+        self._queues = {priority: deque() for priority in Priority}
+        self._timer = None
+        self.stats = {
+            "acquired": {priority.name: 0 for priority in Priority},
+            "rate_limited": 0,
+            "backoffs": 0,
+        }
+        self._histograms = {priority.name: [0] * (len(WAIT_BUCKETS_MS) + 1) for priority in Priority}
+        _limiters[name] = self
+
+    def _refill(self):
+        now = time.monotonic()
+        if now > self._paused_until:
+            elapsed = now - max(self._updated, self._paused_until)
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def _can_take(self, priority: Priority) -> bool:
+        return time.monotonic() >= self._paused_until and self.tokens >= 1 + self._reserve[priority]
+
+    def _record(self, priority: Priority, waited: float):
+        self.stats["acquired"][priority.name] += 1
+        waited_ms = waited * 1000
+        histogram = self._histograms[priority.name]
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if waited_ms <= bound:
+                histogram[i] += 1
+                break
+        else:
+            histogram[-1] += 1
+
+    async def acquire(self, priority: Priority = Priority.BALANCE):
+        """Wait for a token; nobody of the same or higher class who queued earlier is overtaken"""
+        self._refill()
+        if self._can_take(priority) and not any(self._queues[p] for p in Priority if p <= priority):
+            self.tokens -= 1
+            self._record(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].append((future, time.monotonic()))
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The token was granted just as the waiter went away; give it back
+                self.tokens = min(self.burst, self.tokens + 1)
+                self._schedule()
+            raise
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill()
+        now = time.monotonic()
+        for priority in Priority:
+            queue = self._queues[priority]
+            while queue:
+                future, queued_at = queue[0]
+                if future.done():
+                    queue.popleft()
+                    continue
+                if not self._can_take(priority):
+                    # Strict priority: nothing below a blocked class may go first
+                    self._schedule()
+                    return
+                queue.popleft()
+                self.tokens -= 1
+                self._record(priority, now - queued_at)
+                future.set_result(None)
+
+    def _schedule(self):
+        if self._timer is not None:
+            return
+        for priority in Priority:
+            if any(not future.done() for future, _ in self._queues[priority]):
+                break
+        else:
+            return
+        self._refill()
+        needed = 1 + self._reserve[priority] - self.tokens
+        delay = max(needed / self.rate, self._paused_until - time.monotonic(), 0.0)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def on_rate_limited(self, retry_after: float = None):
+        """The upstream answered 429: pause, and cut the rate unless we just did"""
+        self.stats["rate_limited"] += 1
+        now = time.monotonic()
+        self._refill()
+        self.tokens = 0.0
+        self._paused_until = max(self._paused_until, now + (retry_after or DEFAULT_RETRY_AFTER))
+        if now - self._last_backoff >= BACKOFF_COOLDOWN:
+            self._last_backoff = now
+            self.rate = max(self.base_rate * MIN_RATE_FRACTION, self.rate * BACKOFF_FACTOR)
+            self.stats["backoffs"] += 1
+            logger.warning(f"Rate limiter {self.name} got HTTP 429, rate now {self.rate:.1f}/s")
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._schedule()
+
+    def queued(self) -> int:
+        """Requests of any class waiting for a token"""
+        return sum(not future.done() for queue in self._queues.values() for future, _ in queue)
+
+    def on_success(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+    def get_stats(self) -> dict:
+        self._refill()
+        labels = [f"<={bound}ms" for bound in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+        return {
+            "rate": round(self.rate, 2),
+            "base_rate": self.base_rate,
+            "tokens": round(self.tokens, 2),
+            "queue_depth": {priority.name: sum(not f.done() for f, _ in self._queues[priority]) for priority in Priority},
+            "acquired": dict(self.stats["acquired"]),
+            "rate_limited": self.stats["rate_limited"],
+            "backoffs": self.stats["backoffs"],
+            "wait_histogram": {name: dict(zip(labels, counts)) for name, counts in self._histograms.items()},
+        }
+
+
+def rpc_priority(request: httpx.Request) -> Priority:
+    """Priority of a JSON-RPC request from its method (batches take their most urgent call)"""
+    try:
+        payload = json.loads(request.content)
+    except ValueError:
+        return Priority.BALANCE
+    calls = payload if isinstance(payload, list) else [payload]
+    return min((RPC_METHOD_PRIORITY.get(call.get("method"), Priority.BALANCE)
+                for call in calls if isinstance(call, dict)), default=Priority.BALANCE)
+
+
+def jupiter_priority(request: httpx.Request) -> Priority:
+    """Priority of a Jupiter API request from its path"""
+    path = request.url.path
+    if path.endswith("/swap") or path.endswith("/swap-instructions"):
+        return Priority.TRADE
+    if path.endswith("/quote"):
+        return Priority.QUOTE
+    return Priority.BALANCE
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Wraps an httpx transport so every request first takes a token from the limiter"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter, classify=rpc_priority):
+        self.transport = transport
+        self.limiter = limiter
+        self.classify = classify
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.acquire(request)
+        return await self.send(request)
+
+    async def acquire(self, request: httpx.Request):
+        """Wait for request's token; callers timing the upstream call this before starting the clock"""
+        await request.aread()
+        priority = request.extensions.get("priority", request_priority.get())
+        await self.limiter.acquire(self.classify(request) if priority is None else Priority(priority))
+
+    async def send(self, request: httpx.Request) -> httpx.Response:
+        """Send a request whose token was already acquired"""
+        response = await self.transport.handle_async_request(request)
+        if response.status_code == 429:
+            self.limiter.on_rate_limited(_retry_after(response))
+        else:
+            self.limiter.on_success()
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def _retry_after(response: httpx.Response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_limiter(name: str):
+    """The limiter registered under name, None if it has not been created yet"""
+    return _limiters.get(name)
+
+
+def get_stats() -> dict:
+    """Stats for every rate limiter in the process"""
+    return {name: limiter.get_stats() for name, limiter in _limiters.items()}
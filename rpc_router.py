@@ -0,0 +1,347 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC methods that change chain state; they fail over but are never hedged
+WRITE_METHODS = frozenset({"sendTransaction", "requestAirdrop"})
+
+EWMA_ALPHA = 0.2
+LATENCY_SAMPLES = 200
+# Scoring: an error rate of 100% costs as much as 4x the endpoint's latency,
+# and every slot behind the best endpoint costs 50ms
+ERROR_PENALTY = 4.0
+SLOT_LAG_PENALTY = 0.05
+# Endpoints further behind than this are only used when nothing else is available
+MAX_SLOT_LAG = 20
+
+# Circuit breaker
+FAILURE_THRESHOLD = 5
+OPEN_COOLDOWN = 5.0
+MAX_OPEN_COOLDOWN = 60.0
+
+# Hedged reads fire a second request once the primary is slower than its own p95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY = 0.25
+HEDGE_MIN_DELAY = 0.02
+HEDGE_MAX_DELAY = 2.0
+
+SLOT_PROBE_INTERVAL = 2.0
+BROADCAST_TIMEOUT = 5.0
+GET_SLOT_BODY = b'{"jsonrpc":"2.0","id":1,"method":"getSlot","params":[{"commitment":"processed"}]}'
+
+
+class EndpointError(Exception):
+    """An endpoint answered with a status that should be retried elsewhere"""
+
+    def __init__(self, url: str, status_code: int):
+        super().__init__(f"{url} returned HTTP {status_code}")
+        self.status_code = status_code
+
+
+class Endpoint:
+    """One RPC endpoint with its own connection pool, health numbers and circuit breaker"""
+
+    def __init__(self, url: str, transport: httpx.AsyncBaseTransport):
+        self.url = httpx.URL(url)
+        self.transport = transport
+        self.latency = None  # EWMA seconds
+        self.error_rate = 0.0  # EWMA of failures
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.slot = None
+        self.slot_lag = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = OPEN_COOLDOWN
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "hedges_won": 0,
+            "abandoned": 0,
+            "circuit_opens": 0,
+        }
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    def record_success(self, elapsed: float):
+        self.stats["requests"] += 1
+        self.latencies.append(elapsed)
+        self.latency = elapsed if self.latency is None else (
+            EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * self.latency)
+        self.error_rate *= 1 - EWMA_ALPHA
+        self.consecutive_failures = 0
+        if self.open_until:
+            # Half-open trial succeeded
+            logger.info(f"RPC endpoint {self.url} recovered")
+            self.open_until = 0.0
+            self.cooldown = OPEN_COOLDOWN
+
+    def record_abandoned(self, elapsed: float):
+        """A request given up on after elapsed seconds (its hedge won): at least that slow"""
+        self.stats["abandoned"] += 1
+        self.latencies.append(elapsed)
+        self.latency = elapsed if self.latency is None else (
+            EWMA_ALPHA * max(elapsed, self.latency) + (1 - EWMA_ALPHA) * self.latency)
+
+    def record_failure(self):
+        self.stats["requests"] += 1
+        self.stats["errors"] += 1
+        self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+        self.consecutive_failures += 1
+        if self.open_until:
+            # Failed half-open trial: back off further
+            self.cooldown = min(self.cooldown * 2, MAX_OPEN_COOLDOWN)
+            self.open_until = time.monotonic() + self.cooldown
+        elif self.consecutive_failures >= FAILURE_THRESHOLD:
+            self.open_until = time.monotonic() + self.cooldown
+            self.stats["circuit_opens"] += 1
+            logger.warning(f"RPC endpoint {self.url} tripped its circuit breaker for {self.cooldown:.0f}s")
+
+    def score(self) -> float:
+        """Lower is better; unmeasured endpoints score 0 so they get tried, until they fail"""
+        latency = self.latency if self.latency is not None else 0.0
+        # Scaled by a default latency before the first success, so failures count from the start
+        error_penalty = ERROR_PENALTY * self.error_rate * (self.latency or HEDGE_DEFAULT_DELAY)
+        return latency + error_penalty + SLOT_LAG_PENALTY * self.slot_lag
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        ordered = sorted(self.latencies)
+        p95 = ordered[int(len(ordered) * 0.95) - 1]
+        return min(max(p95, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats.update({
+            "url": str(self.url),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "slot": self.slot,
+            "slot_lag": self.slot_lag,
+            "open": self.is_open,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+        })
+        return stats
+
+
+class RpcRouter(httpx.AsyncBaseTransport):
+    """
+    httpx transport that spreads JSON-RPC calls over several endpoints.
+    Reads go to the endpoint with the best EWMA latency, error rate and slot lag,
+    optionally hedged to the runner-up once the primary exceeds its p95 latency.
+    Writes are sent to one endpoint at a time and only fail over on errors.
+    Endpoints that keep failing are skipped until their circuit breaker cools down.
+    """
+
+    def __init__(self, urls, http2: bool = False, limits: httpx.Limits = None, hedge: bool = True,
+                 probe_interval: float = SLOT_PROBE_INTERVAL, transport_factory=None):
+        if isinstance(urls, str):
+            urls = [urls]
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            raise ValueError("RpcRouter needs at least one endpoint")
+        if transport_factory is None:
+            limits = limits or httpx.Limits()
+            transport_factory = lambda url: httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+        self.endpoints = [Endpoint(url, transport_factory(url)) for url in urls]
+        self.hedge = hedge
+        self.probe_interval = probe_interval
+        self._probe_task = None
+        self.stats = {
+            "reads": 0,
+            "writes": 0,
+            "failovers": 0,
+            "hedged": 0,
+            "probes": 0,
+        }
+
+    def ranked(self) -> list:
+        """Endpoints best first; open circuits and lagging nodes go last"""
+        return sorted(self.endpoints, key=lambda e: (e.is_open, e.slot_lag > MAX_SLOT_LAG, e.score()))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._ensure_probing()
+        body = await request.aread()
+        if _is_write(body):
+            self.stats["writes"] += 1
+            return await self._send_with_failover(request, body)
+        self.stats["reads"] += 1
+        if self.hedge and len(self.endpoints) > 1:
+            return await self._send_hedged(request, body)
+        return await self._send_with_failover(request, body)
+
+    async def _send_with_failover(self, request: httpx.Request, body: bytes) -> httpx.Response:
+        error = None
+        for attempt, endpoint in enumerate(self.ranked()):
+            if attempt:
+                self.stats["failovers"] += 1
+            try:
+                return await self._send(endpoint, request, body)
+            except (httpx.TransportError, EndpointError) as e:
+                error = e
+                logger.warning(f"RPC request to {endpoint.url} failed: {e}")
+        raise _as_transport_error(error, request)
+
+    async def _send_hedged(self, request: httpx.Request, body: bytes) -> httpx.Response:
+        candidates = self.ranked()
+        primary = candidates[0]
+        tasks = {asyncio.create_task(self._send(primary, request, body)): primary}
+        started = {endpoint: time.monotonic() for endpoint in tasks.values()}
+        pending_endpoints = candidates[1:]
+        error = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=primary.hedge_delay())
+            if not done and pending_endpoints:
+                self.stats["hedged"] += 1
+                endpoint = pending_endpoints.pop(0)
+                tasks[asyncio.create_task(self._send(endpoint, request, body))] = endpoint
+                started[endpoint] = time.monotonic()
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    endpoint = tasks.pop(task)
+                    try:
+                        response = task.result()
+                    except (httpx.TransportError, EndpointError) as e:
+                        error = e
+                        logger.warning(f"RPC request to {endpoint.url} failed: {e}")
+                        continue
+                    if endpoint is not primary:
+                        endpoint.stats["hedges_won"] += 1
+                    return response
+                if not tasks and pending_endpoints:
+                    # Everything in flight failed; fail over to the next endpoint
+                    self.stats["failovers"] += 1
+                    endpoint = pending_endpoints.pop(0)
+                    tasks[asyncio.create_task(self._send(endpoint, request, body))] = endpoint
+                    started[endpoint] = time.monotonic()
+        finally:
+            now = time.monotonic()
+            for task, endpoint in tasks.items():
+                if not task.done():
+                    # The loser's latency would otherwise never be recorded, keeping it ranked first
+                    endpoint.record_abandoned(now - started[endpoint])
+                task.cancel()
+        raise _as_transport_error(error, request)
+
+    async def _send(self, endpoint: Endpoint, request: httpx.Request, body: bytes) -> httpx.Response:
+        headers = [(k, v) for k, v in request.headers.raw if k.lower() != b"host"]
+        upstream = httpx.Request(request.method, endpoint.url, headers=headers, content=body,
+                                 extensions=request.extensions)
+        transport = endpoint.transport
+        send = transport.handle_async_request
+        acquire = getattr(transport, "acquire", None)
+        if acquire is not None:
+            # Rate-limited endpoint: queueing for a token is not the endpoint's latency
+            await acquire(upstream)
+            send = transport.send
+        started = time.monotonic()
+        try:
+            response = await send(upstream)
+            try:
+                # JSON-RPC bodies are small; read them here so latency covers the whole answer
+                content = b"".join([chunk async for chunk in response.stream])
+            finally:
+                await response.aclose()
+        except httpx.TransportError:
+            endpoint.record_failure()
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            endpoint.record_failure()
+            raise EndpointError(str(endpoint.url), response.status_code)
+        endpoint.record_success(time.monotonic() - started)
+        return httpx.Response(response.status_code, headers=response.headers, content=content,
+                              extensions=response.extensions, request=request)
+
+    async def broadcast(self, body: bytes, timeout: float = BROADCAST_TIMEOUT) -> list:
+        """
+        POST the same JSON-RPC body to every endpoint whose circuit is closed (or the
+        best one if all are open). Returns [(url, response or exception)].
+        """
+        targets = [endpoint for endpoint in self.ranked() if not endpoint.is_open] or self.ranked()[:1]
+        request = httpx.Request("POST", targets[0].url, content=body,
+                                headers={"Content-Type": "application/json"},
+                                extensions={"timeout": {"connect": timeout, "read": timeout,
+                                                        "write": timeout, "pool": timeout}})
+        self.stats["writes"] += 1
+        results = await asyncio.gather(*(self._send(endpoint, request, body) for endpoint in targets),
+                                       return_exceptions=True)
+        return [(str(endpoint.url), result) for endpoint, result in zip(targets, results)]
+
+    def _ensure_probing(self):
+        if len(self.endpoints) > 1 and self.probe_interval and (self._probe_task is None or self._probe_task.done()):
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"RPC slot probe failed: {e}")
+            await asyncio.sleep(self.probe_interval)
+
+    async def probe(self):
+        """Ask every endpoint for its slot and update slot lag"""
+        self.stats["probes"] += 1
+        await asyncio.gather(*(self._probe_endpoint(endpoint) for endpoint in self.endpoints))
+        slots = [endpoint.slot for endpoint in self.endpoints if endpoint.slot is not None]
+        if slots:
+            best = max(slots)
+            for endpoint in self.endpoints:
+                endpoint.slot_lag = best - endpoint.slot if endpoint.slot is not None else MAX_SLOT_LAG + 1
+
+    @property
+    def tip_slot(self):
+        """Highest processed slot seen by the last probe, None if nothing was probed"""
+        slots = [endpoint.slot for endpoint in self.endpoints if endpoint.slot is not None]
+        return max(slots) if slots else None
+
+    async def _probe_endpoint(self, endpoint: Endpoint):
+        request = httpx.Request("POST", endpoint.url, content=GET_SLOT_BODY,
+                                headers={"Content-Type": "application/json"},
+                                extensions={"timeout": {"connect": 2.0, "read": 2.0, "write": 2.0, "pool": 2.0}})
+        try:
+            response = await self._send(endpoint, request, GET_SLOT_BODY)
+            endpoint.slot = json.loads(response.content)["result"]
+        except Exception as e:
+            endpoint.slot = None
+            logger.debug(f"Slot probe for {endpoint.url} failed: {e}")
+
+    async def aclose(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        for endpoint in self.endpoints:
+            await endpoint.transport.aclose()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["endpoints"] = [endpoint.get_stats() for endpoint in self.endpoints]
+        return stats
+
+
+def _is_write(body: bytes) -> bool:
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return False
+    calls = payload if isinstance(payload, list) else [payload]
+    return any(isinstance(call, dict) and call.get("method") in WRITE_METHODS for call in calls)
+
+
+def _as_transport_error(error, request: httpx.Request) -> httpx.TransportError:
+    if isinstance(error, httpx.TransportError):
+        return error
+    return httpx.NetworkError(f"All RPC endpoints failed: {error}", request=request)
@@ -0,0 +1,153 @@
+import json
+import logging
+
+import httpx
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Finalized
+from solana.rpc.providers.async_http import AsyncHTTPProvider
+
+from http_session import HTTP2_AVAILABLE
+from rate_limiter import RateLimiter, RateLimitedTransport, rpc_priority
+from rpc_router import RpcRouter
+
+logger = logging.getLogger(__name__)
+
+# One pool for every wallet; HTTP/2 multiplexes concurrent JSON-RPC calls over few sockets
+MAX_CONNECTIONS = 50
+MAX_KEEPALIVE = 20
+KEEPALIVE_EXPIRY = 90.0
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 15.0
+
+
+class RoutedProvider(AsyncHTTPProvider):
+    """solana-py's HTTP provider sending through a shared httpx client"""
+
+    def __init__(self, endpoint: str, session: httpx.AsyncClient, timeout: float = READ_TIMEOUT):
+        # AsyncHTTPProvider.__init__ would open an httpx client of its own that nothing closes
+        super(AsyncHTTPProvider, self).__init__(endpoint, timeout=timeout)
+        self.session = session
+
+
+class RoutedClient(AsyncClient):
+    """solana-py's AsyncClient over a RoutedProvider"""
+
+    def __init__(self, endpoint: str, session: httpx.AsyncClient, commitment: Commitment = None):
+        super(AsyncClient, self).__init__(commitment)
+        self._provider = RoutedProvider(endpoint, session)
+
+
+class RpcTransport:
+    """
+    Process-wide Solana RPC client backed by tuned keep-alive connection pools.
+    Requests are routed across every configured endpoint by RpcRouter; with
+    requests_per_second set, each endpoint gets its own priority rate limiter.
+    """
+
+    def __init__(self, rpc_urls, commitment: Commitment = Finalized,
+                 max_connections: int = MAX_CONNECTIONS, max_keepalive: int = MAX_KEEPALIVE,
+                 keepalive_expiry: float = KEEPALIVE_EXPIRY, http2: bool = HTTP2_AVAILABLE,
+                 hedge: bool = True, requests_per_second: float = None):
+        self.rpc_urls = [rpc_urls] if isinstance(rpc_urls, str) else list(rpc_urls)
+        self.rpc_url = self.rpc_urls[0]
+        self.http2 = http2 and HTTP2_AVAILABLE
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+
+        def make_transport(url):
+            transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=limits)
+            if requests_per_second:
+                # Quotas are per provider, so every endpoint gets its own bucket
+                limiter = RateLimiter(f"rpc:{httpx.URL(url).host}", requests_per_second)
+                transport = RateLimitedTransport(transport, limiter, classify=rpc_priority)
+            return transport
+
+        self.router = RpcRouter(self.rpc_urls, hedge=hedge, transport_factory=make_transport)
+        self.session = httpx.AsyncClient(
+            transport=self.router,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+        # The router rewrites the URL, so the provider's endpoint is only nominal
+        self.client = RoutedClient(self.rpc_url, self.session, commitment=commitment)
+        logger.info(f"Opened RPC transport for {len(self.rpc_urls)} endpoint(s) (http2={self.http2})")
+
+    async def close(self):
+        await self.session.aclose()
+
+
+_transport = None
+
+
+def open_rpc_transport(rpc_urls, **kwargs) -> RpcTransport:
+    """Open the process-wide RPC transport for one URL or a list of them (called from main())"""
+    global _transport
+    if _transport is None:
+        _transport = RpcTransport(rpc_urls, **kwargs)
+    return _transport
+
+
+async def close_rpc_transport():
+    global _transport
+    if _transport is not None:
+        await _transport.close()
+        _transport = None
+
+
+def get_rpc_client(rpc_url: str = None) -> AsyncClient:
+    """The shared RPC client; opened lazily from rpc_url for scripts that skip main()"""
+    if _transport is None:
+        if rpc_url is None:
+            raise RuntimeError("RPC transport is not open")
+        open_rpc_transport(rpc_url)
+    return _transport.client
+
+
+async def rpc_request(method: str, params: list = None, rpc_url: str = None):
+    """
+    Raw JSON-RPC call through the shared routed pool, for methods solana-py has no
+    wrapper for. Returns the "result" member and raises RuntimeError on RPC errors.
+    """
+    get_rpc_client(rpc_url)
+    response = await _transport.session.post(
+        _transport.rpc_url,
+        json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []},
+    )
+    response.raise_for_status()
+    payload = response.json()
+    if "error" in payload:
+        raise RuntimeError(f"{method} failed: {payload['error']}")
+    return payload["result"]
+
+
+async def rpc_broadcast(method: str, params: list = None) -> list:
+    """
+    Send one JSON-RPC call to every healthy endpoint at once.
+    Returns [(url, result or exception)] with RPC errors raised as RuntimeError.
+    """
+    if _transport is None:
+        raise RuntimeError("RPC transport is not open")
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []}).encode()
+    results = []
+    for url, response in await _transport.router.broadcast(body):
+        if not isinstance(response, Exception):
+            try:
+                payload = response.json()
+                response = (RuntimeError(f"{method} failed: {payload['error']}") if "error" in payload
+                            else payload["result"])
+            except (ValueError, KeyError, TypeError) as e:
+                response = RuntimeError(f"{method} returned an invalid response: {e}")
+        results.append((url, response))
+    return results
+
+
+def get_tip_slot():
+    """Chain tip slot from the router's slot probes, None when nothing probes (single endpoint)"""
+    return _transport.router.tip_slot if _transport is not None else None
+
+
+def get_rpc_stats() -> dict:
+    """Per-endpoint routing stats, or {} when the transport is not open"""
+    return _transport.router.get_stats() if _transport is not None else {}
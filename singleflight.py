@@ -0,0 +1,65 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+_groups = {}
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight call.
+    Every waiter receives the same result or the same exception.
+    """
+
+    def __init__(self, name: str, timeout: float = None):
+        self.name = name
+        self.timeout = timeout
+        self._inflight = {}
+        self.stats = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "timeouts": 0,
+        }
+        _groups[name] = self
+
+    async def do(self, key, fn, timeout: float = None):
+        """Run `await fn()` for key, or join the call already in flight for it"""
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["executions"] += 1
+            task = asyncio.create_task(self._run(key, fn, self.timeout if timeout is None else timeout))
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        else:
+            self.stats["coalesced"] += 1
+        # Shield so one cancelled waiter does not cancel the call for everybody else
+        return await asyncio.shield(task)
+
+    async def _run(self, key, fn, timeout):
+        try:
+            if timeout is None:
+                return await fn()
+            return await asyncio.wait_for(fn(), timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["inflight"] = len(self._inflight)
+        return stats
+
+
+def get_stats() -> dict:
+    """Counters for every single-flight group in the process"""
+    return {name: group.get_stats() for name, group in _groups.items()}
@@ -1,15 +1,32 @@
-import httpx
+import asyncio
 from datetime import datetime
-from jupiter_python_sdk.jupiter import Jupiter
-from wallet import Wallet 
+from solana.rpc.async_api import AsyncClient
+from wallet import Wallet, portfolio_cache
+from balance_cache import balance_cache
 from spl.token.instructions import get_associated_token_address
 from solders.pubkey import Pubkey # type: ignore
+from compute_budget import compute_unit_sizer, get_compute_unit_limit, get_compute_unit_price, with_compute_budget, writable_accounts
+from fee_estimator import fee_estimator, DEFAULT_SPEED
+from mint_info import mint_info_cache
+from quote_engine import quote_engine
+from quote_prefetch import quote_prefetcher
+from token_registry import token_registry
+from tx_codec import parse_message, replace_message
+
+
+# How long fetch_token_list waits for the registry's first load
+TOKEN_LIST_TIMEOUT = 10
+
+
+def to_base_units(amount, decimals: int) -> int:
+    """UI amount to the raw integer amount quotes are keyed by"""
+    return int(amount*10**decimals)
+
 
 class Swap(Wallet):
     
-    def __init__(self, rpc_url: str, private_key: str) -> None:
-        super().__init__(rpc_url=rpc_url, private_key=private_key)
-        self.swapClient = Jupiter(async_client=self.client, keypair=self.wallet)
+    def __init__(self, rpc_url: str, private_key: str, client: AsyncClient = None) -> None:
+        super().__init__(rpc_url=rpc_url, private_key=private_key, client=client)
 
 
     async def get_token_mint_account(self, token_mint: str) -> Pubkey:
@@ -26,17 +43,74 @@ class Swap(Wallet):
             sell_token_account_info = await self.get_token_balance(token_mint_account=token_mint_address)
         return sell_token_account_info
     
-    async def swap_token(self, input_mint:str, output_mint:str, amount, slippage_bps):
-        """Swap Token"""
-        sell_token_account_info = await self.get_wallet_token_balance(input_mint)
-        print(sell_token_account_info)
-        swap_data = await self.swapClient.swap(
-            input_mint=input_mint,
-            output_mint=output_mint,
-            amount=int(amount*10**sell_token_account_info["decimals"]),
-            slippage_bps=int(slippage_bps*100),
+    async def swap_token(self, input_mint:str, output_mint:str, amount, slippage_bps,
+                         priority_speed=DEFAULT_SPEED, right_size_compute: bool = True):
+        """
+        Swap Token
+        priority_speed ("normal"/"fast"/"turbo", None keeps Jupiter's fee) sets the priority fee;
+        right_size_compute replaces Jupiter's generic compute-unit limit with a simulated one
+        (False keeps Jupiter's limit, e.g. for a comparison group)
+        """
+        # Decimals are cached per mint, so the raw amount costs no round trip
+        raw_amount = to_base_units(amount, await mint_info_cache.decimals(input_mint))
+        # Prefetched while the token card was shown, else raced across the quote sources now;
+        # the balance check runs alongside instead of in front of it
+        quote, balance = await asyncio.gather(
+            quote_prefetcher.best_quote(
+                input_mint=input_mint,
+                output_mint=output_mint,
+                amount=raw_amount,
+                slippage_bps=int(slippage_bps*100),
+            ),
+            self.get_wallet_token_balance(input_mint),
         )
-        return (True,await self.sign_send_transaction(swap_data))
+        if balance["balance"]["int"] < raw_amount:
+            return (False, f"Insufficient balance: {balance['balance']['float']} available")
+        swap_transaction = await quote_engine.build_transaction(quote, self.wallet.pubkey().__str__())
+        raw_transaction = swap_transaction.transaction
+        sized = False
+        if priority_speed is not None or right_size_compute:
+            raw_transaction, sized = await self.prepare_transaction(
+                raw_transaction, input_mint, output_mint, priority_speed, right_size_compute,
+                route_plan=quote.raw.get("routePlan"))
+        owner = self.wallet.pubkey().__str__()
+
+        def invalidate_balances(signature, success, error):
+            # Landed or not, the fee was paid; the pushes may lag the confirmation
+            balance_cache.invalidate(owner, input_mint)
+            balance_cache.invalidate(owner, output_mint)
+            portfolio_cache.invalidate(owner)
+
+        try:
+            transaction_hash = await self.sign_and_submit(
+                raw_transaction,
+                tag="right_sized" if sized else "default",
+                last_valid_block_height=swap_transaction.last_valid_block_height,
+                callback=invalidate_balances,
+            )
+        except Exception as e:
+            # Nothing was sent, so there is no signature to track
+            return (False, f"Transaction could not be sent: {e}")
+        return (True, transaction_hash)
+
+    async def prepare_transaction(self, raw_transaction: bytes, input_mint: str, output_mint: str,
+                                  priority_speed=DEFAULT_SPEED, right_size_compute: bool = False,
+                                  route_plan=None) -> tuple:
+        """
+        Set the compute budget of an unsigned serialized swap transaction before it is signed:
+        (transaction bytes, whether the compute-unit limit was right-sized)
+        """
+        message = parse_message(raw_transaction)
+        sized = False
+        # Estimated from cached fee percentiles, no RPC call
+        unit_price = fee_estimator.estimate(writable_accounts(message), priority_speed) if priority_speed else None
+        if right_size_compute:
+            message, sized = await compute_unit_sizer.right_size(
+                message, input_mint, output_mint, unit_price or get_compute_unit_price(message), route_plan=route_plan)
+        if unit_price is not None:
+            unit_price = fee_estimator.cap_unit_price(unit_price, get_compute_unit_limit(message))
+            message = with_compute_budget(message, unit_price=unit_price)
+        return replace_message(raw_transaction, message), sized
 
         
     async def swap_status(self, transaction_hash):
@@ -48,6 +122,13 @@ class Swap(Wallet):
             return False
 
 
-    async def fetch_token_list(self):
-        tokens_list = await self.jupiter.get_tokens_list(list_type="all")
-        return tokens_list
+    async def fetch_token_list(self, timeout: float = TOKEN_LIST_TIMEOUT):
+        """
+        Get the full token list from the local registry.
+        Raises RuntimeError if the registry has not loaded within timeout seconds.
+        """
+        try:
+            await asyncio.wait_for(token_registry.loaded.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError("The token list is still loading, please try again in a moment") from None
+        return token_registry.all_tokens()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+# Pending swaps one wallet may have queued behind its running one
+MAX_QUEUED_PER_WALLET = 5
+
+
+class SwapQueueFull(Exception):
+    """The wallet already has MAX_QUEUED_PER_WALLET swaps waiting"""
+
+
+class SwapJob:
+    __slots__ = ("wallet", "run", "enqueued_at")
+
+    def __init__(self, wallet, run):
+        self.wallet = wallet
+        self.run = run
+        self.enqueued_at = time.monotonic()
+
+
+class SwapExecutor:
+    """
+    Runs swap jobs on a bounded pool of workers with one FIFO lane per wallet:
+    jobs for different wallets run in parallel, jobs for the same wallet one
+    after another in submission order, so they never race on its balance.
+    A job is an async callable that does the trade and reports its own result.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_queued_per_wallet: int = MAX_QUEUED_PER_WALLET):
+        self.max_workers = max_workers
+        self.max_queued_per_wallet = max_queued_per_wallet
+        self._lanes = {}  # wallet -> deque of SwapJob; present while the wallet has queued or running jobs
+        self._ready = asyncio.Queue()  # wallets whose next job may start (never one with a job running)
+        self._running = set()
+        self._workers = []
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    def submit(self, wallet, run) -> int:
+        """
+        Queue `await run()` on wallet's lane and return at once.
+        Returns how many of the wallet's jobs are ahead of this one.
+        """
+        lane = self._lanes.get(wallet)
+        if lane is None:
+            lane = self._lanes[wallet] = deque()
+            self._ready.put_nowait(wallet)
+        if len(lane) >= self.max_queued_per_wallet:
+            self.stats["rejected"] += 1
+            raise SwapQueueFull(f"{len(lane)} swaps already queued for this wallet")
+        lane.append(SwapJob(wallet, run))
+        self.stats["submitted"] += 1
+        return len(lane) - 1 + (wallet in self._running)
+
+    async def _worker(self):
+        while True:
+            wallet = await self._ready.get()
+            lane = self._lanes[wallet]
+            job = lane.popleft()
+            self._running.add(wallet)
+            wait = time.monotonic() - job.enqueued_at
+            self.stats["total_wait"] += wait
+            self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+            try:
+                await job.run()
+                self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Swap job for {wallet} failed: {e}", exc_info=True)
+            finally:
+                self._running.discard(wallet)
+                # Hand the lane back only once this job is done, keeping the wallet's jobs ordered
+                if lane:
+                    self._ready.put_nowait(wallet)
+                else:
+                    del self._lanes[wallet]
+
+    async def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+
+    async def stop(self):
+        """Cancel the workers; swaps in progress are interrupted and queued ones dropped"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        dropped = sum(len(lane) for lane in self._lanes.values())
+        if dropped:
+            logger.warning(f"Dropped {dropped} queued swaps on shutdown")
+        self._lanes.clear()
+        self._running.clear()
+        self._ready = asyncio.Queue()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        started = stats["completed"] + stats["failed"]
+        stats["avg_wait"] = round(stats.pop("total_wait") / started, 3) if started else 0.0
+        stats["running"] = len(self._running)
+        stats["queued"] = sum(len(lane) for lane in self._lanes.values())
+        stats["wallets"] = len(self._lanes)
+        return stats
+
+
+swap_executor = SwapExecutor()
@@ -0,0 +1,70 @@
+import asyncio
+from collections import OrderedDict
+
+from swap import Swap
+
+MAX_LIVE_SWAPS = 1000
+
+
+class SwapRegistry:
+    """
+    Bounded LRU registry of live per-user Swap objects.
+    All of them issue calls through the shared RPC transport, so building a Swap
+    only decodes the key.
+    """
+
+    def __init__(self, maxsize: int = MAX_LIVE_SWAPS):
+        self.maxsize = maxsize
+        self.rpc_url = None
+        self._swaps = OrderedDict()  # user_id -> (private_key, Swap)
+        self._lock = asyncio.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def open(self, rpc_url: str):
+        """Remember the RPC endpoint new Swaps are built for (called from main())"""
+        self.rpc_url = rpc_url
+
+    async def get(self, user_id, private_key: str) -> Swap:
+        """Get the live Swap for user_id, rebuilding it if the stored key changed"""
+        if self.rpc_url is None:
+            raise RuntimeError("SwapRegistry.open() must be called before get()")
+        async with self._lock:
+            entry = self._swaps.get(user_id)
+            if entry is not None and entry[0] == private_key:
+                self._swaps.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return entry[1]
+
+            self.stats["misses"] += 1
+            swap = Swap(self.rpc_url, private_key)
+            self._swaps[user_id] = (private_key, swap)
+            self._swaps.move_to_end(user_id)
+            # Connections belong to the shared transport, so evicting just drops the object
+            while len(self._swaps) > self.maxsize:
+                self._swaps.popitem(last=False)
+                self.stats["evictions"] += 1
+            return swap
+
+    async def invalidate(self, user_id):
+        """Drop the cached Swap for user_id (e.g. after update_user changed the key)"""
+        async with self._lock:
+            if self._swaps.pop(user_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+    async def close(self):
+        """Drop every live Swap"""
+        async with self._lock:
+            self._swaps.clear()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["live"] = len(self._swaps)
+        return stats
+
+
+swap_registry = SwapRegistry()
@@ -0,0 +1,35 @@
+import json
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+
+@asynccontextmanager
+async def stub_server(app: web.Application):
+    """Serve app on a free local port for the duration of the block; yields its base URL"""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+def rpc_app(handle) -> web.Application:
+    """
+    JSON-RPC stub: handle(method, params) returns the result, or a web.Response
+    to answer with instead (errors, garbage, ...). Batches are not supported.
+    """
+    async def endpoint(request):
+        payload = json.loads(await request.read())
+        result = await handle(payload["method"], payload.get("params") or [])
+        if isinstance(result, web.StreamResponse):
+            return result
+        return web.json_response({"jsonrpc": "2.0", "id": payload.get("id"), "result": result})
+
+    app = web.Application()
+    app.router.add_post("/", endpoint)
+    return app
@@ -0,0 +1,87 @@
+import asyncio
+
+from solders.keypair import Keypair # type: ignore
+
+from balance_cache import BalanceCache
+from rpc_transport import close_rpc_transport, open_rpc_transport
+from stubs import rpc_app, stub_server
+from tokenInfo import SOL_MINT
+
+SYSTEM_PROGRAM = "11111111111111111111111111111111"
+
+
+def system_account(lamports: int) -> dict:
+    return {"lamports": lamports, "data": ["", "base64"], "owner": SYSTEM_PROGRAM,
+            "executable": False, "rentEpoch": 0, "space": 0}
+
+
+def run_with_rpc(lamports: dict, body):
+    """Run body(cache) against a stub RPC serving SOL accounts; returns (result, getMultipleAccounts calls)"""
+    calls = []
+
+    async def handle(method, params):
+        assert method == "getMultipleAccounts"
+        calls.append(params[0])
+        return {"context": {"slot": 1}, "value": [system_account(lamports[address]) for address in params[0]]}
+
+    async def main():
+        async with stub_server(rpc_app(handle)) as url:
+            open_rpc_transport([url], hedge=False)
+            try:
+                return await body(BalanceCache(max_subscriptions=2))
+            finally:
+                await close_rpc_transport()
+
+    return asyncio.run(main()), calls
+
+
+def test_balances_are_served_from_memory_until_invalidated():
+    owner = str(Keypair().pubkey())
+    lamports = {owner: 1_500_000_000}
+
+    async def body(cache):
+        first = await cache.get(owner, SOL_MINT)
+        # The owner address and the SOL mint mean the same balance
+        second = await cache.get(owner, owner)
+        lamports[owner] = 500_000_000
+        cache.invalidate(owner, SOL_MINT)
+        third = await cache.get(owner, SOL_MINT)
+        return first, second, third, cache.get_stats()
+
+    (first, second, third, stats), calls = run_with_rpc(lamports, body)
+    assert first["balance"]["float"] == second["balance"]["float"] == 1.5
+    assert third["balance"]["int"] == 500_000_000
+    assert len(calls) == 2
+    assert (stats["hits"], stats["fetches"], stats["invalidations"]) == (1, 2, 1)
+
+
+def test_account_push_updates_the_balance_in_place():
+    owner = str(Keypair().pubkey())
+
+    async def body(cache):
+        await cache.get(owner, SOL_MINT)
+        listener = cache._entries[(owner, SOL_MINT)].listener
+        listener.dispatch({"context": {"slot": 2}, "value": system_account(2_000_000_000)})
+        return (await cache.get(owner, SOL_MINT)), cache.stats["pushes"]
+
+    (balance, pushes), calls = run_with_rpc({owner: 1_000_000_000}, body)
+    assert balance["balance"]["int"] == 2_000_000_000
+    assert pushes == 1
+    assert len(calls) == 1
+
+
+def test_least_recently_read_balance_is_evicted_and_unsubscribed():
+    owners = [str(Keypair().pubkey()) for _ in range(3)]
+
+    async def body(cache):
+        for owner in owners[:2]:
+            await cache.get(owner, SOL_MINT)
+        evicted = cache._entries[(owners[0], SOL_MINT)].listener
+        await cache.get(owners[1], SOL_MINT)
+        await cache.get(owners[2], SOL_MINT)
+        return list(cache._entries), evicted.subscription, cache.stats["evictions"]
+
+    (keys, subscription, evictions), _ = run_with_rpc({owner: 1 for owner in owners}, body)
+    assert keys == [(owners[1], SOL_MINT), (owners[2], SOL_MINT)]
+    assert subscription is None
+    assert evictions == 1
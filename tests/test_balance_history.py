@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+import balance_history as balance_history_module
+from balance_history import MINUTE, BalanceHistory
+from db_handler_aio import create_db_and_table, get_balance_rollups, get_balance_samples
+
+WALLET = "wallet"
+MINT = "mint"
+
+
+@pytest.fixture(autouse=True)
+def database(monkeypatch, tmp_path):
+    # db_handler_aio opens users.db relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    asyncio.run(create_db_and_table())
+
+
+def test_rollups_merge_across_flushes():
+    history = BalanceHistory()
+
+    async def main():
+        await history.record(WALLET, MINT, 10.0, ts=120)
+        await history.flush()
+        await history.record(WALLET, MINT, 4.0, ts=130)
+        await history.record(WALLET, MINT, 7.0, ts=150)
+        await history.flush()
+        return await get_balance_rollups(WALLET, MINT, MINUTE, 0, 1000)
+
+    # open from the first flush, low and close from the second, samples summed
+    assert asyncio.run(main()) == [(120, 10.0, 10.0, 4.0, 7.0)]
+    assert history.stats["flushes"] == 2
+
+
+def test_failed_flush_is_retried_whole(monkeypatch):
+    history = BalanceHistory()
+    write = balance_history_module.write_balance_history
+    calls = []
+
+    async def failing_once(samples, rollups):
+        calls.append(len(samples))
+        if len(calls) == 1:
+            return None  # what error_decorator returns after logging
+        return await write(samples, rollups)
+    monkeypatch.setattr(balance_history_module, "write_balance_history", failing_once)
+
+    async def main():
+        await history.record(WALLET, MINT, 10.0, ts=120)
+        await history.flush()
+        await history.record(WALLET, MINT, 4.0, ts=130)
+        await history.flush()
+        return (await get_balance_samples(WALLET, MINT, 0, 1000),
+                await get_balance_rollups(WALLET, MINT, MINUTE, 0, 1000))
+
+    samples, rollups = asyncio.run(main())
+    assert calls == [1, 2]
+    assert samples == [(120, 10.0), (130, 4.0)]
+    assert rollups == [(120, 10.0, 10.0, 4.0, 4.0)]
+    assert history.stats["flush_errors"] == 1
+    assert history.get_stats()["pending"] == 0
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from solders.keypair import Keypair # type: ignore
+
+import confirmation_tracker as confirmation_tracker_module
+from confirmation_tracker import ConfirmationTracker
+from rpc_transport import close_rpc_transport, open_rpc_transport
+from stubs import rpc_app, stub_server
+
+LANDED = {"slot": 1, "confirmations": None, "err": None, "status": {"Ok": None}, "confirmationStatus": "confirmed"}
+
+
+def new_signature() -> str:
+    return str(Keypair().sign_message(b"swap"))
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    async def no_db(statuses):
+        return None
+    monkeypatch.setattr(confirmation_tracker_module, "update_transaction_statuses", no_db)
+    return ConfirmationTracker(poll_interval=0.02)
+
+
+def test_push_during_a_poll_does_not_break_the_round(tracker):
+    pushed, polled = new_signature(), new_signature()
+    in_flight = asyncio.Event()
+
+    async def handle(method, params):
+        assert method == "getSignatureStatuses"
+        in_flight.set()
+        await asyncio.sleep(0.1)
+        # Both landed; the push resolves one of them before this answer arrives
+        return {"context": {"slot": 1}, "value": [LANDED for _ in params[0]]}
+
+    async def main():
+        async with stub_server(rpc_app(handle)) as url:
+            open_rpc_transport([url], hedge=False)
+            try:
+                pushed_outcome = tracker.register(pushed, commitment="confirmed")
+                polled_outcome = tracker.register(polled, commitment="confirmed")
+                poll = asyncio.ensure_future(tracker.poll())
+                await in_flight.wait()
+                tracker._on_notification(pushed, {"context": {"slot": 1}, "value": {"err": None}})
+                await poll
+                return await pushed_outcome, await polled_outcome
+            finally:
+                await tracker.stop()
+                await close_rpc_transport()
+
+    assert asyncio.run(main()) == ((True, None), (True, None))
+    stats = tracker.get_stats()
+    assert stats["pending"] == 0
+    assert stats["pushed"] == 1 and stats["landed"] == 2
+
+
+def test_invalid_signature_is_rejected_on_register(tracker):
+    async def main():
+        with pytest.raises(ValueError):
+            tracker.register("False")
+        return tracker.get_stats()["pending"]
+
+    assert asyncio.run(main()) == 0
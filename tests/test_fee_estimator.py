@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from fee_estimator import MAX_PRIORITY_FEE_LAMPORTS, MAX_UNIT_PRICE, MIN_UNIT_PRICE, FeeEstimator, FeeSeries
+from rpc_transport import close_rpc_transport, open_rpc_transport
+from stubs import rpc_app, stub_server
+
+POOL = "58oQChx4yWmvKdwLLZzBi4ChoCc2fqCUWBkwMihLYQo2"
+
+
+def samples(fees, first_slot=1000):
+    return [{"slot": first_slot + i, "prioritizationFee": fee} for i, fee in enumerate(fees)]
+
+
+def test_percentiles_of_the_window():
+    series = FeeSeries()
+    series.update(samples(range(1, 101)))
+    assert series.percentiles == {25: 26, 50: 51, 75: 76, 90: 91, 95: 96}
+    # Slots that fall out of the window no longer count
+    series.update(samples([1] * 10, first_slot=1300), window=50)
+    assert set(series.fees) == set(range(1300, 1310))
+    assert series.percentiles[90] == 1
+
+
+def test_estimate_takes_the_busiest_account_and_clamps():
+    fees = {None: [MIN_UNIT_PRICE * 2] * 10, POOL: [MIN_UNIT_PRICE * 50] * 10}
+    estimator = FeeEstimator()
+
+    async def handle(method, params):
+        assert method == "getRecentPrioritizationFees"
+        return samples(fees[params[0][0] if params else None])
+
+    async def main():
+        async with stub_server(rpc_app(handle)) as url:
+            open_rpc_transport([url], hedge=False)
+            try:
+                # Nothing sampled yet: the floor, and the account is tracked from now on
+                assert estimator.estimate([POOL], "fast") == MIN_UNIT_PRICE
+                await estimator.refresh()
+                return estimator.estimate([POOL], "fast"), estimator.estimate([], "fast")
+            finally:
+                await close_rpc_transport()
+
+    assert asyncio.run(main()) == (MIN_UNIT_PRICE * 50, MIN_UNIT_PRICE * 2)
+    assert estimator.stats["account_hits"] == 1
+
+    estimator.global_fees.update(samples([MAX_UNIT_PRICE * 10] * 10, first_slot=2000))
+    assert estimator.estimate([], "turbo") == MAX_UNIT_PRICE
+    with pytest.raises(ValueError):
+        estimator.estimate([], "ludicrous")
+
+
+def test_priority_fee_cap():
+    limit = 1_400_000
+    capped = FeeEstimator.cap_unit_price(MAX_UNIT_PRICE, limit)
+    assert capped == MAX_PRIORITY_FEE_LAMPORTS * 1_000_000 // limit
+    assert capped * limit // 1_000_000 <= MAX_PRIORITY_FEE_LAMPORTS
+    # Cheap transactions are left alone
+    assert FeeEstimator.cap_unit_price(MIN_UNIT_PRICE, 200_000) == MIN_UNIT_PRICE
+    assert FeeEstimator.cap_unit_price(MIN_UNIT_PRICE, 0) == MIN_UNIT_PRICE
@@ -0,0 +1,44 @@
+import pytest
+from solders.pubkey import Pubkey # type: ignore
+
+from balances import TOKEN_PROGRAM_ID
+from mint_info import MINT_SIZE, decode_mint
+
+MINT = "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263"
+AUTHORITY = Pubkey.from_string("9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM")
+
+
+def coption(pubkey) -> bytes:
+    if pubkey is None:
+        return bytes(36)
+    return (1).to_bytes(4, "little") + bytes(pubkey)
+
+
+def mint_data(mint_authority, supply: int, decimals: int, freeze_authority) -> bytes:
+    data = coption(mint_authority) + supply.to_bytes(8, "little") + bytes([decimals, 1]) + coption(freeze_authority)
+    assert len(data) == MINT_SIZE
+    return data
+
+
+def test_decode_mint_reads_every_field():
+    info = decode_mint(MINT, mint_data(AUTHORITY, 2**64 - 2, 5, None), TOKEN_PROGRAM_ID)
+    assert info.decimals == 5
+    assert info.supply == 2**64 - 2
+    assert info.mint_authority == str(AUTHORITY)
+    assert info.freeze_authority is None
+    assert info.token_program == str(TOKEN_PROGRAM_ID)
+    assert info.source == "chain"
+
+
+def test_decode_mint_freeze_authority_and_token_2022_extensions():
+    # Token-2022 mints append extensions after the base layout
+    data = mint_data(None, 1_000, 9, AUTHORITY) + bytes(83)
+    info = decode_mint(MINT, data, TOKEN_PROGRAM_ID)
+    assert (info.decimals, info.supply) == (9, 1_000)
+    assert info.mint_authority is None
+    assert info.freeze_authority == str(AUTHORITY)
+
+
+def test_decode_mint_rejects_other_accounts():
+    with pytest.raises(ValueError):
+        decode_mint(MINT, bytes(MINT_SIZE - 1), TOKEN_PROGRAM_ID)
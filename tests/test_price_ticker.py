@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+import price_ticker as price_ticker_module
+from price_ticker import PriceTicker
+from tokenInfo import SOL_MINT
+
+BONK = "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263"
+WIF = "EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm"
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """Queue of price tables the fake price API returns, one per refresh"""
+    answers = []
+
+    async def get_prices(mints):
+        return answers.pop(0)
+
+    async def position_mints():
+        return [BONK, WIF]
+    monkeypatch.setattr(price_ticker_module.price_service, "get_prices", get_prices)
+    monkeypatch.setattr(price_ticker_module, "get_active_position_mints", position_mints)
+    return answers
+
+
+def test_refresh_keeps_prices_the_api_skipped(answers):
+    ticker = PriceTicker()
+    answers.extend([{SOL_MINT: 150.0, BONK: 0.00002, WIF: 2.5}, {SOL_MINT: 151.0, BONK: 0.00003}])
+
+    async def main():
+        await ticker.refresh()
+        await ticker.refresh()
+
+    asyncio.run(main())
+    assert ticker.prices == {SOL_MINT: 151.0, BONK: 0.00003, WIF: 2.5}
+    assert ticker.stats["refreshes"] == 2
+
+
+def test_empty_refresh_keeps_the_table_and_its_age(answers):
+    ticker = PriceTicker()
+    answers.extend([{SOL_MINT: 150.0, BONK: 0.00002}, {}])
+
+    async def main():
+        await ticker.refresh()
+        updated_at = ticker.updated_at
+        await ticker.refresh()
+        return updated_at
+
+    updated_at = asyncio.run(main())
+    assert ticker.prices == {SOL_MINT: 150.0, BONK: 0.00002}
+    assert ticker.updated_at == updated_at
+    assert ticker.stats["refreshes"] == 1
+    assert ticker.stats["errors"] == 1
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from http_session import close_http_session, open_http_session
+from quote_engine import JupiterQuoteSource, QuoteEngine, QuoteSource
+from stubs import stub_server
+
+
+def jupiter_app(routes: dict) -> web.Application:
+    """Stub Jupiter API per source name: {name: (delay seconds, outAmount or HTTP status)}"""
+    def make_handler(delay, answer):
+        async def handle(request):
+            await asyncio.sleep(delay)
+            if isinstance(answer, web.Response):
+                return answer
+            return web.json_response({
+                "inputMint": request.query["inputMint"],
+                "outputMint": request.query["outputMint"],
+                "inAmount": request.query["amount"],
+                "outAmount": str(answer),
+                "priceImpactPct": "0.001",
+                "routePlan": [],
+            })
+        return handle
+
+    app = web.Application()
+    for name, (delay, answer) in routes.items():
+        app.router.add_get(f"/{name}/v6/quote", make_handler(delay, answer))
+    return app
+
+
+async def best_quote(routes: dict, deadline: float, timeout: float = 5.0):
+    async with stub_server(jupiter_app(routes)) as url:
+        await open_http_session()
+        try:
+            engine = QuoteEngine([JupiterQuoteSource(name, base_url=f"{url}/{name}/v6") for name in routes],
+                                 deadline=deadline, timeout=timeout)
+            try:
+                return await engine.best_quote("in", "out", 1_000_000, 50), engine
+            except RuntimeError as e:
+                return e, engine
+        finally:
+            await close_http_session()
+
+
+def test_best_out_amount_among_answers_before_the_deadline():
+    routes = {
+        "fast": (0.0, 100),
+        "better": (0.05, 120),
+        "late": (0.6, 999),  # best price, but misses the deadline
+    }
+    quote, engine = asyncio.run(best_quote(routes, deadline=0.3))
+    assert quote.source.name == "better"
+    assert quote.out_amount == 120 and quote.in_amount == 1_000_000
+    stats = engine.get_stats()
+    assert stats["better"]["wins"] == 1
+    assert stats["fast"]["wins"] == 0 and stats["late"]["wins"] == 0
+
+
+def test_late_answer_is_recorded_after_the_decision():
+    routes = {"fast": (0.0, 100), "late": (0.3, 999)}
+
+    async def main():
+        async with stub_server(jupiter_app(routes)) as url:
+            await open_http_session()
+            try:
+                engine = QuoteEngine([JupiterQuoteSource(name, base_url=f"{url}/{name}/v6") for name in routes],
+                                     deadline=0.1)
+                quote = await engine.best_quote("in", "out", 1, 50)
+                assert quote.source.name == "fast"
+                # The straggler keeps running so its latency still counts
+                await asyncio.sleep(0.5)
+                return engine.get_stats()
+            finally:
+                await close_http_session()
+
+    stats = asyncio.run(main())
+    assert stats["late"]["answered"] == 1
+    assert stats["late"]["late"] == 1
+    assert stats["late"]["latency_p50_ms"] >= 300
+
+
+def test_first_answer_after_the_deadline_when_none_arrived_in_time():
+    routes = {"slow": (0.2, 100), "slower": (0.6, 999)}
+    quote, _ = asyncio.run(best_quote(routes, deadline=0.05))
+    assert quote.source.name == "slow"
+
+
+def test_failed_sources_do_not_win():
+    routes = {"broken": (0.0, web.json_response({"error": "no route"}, status=400)), "ok": (0.05, 100)}
+    quote, engine = asyncio.run(best_quote(routes, deadline=0.3))
+    assert quote.source.name == "ok"
+    assert engine.get_stats()["broken"]["errors"] == 1
+
+
+def test_no_quote_raises():
+    routes = {"broken": (0.0, web.Response(status=500)), "slow": (1.0, 100)}
+    error, _ = asyncio.run(best_quote(routes, deadline=0.05, timeout=0.2))
+    assert isinstance(error, RuntimeError)
+    assert "broken" in str(error)
+
+
+def test_no_sources_raises():
+    with pytest.raises(RuntimeError):
+        asyncio.run(QuoteEngine([]).best_quote("in", "out", 1, 50))
+
+
+def test_sources_must_implement_the_interface():
+    class QuoteOnly(QuoteSource):
+        async def fetch_quote(self, input_mint, output_mint, amount, slippage_bps):
+            return None
+
+    with pytest.raises(TypeError):
+        QuoteOnly()
@@ -0,0 +1,78 @@
+import asyncio
+
+from quote_prefetch import QuotePrefetcher
+
+SOL = "So11111111111111111111111111111111111111112"
+BONK = "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263"
+
+
+class FakeEngine:
+    """Quote engine answering (source, key) after `delay` seconds"""
+
+    def __init__(self, name: str, delay: float = 0.0):
+        self.name = name
+        self.delay = delay
+        self.sources = [name]
+        self.calls = []
+
+    async def best_quote(self, input_mint, output_mint, amount, slippage_bps):
+        key = (input_mint, output_mint, amount, slippage_bps)
+        self.calls.append(key)
+        await asyncio.sleep(self.delay)
+        return (self.name, key)
+
+
+def prefetcher(delay: float = 0.0) -> tuple:
+    engine, speculative = FakeEngine("engine"), FakeEngine("prefetch", delay)
+    return QuotePrefetcher(engine, prefetch_engine=speculative, upstream="http://unlimited.invalid"), engine, speculative
+
+
+def test_matching_swap_uses_the_prefetched_quote():
+    quotes, engine, speculative = prefetcher()
+
+    async def main():
+        quotes.prefetch("owner", [(SOL, BONK, 100_000_000, 50)])
+        await asyncio.sleep(0.05)
+        quote = await quotes.best_quote(SOL, BONK, 100_000_000, 50)
+        await quotes.stop()
+        return quote
+
+    assert asyncio.run(main()) == ("prefetch", (SOL, BONK, 100_000_000, 50))
+    assert engine.calls == []
+    assert quotes.stats["hits"] == 1
+
+
+def test_quotes_are_keyed_by_amount_and_slippage():
+    quotes, engine, speculative = prefetcher()
+
+    async def main():
+        quotes.prefetch("owner", [(SOL, BONK, 100_000_000, 50)])
+        await asyncio.sleep(0.05)
+        other_amount = await quotes.best_quote(SOL, BONK, 200_000_000, 50)
+        other_slippage = await quotes.best_quote(SOL, BONK, 100_000_000, 100)
+        reversed_pair = await quotes.best_quote(BONK, SOL, 100_000_000, 50)
+        await quotes.stop()
+        return other_amount, other_slippage, reversed_pair
+
+    assert [source for source, _ in asyncio.run(main())] == ["engine"] * 3
+    assert quotes.stats["misses"] == 3
+    assert quotes.stats["hits"] == 0
+
+
+def test_in_flight_prefetch_is_awaited_and_stale_ones_are_not_used():
+    quotes, engine, speculative = prefetcher(delay=0.1)
+
+    async def main():
+        quotes.prefetch("owner", [(SOL, BONK, 100_000_000, 50)])
+        await asyncio.sleep(0)
+        inflight = await quotes.best_quote(SOL, BONK, 100_000_000, 50)
+        quotes.max_age = 0.0
+        stale = await quotes.best_quote(SOL, BONK, 100_000_000, 50)
+        await quotes.stop()
+        return inflight, stale
+
+    inflight, stale = asyncio.run(main())
+    assert inflight[0] == "prefetch" and stale[0] == "engine"
+    assert quotes.stats["inflight_hits"] == 1
+    assert quotes.stats["stale"] == 1
+    assert len(speculative.calls) == 1
@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from aiohttp import web
+
+from rpc_router import FAILURE_THRESHOLD, HEDGE_DEFAULT_DELAY, RpcRouter
+from stubs import rpc_app, stub_server
+
+
+def make_endpoint(delay: float = 0.0, status: int = 200, calls: list = None):
+    async def handle(method, params):
+        if calls is not None:
+            calls.append(method)
+        await asyncio.sleep(delay)
+        if status != 200:
+            return web.Response(status=status)
+        return {"context": {"slot": 1}, "value": 42}
+    return rpc_app(handle)
+
+
+async def call(client: httpx.AsyncClient, method: str = "getBalance") -> httpx.Response:
+    return await client.post("http://rpc.invalid/", json={"jsonrpc": "2.0", "id": 1, "method": method, "params": []})
+
+
+def test_slow_primary_is_hedged_to_the_next_endpoint():
+    async def main():
+        slow_calls, fast_calls = [], []
+        async with stub_server(make_endpoint(delay=2.0, calls=slow_calls)) as slow, \
+                stub_server(make_endpoint(calls=fast_calls)) as fast:
+            router = RpcRouter([slow, fast], hedge=True, probe_interval=0)
+            async with httpx.AsyncClient(transport=router) as client:
+                started = time.monotonic()
+                response = await call(client)
+                elapsed = time.monotonic() - started
+
+            assert response.json()["result"]["value"] == 42
+            # Answered by the hedge shortly after the primary's hedge delay, not after the slow 2s
+            assert HEDGE_DEFAULT_DELAY <= elapsed < 1.0
+            assert slow_calls == ["getBalance"] and fast_calls == ["getBalance"]
+            assert router.stats["hedged"] == 1
+            assert router.endpoints[1].stats["hedges_won"] == 1
+            # The abandoned primary is recorded as at least as slow as the wait, so it loses its rank
+            slow_endpoint = router.endpoints[0]
+            assert slow_endpoint.stats["abandoned"] == 1
+            assert slow_endpoint.latency >= HEDGE_DEFAULT_DELAY
+            assert router.ranked()[0] is router.endpoints[1]
+
+    asyncio.run(main())
+
+
+def test_fast_primary_is_not_hedged():
+    async def main():
+        second_calls = []
+        async with stub_server(make_endpoint()) as first, \
+                stub_server(make_endpoint(calls=second_calls)) as second:
+            router = RpcRouter([first, second], hedge=True, probe_interval=0)
+            async with httpx.AsyncClient(transport=router) as client:
+                await call(client)
+            assert router.stats["hedged"] == 0
+            assert second_calls == []
+
+    asyncio.run(main())
+
+
+def test_writes_are_never_hedged():
+    async def main():
+        second_calls = []
+        async with stub_server(make_endpoint(delay=0.5)) as first, \
+                stub_server(make_endpoint(calls=second_calls)) as second:
+            router = RpcRouter([first, second], hedge=True, probe_interval=0)
+            async with httpx.AsyncClient(transport=router) as client:
+                await call(client, "sendTransaction")
+            assert router.stats["hedged"] == 0
+            assert second_calls == []
+
+    asyncio.run(main())
+
+
+def test_failing_endpoint_opens_its_circuit():
+    async def main():
+        bad_calls = []
+        async with stub_server(make_endpoint(status=503, calls=bad_calls)) as bad:
+            router = RpcRouter([bad], hedge=False, probe_interval=0)
+            bad_endpoint = router.endpoints[0]
+            async with httpx.AsyncClient(transport=router) as client:
+                for _ in range(FAILURE_THRESHOLD):
+                    with pytest.raises(httpx.TransportError):
+                        await call(client)
+            assert bad_endpoint.is_open
+            assert bad_endpoint.stats["circuit_opens"] == 1
+            assert len(bad_calls) == FAILURE_THRESHOLD
+
+    asyncio.run(main())
+
+
+def test_endpoint_that_never_succeeded_ranks_behind_after_failing():
+    async def main():
+        bad_calls, good_calls = [], []
+        async with stub_server(make_endpoint(status=503, calls=bad_calls)) as bad, \
+                stub_server(make_endpoint(calls=good_calls)) as good:
+            router = RpcRouter([bad, good], hedge=False, probe_interval=0)
+            async with httpx.AsyncClient(transport=router) as client:
+                # The first call fails over; after that the broken endpoint is no longer tried first
+                for _ in range(3):
+                    assert (await call(client)).json()["result"]["value"] == 42
+            assert len(bad_calls) == 1
+            assert len(good_calls) == 3
+            assert router.stats["failovers"] == 1
+            assert router.ranked()[-1] is router.endpoints[0]
+            assert not router.endpoints[0].is_open
+
+    asyncio.run(main())
+
+
+def test_circuit_recovers_after_a_successful_trial():
+    async def main():
+        async with stub_server(make_endpoint()) as url:
+            router = RpcRouter([url], hedge=False, probe_interval=0)
+            endpoint = router.endpoints[0]
+            for _ in range(FAILURE_THRESHOLD):
+                endpoint.record_failure()
+            assert endpoint.is_open
+            # Cooldown over: the next call is the half-open trial
+            endpoint.open_until = time.monotonic() - 0.001
+            async with httpx.AsyncClient(transport=router) as client:
+                await call(client)
+            assert not endpoint.is_open
+            assert endpoint.open_until == 0.0
+            assert endpoint.consecutive_failures == 0
+
+    asyncio.run(main())
+
+
+def test_rate_limit_wait_is_not_counted_as_latency():
+    from rate_limiter import RateLimiter, RateLimitedTransport, rpc_priority
+
+    async def main():
+        async with stub_server(make_endpoint()) as url:
+            # One token, refilled every 0.5s: the second call queues for about that long
+            limiter = RateLimiter("test-rpc", rate=2, burst=1)
+            router = RpcRouter([url], hedge=False, probe_interval=0, transport_factory=lambda u: RateLimitedTransport(
+                httpx.AsyncHTTPTransport(), limiter, classify=rpc_priority))
+            async with httpx.AsyncClient(transport=router) as client:
+                started = time.monotonic()
+                await call(client)
+                await call(client)
+                elapsed = time.monotonic() - started
+            assert elapsed >= 0.4
+            assert max(router.endpoints[0].latencies) < 0.2
+
+    asyncio.run(main())
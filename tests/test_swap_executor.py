@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from swap_executor import SwapExecutor, SwapQueueFull
+
+
+def test_one_wallet_runs_in_submission_order_while_others_run_alongside():
+    executor = SwapExecutor(max_workers=4)
+    events = []
+
+    def job(wallet, n):
+        async def run():
+            events.append(("start", wallet, n))
+            await asyncio.sleep(0.02)
+            events.append(("end", wallet, n))
+        return run
+
+    async def main():
+        await executor.start()
+        ahead = [executor.submit("a", job("a", n)) for n in range(3)]
+        executor.submit("b", job("b", 0))
+        while executor.get_stats()["wallets"]:
+            await asyncio.sleep(0.01)
+        await executor.stop()
+        return ahead
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    wallet_a = [event for event in events if event[1] == "a"]
+    assert wallet_a == [(edge, "a", n) for n in range(3) for edge in ("start", "end")]
+    # b did not wait behind a's lane
+    assert events.index(("start", "b", 0)) < events.index(("end", "a", 0))
+    assert executor.stats["completed"] == 4
+
+
+def test_full_lane_rejects_and_failed_jobs_do_not_stall_it():
+    executor = SwapExecutor(max_workers=1, max_queued_per_wallet=2)
+    ran = []
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def blocked():
+            await gate.wait()
+            raise RuntimeError("no route")
+
+        async def after():
+            ran.append("after")
+
+        await executor.start()
+        executor.submit("a", blocked)
+        await asyncio.sleep(0.01)  # running, so no longer queued
+        assert executor.submit("a", after) == 1
+        executor.submit("a", after)
+        with pytest.raises(SwapQueueFull):
+            executor.submit("a", after)
+        gate.set()
+        while executor.get_stats()["wallets"]:
+            await asyncio.sleep(0.01)
+        await executor.stop()
+
+    asyncio.run(main())
+    assert ran == ["after", "after"]
+    assert executor.stats["failed"] == 1
+    assert executor.stats["rejected"] == 1
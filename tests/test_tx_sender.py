@@ -0,0 +1,170 @@
+import asyncio
+import base64
+import random
+
+import pytest
+from aiohttp import web
+from solders.hash import Hash # type: ignore
+from solders.keypair import Keypair # type: ignore
+from solders.message import MessageV0 # type: ignore
+from solders.pubkey import Pubkey # type: ignore
+from solders.signature import Signature # type: ignore
+from solders.system_program import TransferParams, transfer # type: ignore
+from solders.transaction import VersionedTransaction # type: ignore
+
+import confirmation_tracker as confirmation_tracker_module
+import tx_sender as tx_sender_module
+from confirmation_tracker import ConfirmationTracker
+from rpc_transport import close_rpc_transport, open_rpc_transport
+from stubs import rpc_app, stub_server
+from tx_codec import sign_transaction
+from tx_sender import TransactionSender
+
+
+class StubChain:
+    """
+    Minimal RPC node: accepted sendTransaction calls land with probability
+    1 - drop_rate, and the block height advances on every getBlockHeight.
+    """
+
+    def __init__(self, drop_rate: float = 0.0, seed: int = 0, garbage_sends: tuple = ()):
+        self.random = random.Random(seed)
+        self.drop_rate = drop_rate
+        self.garbage_sends = garbage_sends
+        self.block_height = 100
+        self.sends = 0
+        self.landed = set()
+
+    async def handle(self, method, params):
+        if method == "sendTransaction":
+            self.sends += 1
+            if self.sends in self.garbage_sends:
+                return web.Response(text="<html>bad gateway</html>", content_type="text/html")
+            transaction = VersionedTransaction.from_bytes(base64.b64decode(params[0]))
+            signature = str(transaction.signatures[0])
+            if self.random.random() >= self.drop_rate:
+                self.landed.add(signature)
+            return signature
+        if method == "getSignatureStatuses":
+            return {"context": {"slot": 1}, "value": [
+                {"slot": 1, "confirmations": None, "err": None, "status": {"Ok": None},
+                 "confirmationStatus": "confirmed"} if signature in self.landed else None
+                for signature in params[0]
+            ]}
+        if method == "getBlockHeight":
+            self.block_height += 1
+            return self.block_height
+        return web.Response(status=400)
+
+
+def signed_transaction() -> tuple:
+    payer = Keypair()
+    instruction = transfer(TransferParams(from_pubkey=payer.pubkey(), to_pubkey=Pubkey.new_unique(), lamports=1))
+    message = MessageV0.try_compile(payer.pubkey(), [instruction], [], Hash.new_unique())
+    unsigned = bytes(VersionedTransaction.populate(message, [Signature.default()]))
+    signed, signature = sign_transaction(unsigned, payer)
+    return bytes(signed), str(signature)
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = ConfirmationTracker(poll_interval=0.02)
+    monkeypatch.setattr(tx_sender_module, "confirmation_tracker", tracker)
+
+    async def no_db(statuses):
+        return None
+    monkeypatch.setattr(confirmation_tracker_module, "update_transaction_statuses", no_db)
+    return tracker
+
+
+async def run_against(chain: StubChain, tracker: ConfirmationTracker, sender: TransactionSender,
+                      last_valid_block_height: int = None):
+    async with stub_server(rpc_app(chain.handle)) as url:
+        open_rpc_transport([url], hedge=False)
+        try:
+            raw, signature = signed_transaction()
+            assert await sender.submit(raw, signature, last_valid_block_height=last_valid_block_height) == signature
+            rebroadcast = sender._inflight[signature]
+            outcome = await asyncio.wait_for(tracker.wait(signature), 10)
+            await asyncio.wait_for(rebroadcast, 1)
+            return signature, outcome
+        finally:
+            await tracker.stop()
+            await close_rpc_transport()
+
+
+def test_rebroadcasts_until_a_dropped_transaction_lands(tracker):
+    chain = StubChain(drop_rate=0.8, seed=7)
+    sender = TransactionSender(interval=0.01)
+
+    async def main():
+        signature, outcome = await run_against(chain, tracker, sender)
+        assert outcome == (True, None)
+        assert signature in chain.landed
+        # The seeded drops make the first sends vanish, so it only landed by being resent
+        assert chain.sends > 1
+        sends = chain.sends
+        await asyncio.sleep(0.1)
+        assert chain.sends == sends, "rebroadcasting continued after the transaction landed"
+
+    asyncio.run(main())
+    assert sender.stats["landed"] == 1
+    assert sender.get_stats()["inflight"] == 0
+    report = sender.reports[-1]
+    assert report["success"] and len(report["attempts"]) == chain.sends
+
+
+def test_rebroadcast_survives_unparseable_responses(tracker):
+    # Sends 2 and 3 get an HTML error page; the loop must keep going past them
+    chain = StubChain(drop_rate=1.0, garbage_sends=(2, 3))
+    sender = TransactionSender(interval=0.01)
+
+    async def main():
+        task = asyncio.ensure_future(run_against(chain, tracker, sender))
+        while chain.sends < 5:
+            await asyncio.sleep(0.01)
+        chain.drop_rate = 0.0
+        return await task
+
+    _, outcome = asyncio.run(main())
+    assert outcome == (True, None)
+    assert sender.stats["send_errors"] >= 2
+    errors = [attempt["error"] for attempt in sender.reports[-1]["attempts"]]
+    assert sum(error is not None for error in errors) >= 2
+
+
+def test_gives_up_when_the_blockhash_expires(tracker):
+    chain = StubChain(drop_rate=1.0)
+    sender = TransactionSender(interval=0.01)
+    last_valid_block_height = chain.block_height + 3
+
+    async def main():
+        return await run_against(chain, tracker, sender, last_valid_block_height=last_valid_block_height)
+
+    signature, outcome = asyncio.run(main())
+    assert outcome == (False, "Transaction expired before it was confirmed")
+    assert signature not in chain.landed
+    assert chain.block_height > last_valid_block_height
+    assert sender.stats["expired"] == 1 and sender.stats["landed"] == 0
+    assert len(sender.reports[-1]["attempts"]) > 1
+
+
+def test_rejected_first_send_raises_and_is_not_tracked(tracker):
+    async def reject(method, params):
+        return web.json_response({"jsonrpc": "2.0", "id": 1, "error": {"code": -32002, "message": "blockhash not found"}})
+
+    sender = TransactionSender(interval=0.01)
+
+    async def main():
+        async with stub_server(rpc_app(reject)) as url:
+            open_rpc_transport([url], hedge=False)
+            try:
+                raw, signature = signed_transaction()
+                with pytest.raises(RuntimeError, match="blockhash not found"):
+                    await sender.submit(raw, signature)
+            finally:
+                await close_rpc_transport()
+
+    asyncio.run(main())
+    assert tracker.get_stats()["pending"] == 0
+    assert sender.stats["submitted"] == 0
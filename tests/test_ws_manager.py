@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from ws_manager import WsManager
+
+
+class FakeWebsocket:
+    """Records sent requests and acknowledges subscriptions with increasing server ids"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.sent = []
+
+    async def send(self, text):
+        request = json.loads(text)
+        self.sent.append(request)
+        result = 100 + len(self.sent) if request["method"].endswith("Subscribe") else True
+        # The acknowledgement can be handled before send() returns to the caller
+        self.connection._on_message({"jsonrpc": "2.0", "id": request["id"], "result": result})
+
+
+def connected_manager():
+    manager = WsManager(pool_size=1)
+    connection = manager.connections[0]
+    connection._ws = FakeWebsocket(connection)
+    return manager, connection, connection._ws
+
+
+def methods(ws) -> list:
+    return [request["method"] for request in ws.sent]
+
+
+def test_subscription_is_active_even_when_acknowledged_during_send():
+    async def main():
+        manager, connection, ws = connected_manager()
+        listener = manager.subscribe("account", ["address", {}])
+        await asyncio.sleep(0)
+        assert listener.active
+        assert connection._pending == {}
+
+    asyncio.run(main())
+
+
+def test_identical_subscriptions_share_one_server_subscription():
+    async def main():
+        manager, _, ws = connected_manager()
+        first = manager.subscribe("account", ["address", {"commitment": "confirmed"}])
+        second = manager.subscribe("account", ["address", {"commitment": "confirmed"}])
+        await asyncio.sleep(0)
+        manager.unsubscribe(first)
+        await asyncio.sleep(0)
+        assert methods(ws) == ["accountSubscribe"]
+        manager.unsubscribe(second)
+        await asyncio.sleep(0)
+        assert methods(ws) == ["accountSubscribe", "accountUnsubscribe"]
+        assert manager.stats["deduped"] == 1
+
+    asyncio.run(main())
+
+
+def test_signature_resolved_elsewhere_is_unsubscribed():
+    async def main():
+        manager, _, ws = connected_manager()
+        listener = manager.subscribe("signature", ["sig", {"commitment": "confirmed"}])
+        await asyncio.sleep(0)
+        # Resolved by a poll: the server never notified, so it still holds the subscription
+        manager.unsubscribe(listener)
+        await asyncio.sleep(0)
+        assert methods(ws) == ["signatureSubscribe", "signatureUnsubscribe"]
+
+    asyncio.run(main())
+
+
+def test_notified_signature_is_not_unsubscribed():
+    async def main():
+        manager, connection, ws = connected_manager()
+        results = []
+        listener = manager.subscribe("signature", ["sig", {}], callback=results.append)
+        await asyncio.sleep(0)
+        server_id = listener.subscription.server_id
+        connection._on_message({"jsonrpc": "2.0", "method": "signatureNotification",
+                                "params": {"subscription": server_id, "result": {"value": {"err": None}}}})
+        await asyncio.sleep(0)
+        assert results == [{"value": {"err": None}}]
+        assert not listener.active
+        assert methods(ws) == ["signatureSubscribe"]
+
+    asyncio.run(main())
@@ -1,4 +1,30 @@
-import httpx
+import asyncio
+import logging
+
+from cache import TTLCache
+from http_session import get_http_client
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+JUPITER_API_URL = "https://api.jup.ag"
+SOL_MINT = "So11111111111111111111111111111111111111112"
+
+# name/symbol/decimals/created_at rarely change; prices move every block
+METADATA_TTL = 600
+METADATA_STALE_TTL = 86400
+PRICE_TTL = 10
+PRICE_STALE_TTL = 30
+NEGATIVE_TTL = 60
+
+token_metadata_cache = TTLCache(maxsize=5000, ttl=METADATA_TTL, negative_ttl=NEGATIVE_TTL,
+                                stale_ttl=METADATA_STALE_TTL, name="token_metadata")
+token_price_cache = TTLCache(maxsize=5000, ttl=PRICE_TTL, negative_ttl=NEGATIVE_TTL,
+                             stale_ttl=PRICE_STALE_TTL, name="token_price")
+
+# Concurrent lookups of the same mint share one upstream request
+token_metadata_flight = SingleFlight("token_metadata", timeout=10)
+token_price_flight = SingleFlight("token_price", timeout=10)
 
 
 class TokenInfo:
@@ -7,33 +33,79 @@ class TokenInfo:
 
     @staticmethod
     async def get_token_info(token_mint_address):
-        data = {}
-        """Get Token Info"""
-
-        url = f"https://api.jup.ag/tokens/v1/token/{token_mint_address}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            if response.status_code == 200:
-                data = response.json() 
-            else:
-                return {}
-            price_response = await client.get(f"https://api.jup.ag/price/v2?ids={token_mint_address},So11111111111111111111111111111111111111112&vs_Token=So11111111111111111111111111111111111111112")
-            if price_response.status_code == 200:
-                price_data = price_response.json()
-                price_in_usd = price_data['data'][token_mint_address]['price']
-                sol_price = price_data['data']['So11111111111111111111111111111111111111112']['price']
-                price_in_sol = float(price_in_usd) / float(sol_price)
-                
-                data['price_in_usd'] = round(float(price_in_usd), 2)
-                data['price_in_sol'] = round(float(price_in_sol), 6)
-
-                print(data, "final data after price")
-                return data
-            else:
+        """Get Token Info (metadata and price are cached separately)"""
+        metadata, price = await asyncio.gather(
+            token_metadata_cache.get_or_fetch(token_mint_address, lambda: TokenInfo.fetch_token_metadata(token_mint_address)),
+            token_price_cache.get_or_fetch(token_mint_address, lambda: TokenInfo.fetch_token_price(token_mint_address)),
+            return_exceptions=True,
+        )
+        for result in (metadata, price):
+            if isinstance(result, Exception):
+                logger.error(f"Error getting token info for {token_mint_address}: {result}")
                 return {}
-            
+        if not metadata or not price:
+            return {}
+        data = dict(metadata)
+        data.update(price)
+        return data
+
+    @staticmethod
+    async def get_token_metadata(token_mint_address):
+        """Get cached token metadata only (no price lookup); {} if unknown"""
+        try:
+            metadata = await token_metadata_cache.get_or_fetch(
+                token_mint_address, lambda: TokenInfo.fetch_token_metadata(token_mint_address))
+        except Exception as e:
+            logger.error(f"Error getting token metadata for {token_mint_address}: {e}")
+            return {}
+        return dict(metadata) if metadata else {}
+
+    @staticmethod
+    async def fetch_token_metadata(token_mint_address):
+        """Fetch token metadata from Jupiter; None if the mint is unknown"""
+        return await token_metadata_flight.do(token_mint_address, lambda: TokenInfo._fetch_token_metadata(token_mint_address))
+
+    @staticmethod
+    async def _fetch_token_metadata(token_mint_address):
+        client = get_http_client(JUPITER_API_URL)
+        response = await client.get(f"/tokens/v1/token/{token_mint_address}")
+        if response.status_code in (400, 404):
+            return None
+        response.raise_for_status()
+        return response.json() or None
+
+    @staticmethod
+    async def fetch_token_price(token_mint_address):
+        """Fetch the token price in USD and SOL; None if Jupiter has no price for it"""
+        return await token_price_flight.do(token_mint_address, lambda: TokenInfo._fetch_token_price(token_mint_address))
+
+    @staticmethod
+    async def _fetch_token_price(token_mint_address):
+        client = get_http_client(JUPITER_API_URL)
+        response = await client.get("/price/v2", params={"ids": f"{token_mint_address},{SOL_MINT}", "vs_Token": SOL_MINT})
+        response.raise_for_status()
+        price_data = response.json()['data']
+        token_price = price_data.get(token_mint_address)
+        sol_price = price_data.get(SOL_MINT)
+        if not token_price or not sol_price:
+            return None
+        price_in_usd = float(token_price['price'])
+        price_in_sol = price_in_usd / float(sol_price['price'])
+        return {
+            'price_in_usd': round(price_in_usd, 2),
+            'price_in_sol': round(price_in_sol, 6),
+        }
+
+    @staticmethod
+    def cache_stats():
+        """Hit/miss/eviction counters for the token caches"""
+        return {
+            token_metadata_cache.name: token_metadata_cache.get_stats(),
+            token_price_cache.name: token_price_cache.get_stats(),
+            "token_metadata_flight": token_metadata_flight.get_stats(),
+            "token_price_flight": token_price_flight.get_stats(),
+        }
 
-            
     @staticmethod
     def convert_price_to_string(price):
         # Price is a float number, convert it to a string
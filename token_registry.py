@@ -0,0 +1,286 @@
+import asyncio
+import bisect
+import difflib
+import json
+import logging
+import os
+import sys
+import time
+from typing import NamedTuple
+
+from http_session import get_http_client
+from tokenInfo import JUPITER_API_URL
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = "token_registry.json"
+# Pull newly listed tokens often, reload the full list daily
+INCREMENTAL_REFRESH_INTERVAL = 300
+FULL_REFRESH_INTERVAL = 86400
+NEW_TOKENS_PAGE_SIZE = 100
+MAX_NEW_TOKEN_PAGES = 20
+VERIFIED_TAGS = {"verified", "strict", "community"}
+
+
+class TokenRecord(NamedTuple):
+    mint: str
+    symbol: str
+    name: str
+    decimals: int
+    verified: bool
+    daily_volume: float
+
+
+def _rank(record: TokenRecord):
+    # Verified tokens first, then by traded volume, so "$BONK" resolves to the real BONK
+    return (not record.verified, -record.daily_volume)
+
+
+def _record_from_api(token: dict) -> TokenRecord:
+    tags = token.get("tags") or []
+    return TokenRecord(
+        mint=token["address"],
+        symbol=sys.intern(token.get("symbol") or ""),
+        name=token.get("name") or "",
+        decimals=int(token.get("decimals") or 0),
+        verified=any(tag in VERIFIED_TAGS for tag in tags),
+        daily_volume=float(token.get("daily_volume") or 0),
+    )
+
+
+class TokenRegistry:
+    """
+    In-memory index of the Jupiter token list.
+    Exact mint, case-insensitive symbol and prefix lookups are plain dict/bisect operations.
+    A snapshot on disk lets startup serve lookups before the network download finishes.
+    """
+
+    def __init__(self, snapshot_path: str = SNAPSHOT_PATH,
+                 incremental_interval: float = INCREMENTAL_REFRESH_INTERVAL,
+                 full_interval: float = FULL_REFRESH_INTERVAL):
+        self.snapshot_path = snapshot_path
+        self.incremental_interval = incremental_interval
+        self.full_interval = full_interval
+        self._by_mint = {}
+        self._by_symbol = {}  # lowercase symbol -> [mint, ...] best ranked first
+        self._symbol_keys = []  # sorted lowercase symbols for prefix search
+        self._etag = None
+        self._last_full_refresh = 0.0
+        self._task = None
+        self.loaded = asyncio.Event()
+
+    def __len__(self):
+        return len(self._by_mint)
+
+    def __contains__(self, mint):
+        return mint in self._by_mint
+
+    # Lookups
+
+    def get(self, mint: str) -> TokenRecord:
+        """Exact mint lookup"""
+        return self._by_mint.get(mint)
+
+    def find_by_symbol(self, symbol: str) -> list:
+        """All tokens with this symbol (case-insensitive), best ranked first"""
+        mints = self._by_symbol.get(symbol.lstrip("$").lower(), ())
+        return [self._by_mint[mint] for mint in mints]
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> list:
+        """Exact symbol matches, then symbol prefix matches, then (optionally) close spellings"""
+        key = query.strip().lstrip("$").lower()
+        if not key:
+            return []
+        results = self.find_by_symbol(key)
+        seen = {record.mint for record in results}
+
+        prefixed = []
+        start = bisect.bisect_left(self._symbol_keys, key)
+        for symbol in self._symbol_keys[start:]:
+            if not symbol.startswith(key) or len(prefixed) >= limit * 4:
+                break
+            if symbol != key:
+                prefixed.extend(self._by_mint[mint] for mint in self._by_symbol[symbol])
+        prefixed.sort(key=_rank)
+        for record in prefixed:
+            if record.mint not in seen:
+                results.append(record)
+                seen.add(record.mint)
+
+        # Fuzzy matching scans every symbol, so it only runs when nothing else matched
+        if fuzzy and not results:
+            for symbol in difflib.get_close_matches(key, self._symbol_keys, n=limit, cutoff=0.75):
+                results.extend(self._by_mint[mint] for mint in self._by_symbol[symbol])
+        return results[:limit]
+
+    def resolve(self, text: str) -> str:
+        """Turn user input (mint address or symbol) into a mint address, None if unknown"""
+        text = text.strip()
+        if text in self._by_mint:
+            return text
+        matches = self.find_by_symbol(text)
+        return matches[0].mint if matches else None
+
+    def all_tokens(self) -> list:
+        return list(self._by_mint.values())
+
+    # Index maintenance
+
+    def _add(self, record: TokenRecord):
+        previous = self._by_mint.get(record.mint)
+        if previous is not None and previous.symbol.lower() != record.symbol.lower():
+            self._remove_symbol(previous)
+        self._by_mint[record.mint] = record
+        key = record.symbol.lower()
+        mints = self._by_symbol.get(key)
+        if mints is None:
+            self._by_symbol[key] = [record.mint]
+            bisect.insort(self._symbol_keys, key)
+        else:
+            if record.mint not in mints:
+                mints.append(record.mint)
+            mints.sort(key=lambda mint: _rank(self._by_mint[mint]))
+
+    def _remove_symbol(self, record: TokenRecord):
+        key = record.symbol.lower()
+        mints = self._by_symbol.get(key)
+        if not mints:
+            return
+        if record.mint in mints:
+            mints.remove(record.mint)
+        if not mints:
+            del self._by_symbol[key]
+            index = bisect.bisect_left(self._symbol_keys, key)
+            if index < len(self._symbol_keys) and self._symbol_keys[index] == key:
+                del self._symbol_keys[index]
+
+    @staticmethod
+    def _build_index(records) -> tuple:
+        """Whole index for records; pure, so it can run in a worker thread"""
+        by_mint = {record.mint: record for record in records}
+        by_symbol = {}
+        for record in sorted(by_mint.values(), key=_rank):
+            by_symbol.setdefault(record.symbol.lower(), []).append(record.mint)
+        return by_mint, by_symbol, sorted(by_symbol)
+
+    def _replace(self, index):
+        """Swap in an index from _build_index (snapshot loads and full refreshes)"""
+        self._by_mint, self._by_symbol, self._symbol_keys = index
+
+    # Persistence
+
+    async def load_snapshot(self) -> bool:
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            snapshot, index = await asyncio.to_thread(self._read_snapshot)
+        except Exception as e:
+            logger.error(f"Could not load token registry snapshot: {e}")
+            return False
+        self._replace(index)
+        self._etag = snapshot.get("etag")
+        self._last_full_refresh = snapshot.get("saved_at", 0.0)
+        logger.info(f"Loaded {len(self._by_mint)} tokens from {self.snapshot_path}")
+        return True
+
+    def _read_snapshot(self) -> tuple:
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        records = [TokenRecord(mint, sys.intern(symbol), name, decimals, bool(verified), volume)
+                   for mint, symbol, name, decimals, verified, volume in snapshot["tokens"]]
+        return snapshot, self._build_index(records)
+
+    def save_snapshot(self):
+        snapshot = {
+            "etag": self._etag,
+            "saved_at": self._last_full_refresh,
+            "tokens": [list(record) for record in self._by_mint.values()],
+        }
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, self.snapshot_path)
+
+    # Refresh
+
+    async def refresh_full(self) -> bool:
+        """Download the full token list; a matching ETag skips the download"""
+        client = get_http_client(JUPITER_API_URL)
+        headers = {"If-None-Match": self._etag} if self._etag else {}
+        response = await client.get("/tokens/v1/all", headers=headers, timeout=60)
+        if response.status_code == 304:
+            self._last_full_refresh = time.time()
+            return False
+        # A failed download is retried on the next pass, not after a full interval
+        response.raise_for_status()
+        # The list is several MB of JSON; parsing and indexing it would stall the event loop
+        self._replace(await asyncio.to_thread(self._parse_full, response.content))
+        self._etag = response.headers.get("etag")
+        self._last_full_refresh = time.time()
+        await asyncio.to_thread(self.save_snapshot)
+        logger.info(f"Token registry refreshed: {len(self._by_mint)} tokens")
+        return True
+
+    @classmethod
+    def _parse_full(cls, content: bytes) -> tuple:
+        return cls._build_index(_record_from_api(token) for token in json.loads(content) if token.get("address"))
+
+    async def refresh_incremental(self) -> int:
+        """Page through recently listed tokens until we reach ones we already know"""
+        client = get_http_client(JUPITER_API_URL)
+        added = 0
+        for page in range(MAX_NEW_TOKEN_PAGES):
+            response = await client.get("/tokens/v1/new", params={
+                "limit": NEW_TOKENS_PAGE_SIZE,
+                "offset": page * NEW_TOKENS_PAGE_SIZE,
+            })
+            response.raise_for_status()
+            tokens = response.json()
+            known = 0
+            for token in tokens:
+                if not token.get("mint") and not token.get("address"):
+                    continue
+                token.setdefault("address", token.get("mint"))
+                if token["address"] in self._by_mint:
+                    known += 1
+                    continue
+                self._add(_record_from_api(token))
+                added += 1
+            if len(tokens) < NEW_TOKENS_PAGE_SIZE or known == len(tokens):
+                break
+        if added:
+            logger.info(f"Token registry: {added} new tokens")
+        return added
+
+    async def start(self):
+        """Serve the disk snapshot right away and refresh from Jupiter in the background"""
+        if await self.load_snapshot():
+            self.loaded.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._by_mint:
+            await asyncio.to_thread(self.save_snapshot)
+
+    async def _run(self):
+        while True:
+            try:
+                if not self._by_mint or time.time() - self._last_full_refresh >= self.full_interval:
+                    await self.refresh_full()
+                else:
+                    await self.refresh_incremental()
+                self.loaded.set()
+            except Exception as e:
+                logger.error(f"Token registry refresh failed: {e}")
+            await asyncio.sleep(self.incremental_interval)
+
+
+token_registry = TokenRegistry()
@@ -0,0 +1,56 @@
+from solders.keypair import Keypair # type: ignore
+from solders.message import from_bytes_versioned, to_bytes_versioned # type: ignore
+
+# Serialized (legacy or v0) transactions are a shortvec signature count, the
+# 64-byte signatures, then the message. These helpers work on those bytes so a
+# transaction is never fully deserialized just to be signed.
+
+SIGNATURE_LENGTH = 64
+
+
+def decode_shortvec(data, offset: int = 0) -> tuple:
+    """Compact-u16 at offset: (value, bytes used)"""
+    value = 0
+    for size in range(3):
+        byte = data[offset + size]
+        value |= (byte & 0x7F) << (7 * size)
+        if not byte & 0x80:
+            return value, size + 1
+    raise ValueError("Invalid shortvec length")
+
+
+def signature_count(raw) -> int:
+    return decode_shortvec(raw)[0]
+
+
+def message_offset(raw) -> int:
+    count, size = decode_shortvec(raw)
+    return size + count * SIGNATURE_LENGTH
+
+
+def parse_message(raw):
+    """The transaction's message as a solders (legacy or v0) message"""
+    return from_bytes_versioned(bytes(raw[message_offset(raw):]))
+
+
+def replace_message(raw, message) -> bytes:
+    """Same signature slots with a new message; only valid before signing"""
+    return bytes(raw[:message_offset(raw)]) + to_bytes_versioned(message)
+
+
+def sign_transaction(raw, keypair: Keypair, signatures=()) -> tuple:
+    """
+    Sign an unsigned serialized transaction as its fee payer: (signed bytes, payer signature).
+    The message bytes are signed as they are, and the signatures are written into
+    their slots in one copy of the buffer; signatures fills the slots after the payer's.
+    """
+    count, size = decode_shortvec(raw)
+    offset = size + count * SIGNATURE_LENGTH
+    signed = bytearray(raw)
+    signature = keypair.sign_message(bytes(signed[offset:]))
+    for index, value in enumerate((signature, *signatures)):
+        if index >= count:
+            raise ValueError(f"Transaction only has {count} signature slots")
+        start = size + index * SIGNATURE_LENGTH
+        signed[start:start + SIGNATURE_LENGTH] = bytes(value)
+    return signed, signature
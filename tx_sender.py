@@ -0,0 +1,159 @@
+import asyncio
+import base64
+import logging
+import time
+from collections import deque
+
+from confirmation_tracker import confirmation_tracker
+from rate_limiter import Priority, request_priority
+from rpc_transport import rpc_broadcast, rpc_request
+
+logger = logging.getLogger(__name__)
+
+REBROADCAST_INTERVAL = 0.3
+# Upper bound on sends per transaction; blockhash expiry normally ends the loop first
+MAX_ATTEMPTS = 300
+RECENT_REPORTS = 100
+
+
+class TransactionSender:
+    """
+    Sends a signed transaction and keeps rebroadcasting the same bytes every
+    `interval` seconds (to every healthy RPC endpoint when fanout is on) until the
+    confirmation tracker sees the signature or its blockhash expires.
+    Each finished send leaves a report with send-to-land latency per attempt.
+    """
+
+    def __init__(self, interval: float = REBROADCAST_INTERVAL, fanout: bool = True,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.interval = interval
+        self.fanout = fanout
+        self.max_attempts = max_attempts
+        self._inflight = {}  # signature -> rebroadcast task
+        self.reports = deque(maxlen=RECENT_REPORTS)
+        self.stats = {
+            "submitted": 0,
+            "landed": 0,
+            "failed": 0,
+            "expired": 0,
+            "attempts": 0,
+            "send_errors": 0,
+        }
+
+    async def submit(self, raw_transaction: bytes, signature: str, last_valid_block_height: int = None,
+                     commitment: str = "confirmed", tag: str = None, callback=None) -> str:
+        """
+        Send once and keep rebroadcasting in the background.
+        tag groups landing latency in get_stats() (e.g. to compare send strategies);
+        callback(signature, success, error) is passed on to the confirmation tracker.
+        Raises RuntimeError if no endpoint accepted the first send.
+        """
+        encoded = base64.b64encode(raw_transaction).decode()
+        started = time.monotonic()
+        attempts = []
+        if not await self._send(encoded, attempts, started):
+            raise RuntimeError(f"Transaction {signature} was rejected: {attempts[-1]['error']}")
+        self.stats["submitted"] += 1
+        outcome = confirmation_tracker.register(
+            signature, last_valid_block_height=last_valid_block_height, commitment=commitment, callback=callback)
+        task = asyncio.create_task(self._rebroadcast(encoded, signature, outcome, attempts, started, tag))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[signature] = task
+        return signature
+
+    async def _send(self, encoded: str, attempts: list, started: float) -> bool:
+        """One round of sends; True if at least one endpoint accepted it"""
+        params = [encoded, {"encoding": "base64", "skipPreflight": True, "maxRetries": 0}]
+        sent_at = time.monotonic()
+        if self.fanout:
+            results = await rpc_broadcast("sendTransaction", params)
+        else:
+            try:
+                results = [(None, await rpc_request("sendTransaction", params))]
+            except Exception as e:
+                results = [(None, e)]
+        accepted = False
+        for url, result in results:
+            error = str(result) if isinstance(result, Exception) else None
+            accepted = accepted or error is None
+            self.stats["attempts"] += 1
+            if error is not None:
+                self.stats["send_errors"] += 1
+            attempts.append({
+                "attempt": len(attempts) + 1,
+                "endpoint": url,
+                "sent_ms": round((sent_at - started) * 1000, 1),
+                "error": error,
+            })
+        return accepted
+
+    async def _rebroadcast(self, encoded: str, signature: str, outcome: asyncio.Future,
+                           attempts: list, started: float, tag: str = None):
+        # Repeats must not hold up first sends of other transactions or their confirmations
+        request_priority.set(Priority.REBROADCAST)
+        try:
+            while not outcome.done() and len(attempts) < self.max_attempts:
+                done, _ = await asyncio.wait({outcome}, timeout=self.interval)
+                if done:
+                    break
+                try:
+                    await self._send(encoded, attempts, started)
+                except Exception as e:
+                    # One bad round must not end the loop; the next one may get through
+                    self.stats["send_errors"] += 1
+                    logger.warning(f"Rebroadcast of {signature} failed: {e}")
+            success, error = await outcome
+        finally:
+            self._inflight.pop(signature, None)
+
+        landed_at = time.monotonic()
+        if success:
+            self.stats["landed"] += 1
+        elif isinstance(error, str):
+            self.stats["expired"] += 1
+        else:
+            self.stats["failed"] += 1
+        for attempt in attempts:
+            # Time from this send until the tracker saw the transaction land (or give up)
+            attempt["land_latency_ms"] = round((landed_at - started) * 1000 - attempt["sent_ms"], 1)
+        report = {
+            "signature": signature,
+            "tag": tag,
+            "success": success,
+            "error": error if error is None or isinstance(error, str) else str(error),
+            "attempts": attempts,
+            "send_to_land_ms": round((landed_at - started) * 1000, 1),
+        }
+        self.reports.append(report)
+        logger.info(f"Transaction {signature} {'landed' if success else 'did not land'} after "
+                    f"{len(attempts)} sends in {report['send_to_land_ms']}ms")
+
+    async def stop(self):
+        """Stop rebroadcasting; the tracker still resolves the outcomes"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["inflight"] = len(self._inflight)
+        landed = [report["send_to_land_ms"] for report in self.reports if report["success"]]
+        stats["avg_send_to_land_ms"] = round(sum(landed) / len(landed), 1) if landed else None
+        by_tag = {}
+        for report in self.reports:
+            if report["tag"] is not None:
+                by_tag.setdefault(report["tag"], []).append(report)
+        stats["by_tag"] = {
+            tag: {
+                "sent": len(reports),
+                "landed": sum(report["success"] for report in reports),
+                "avg_send_to_land_ms": round(sum(r["send_to_land_ms"] for r in reports if r["success"])
+                                             / max(1, sum(r["success"] for r in reports)), 1),
+            }
+            for tag, reports in by_tag.items()
+        }
+        return stats
+
+
+tx_sender = TransactionSender()
@@ -1,97 +1,152 @@
-import json
+import asyncio
 import base58
 import base64
 import logging
 from datetime import datetime
-from solders import message
 from solders.keypair import Keypair # type: ignore
-from solders.transaction import VersionedTransaction # type: ignore
-from solders.signature import Signature # type: ignore
 from solana.rpc.async_api import AsyncClient
-from solana.rpc.commitment import Processed, Finalized
-from solana.rpc.types import TxOpts
-from solders.pubkey import Pubkey # type: ignore
-from spl.token.instructions import get_associated_token_address
-from solders.pubkey import Pubkey # type: ignore
+from solana.rpc.types import TokenAccountOpts
+
+from balance_cache import balance_cache
+from balance_history import balance_history
+from balances import TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID
+from blockhash_cache import blockhash_cache
+from cache import TTLCache
+from confirmation_tracker import confirmation_tracker
+from price_ticker import price_ticker
+from rpc_transport import get_rpc_client
+from singleflight import SingleFlight
+from tokenInfo import SOL_MINT
+from token_registry import token_registry
+from tx_codec import sign_transaction
+from tx_sender import tx_sender
 
 # Setup logging configuration
 logger = logging.getLogger(__name__)
 
+# Concurrent balance/decimals lookups for the same (owner, mint) share one RPC call
+balance_flight = SingleFlight("token_balance", timeout=15)
+
+# Short-lived per-wallet portfolio snapshots so menu navigation does not hammer RPC
+PORTFOLIO_TTL = 15
+portfolio_cache = TTLCache(maxsize=1000, ttl=PORTFOLIO_TTL, name="portfolio")
+
 class Wallet():
     
-    def __init__(self, rpc_url: str, private_key: str):
+    def __init__(self, rpc_url: str, private_key: str, client: AsyncClient = None):
         self.wallet = Keypair.from_bytes(base58.b58decode(private_key))
-        self.client = AsyncClient(endpoint=rpc_url,commitment=Finalized)
-        self.balance_history = {}
+        # A wallet only carries its keypair; RPC calls go through the shared transport
+        self.client = client if client is not None else get_rpc_client(rpc_url)
 
 
     async def get_token_balance(self, token_mint_account: str) -> dict:
         """Get the wallet token balance"""
-        if token_mint_account == self.wallet.pubkey().__str__(): #If it is SoL
-            get_token_balance = await self.client.get_balance(pubkey=self.wallet.pubkey())
-            token_balance = {
-                'decimals': 9,
-                'balance': {
-                    'int': get_token_balance.value,
-                    'float': float(get_token_balance.value / 10 ** 9)
-                }
-            }
-        else: #If it is a token
-            token_mint_account = get_associated_token_address(owner=self.wallet.pubkey(), mint=Pubkey.from_string(token_mint_account))
-            get_token_balance = await self.client.get_token_account_balance(pubkey=token_mint_account)
-            try:
-                token_balance = {
-                    'decimals': int(get_token_balance.value.decimals),
-                    'balance': {
-                        'int': get_token_balance.value.amount,
-                        'float': float(get_token_balance.value.amount) / 10 ** int(get_token_balance.value.decimals)
-                    }
-                }
-            except AttributeError: #If the token account does not exist
-                token_balance = {
-                    'decimals': 0,
-                    'balance': {
-                        'int': 0,
-                        'float':0
-                    }
-                }
-        
-        return token_balance
+        key = (self.wallet.pubkey().__str__(), token_mint_account)
+        return await balance_flight.do(key, lambda: self._get_token_balance(token_mint_account))
+
+    async def _get_token_balance(self, token_mint_account: str) -> dict:
+        # Served from memory while the account subscription is live
+        return await balance_cache.get(self.wallet.pubkey().__str__(), token_mint_account, client=self.client)
+
+    async def get_token_balances(self, token_mint_accounts: list) -> dict:
+        """Get balances for many mints in one batched RPC round trip, keyed by mint"""
+        owner = self.wallet.pubkey().__str__()
+        balances = await balance_cache.get_many([(owner, mint) for mint in token_mint_accounts], client=self.client)
+        return {mint: balances[(owner, mint)] for mint in token_mint_accounts}
     
     
-    async def sign_send_transaction(self, transaction_data: str, signatures_list: list=None, print_link: bool=True):
+    async def get_portfolio(self) -> dict:
+        """Valued snapshot of everything the wallet holds (cached per wallet for a few seconds)"""
+        owner = self.wallet.pubkey().__str__()
+        return await portfolio_cache.get_or_fetch(owner, self._fetch_portfolio)
+
+    async def _fetch_portfolio(self) -> dict:
+        owner = self.wallet.pubkey()
+        sol_balance, *token_accounts = await asyncio.gather(
+            self.client.get_balance(pubkey=owner),
+            self.client.get_token_accounts_by_owner_json_parsed(owner, TokenAccountOpts(program_id=TOKEN_PROGRAM_ID)),
+            self.client.get_token_accounts_by_owner_json_parsed(owner, TokenAccountOpts(program_id=TOKEN_2022_PROGRAM_ID)),
+        )
+
+        # mint -> (raw amount, decimals), summing multiple accounts of the same mint
+        amounts = {SOL_MINT: (sol_balance.value, 9)}
+        for response in token_accounts:
+            for keyed_account in response.value:
+                info = keyed_account.account.data.parsed['info']
+                token_amount = info['tokenAmount']
+                raw_amount = int(token_amount['amount'])
+                if raw_amount == 0:
+                    continue
+                previous = amounts.get(info['mint'], (0, 0))[0]
+                amounts[info['mint']] = (previous + raw_amount, int(token_amount['decimals']))
+
+        prices = await price_ticker.get_or_fetch_prices(amounts)
+        holdings = []
+        for mint, (raw_amount, decimals) in amounts.items():
+            record = token_registry.get(mint)
+            amount = raw_amount / 10 ** decimals
+            price = prices.get(mint, 0)
+            holdings.append({
+                'mint': mint,
+                'symbol': 'SOL' if mint == SOL_MINT else (record.symbol if record else 'Unknown'),
+                'name': 'Solana' if mint == SOL_MINT else (record.name if record else 'Unknown Token'),
+                'decimals': decimals,
+                'amount': amount,
+                'price_usd': price,
+                'value_usd': amount * price,
+            })
+        holdings.sort(key=lambda holding: holding['value_usd'], reverse=True)
+        return {
+            'owner': str(owner),
+            'holdings': holdings,
+            'total_usd': sum(holding['value_usd'] for holding in holdings),
+            'fetched_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+    
+    async def sign_send_transaction(self, transaction_data, signatures_list: list=None, print_link: bool=True, tag: str=None,
+                                    last_valid_block_height: int=None):
+        """Sign and send transaction, return transaction hash (False if it could not be sent)"""
         try:
-            """Sign and send transaction, return transaction hash"""
-            signatures = []
-            raw_transaction = VersionedTransaction.from_bytes(base64.b64decode(transaction_data))
-            signature = self.wallet.sign_message(message.to_bytes_versioned(raw_transaction.message))
-            signatures.append(signature)
-            if signatures_list:
-                for signature in signatures_list:
-                    signatures.append(signature)
-            signed_txn = VersionedTransaction.populate(raw_transaction.message, signatures)
-            opts = TxOpts(skip_preflight=True, preflight_commitment=Processed)
-            result = await self.client.send_raw_transaction(txn=bytes(signed_txn), opts=opts)
-            transaction_hash = json.loads(result.to_json())['result']
-            if print_link is True:
-                print(f"Transaction sent: https://explorer.solana.com/tx/{transaction_hash}")
-            return transaction_hash
+            return await self.sign_and_submit(transaction_data, signatures_list, print_link, tag, last_valid_block_height)
         except Exception as e:
             print(e)
             return False
 
+    async def sign_and_submit(self, transaction_data, signatures_list: list=None, print_link: bool=True, tag: str=None,
+                              last_valid_block_height: int=None, callback=None) -> str:
+        """
+        Sign and send a serialized transaction (bytes or base64) and return its signature;
+        it is rebroadcast until it lands or expires. Raises if no endpoint accepted it.
+        callback(signature, success, error) runs when the confirmation tracker resolves it.
+        """
+        raw_transaction = base64.b64decode(transaction_data) if isinstance(transaction_data, str) else transaction_data
+        # Signed on the wire bytes; the transaction is never deserialized
+        signed_txn, signature = sign_transaction(raw_transaction, self.wallet, signatures_list or ())
+        if last_valid_block_height is None:
+            # The cached lastValidBlockHeight is at least as late as the one the swap was built with
+            latest = blockhash_cache.latest()
+            last_valid_block_height = latest[1] if latest else None
+        transaction_hash = await tx_sender.submit(
+            signed_txn,
+            str(signature),
+            last_valid_block_height=last_valid_block_height,
+            tag=tag,
+            callback=callback,
+        )
+        if print_link is True:
+            print(f"Transaction sent: https://explorer.solana.com/tx/{transaction_hash}")
+        return transaction_hash
+
     async def get_status_transaction(self, transaction_hash: str):
-        """Get the transaction status"""
+        """Get the transaction status from the shared confirmation tracker"""
         try:
-            get_transaction_details = await self.client.confirm_transaction(
-                tx_sig=Signature.from_string(transaction_hash),
-                sleep_seconds=3,
-                last_valid_block_height=json.loads((await self.client.get_latest_blockhash()).to_json())["result"]["value"]["lastValidBlockHeight"],
-                commitment=Processed
+            # The cached lastValidBlockHeight is at least as late as the one the swap was built with
+            latest = blockhash_cache.latest()
+            success, transaction_status = await confirmation_tracker.wait(
+                transaction_hash,
+                last_valid_block_height=latest[1] if latest else None,
             )
-            transaction_status = get_transaction_details.value[0].err
-            
-            if transaction_status is None:
+            if success:
                 print("Transaction Status SUCCESS!")
                 return (True,transaction_status)
             else:
@@ -105,45 +160,23 @@ class Wallet():
     async def track_balance_changes(self, token_mint_account: str = None):
         """
         Track changes in wallet balance for SOL or a specific token
-        Returns a tuple (current_balance, change_percentage, is_increase) if there was a previous balance
-        Returns just the current balance if this is the first check
+        Returns a tuple (current_balance, change_percentage, is_increase) against the previous sample
+        The history is kept per (wallet, mint) in balance_history, so it outlives this object
         """
         try:
-            if token_mint_account is None or token_mint_account == self.wallet.pubkey().__str__():
+            owner = self.wallet.pubkey().__str__()
+            if token_mint_account is None or token_mint_account == owner:
                 # Track SOL balance
-                token_key = "SOL"
-                balance_data = await self.get_token_balance(self.wallet.pubkey().__str__())
+                mint = SOL_MINT
+                balance_data = await self.get_token_balance(owner)
             else:
                 # Track token balance
-                token_key = token_mint_account
+                mint = token_mint_account
                 balance_data = await self.get_token_balance(token_mint_account)
             
-            current_balance = balance_data['balance']['float']
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Store the current balance with timestamp
-            if token_key not in self.balance_history:
-                self.balance_history[token_key] = []
-            
-            self.balance_history[token_key].append({
-                "timestamp": current_time,
-                "balance": current_balance
-            })
-            
-            # Keep only last 20 records to avoid memory bloat
-            if len(self.balance_history[token_key]) > 20:
-                self.balance_history[token_key].pop(0)
-            
-            # Calculate change if we have previous data
-            if len(self.balance_history[token_key]) > 1:
-                previous_balance = self.balance_history[token_key][-2]["balance"]
-                if previous_balance > 0:
-                    change_percentage = ((current_balance - previous_balance) / previous_balance) * 100
-                    is_increase = current_balance > previous_balance
-                    return (current_balance, change_percentage, is_increase)
-            
-            return (current_balance, 0, False)
+            await balance_history.record(owner, mint, balance_data['balance']['float'])
+            return await balance_history.change(owner, mint)
         
         except Exception as e:
             logger.error(f"Error tracking balance: {e}", exc_info=True)
-            return (0, 0, False)
\ No newline at end of file
+            return (0, 0, False)
@@ -0,0 +1,289 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+try:
+    import websockets
+except ImportError:  # without websockets every subscriber falls back to polling
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+# kind -> (subscribe method, unsubscribe method, notification method)
+SUBSCRIPTION_METHODS = {
+    "account": ("accountSubscribe", "accountUnsubscribe", "accountNotification"),
+    "program": ("programSubscribe", "programUnsubscribe", "programNotification"),
+    "signature": ("signatureSubscribe", "signatureUnsubscribe", "signatureNotification"),
+    "logs": ("logsSubscribe", "logsUnsubscribe", "logsNotification"),
+    "slot": ("slotSubscribe", "slotUnsubscribe", "slotNotification"),
+}
+NOTIFICATION_KINDS = {methods[2]: kind for kind, methods in SUBSCRIPTION_METHODS.items()}
+# The node drops these after the first notification
+ONE_SHOT_KINDS = frozenset({"signature"})
+
+POOL_SIZE = 1
+PING_INTERVAL = 20
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+
+class Subscription:
+    """One server-side subscription, shared by every listener asking for the same thing"""
+
+    __slots__ = ("kind", "params", "key", "listeners", "connection", "server_id", "active_since", "notified")
+
+    def __init__(self, kind: str, params: list, key):
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.listeners = []
+        self.connection = None
+        self.server_id = None
+        self.active_since = None
+        self.notified = False  # a one-shot subscription the server already closed by notifying
+
+    @property
+    def active(self) -> bool:
+        return self.server_id is not None and self.connection is not None and self.connection.connected
+
+
+class Listener:
+    """Handle returned by WsManager.subscribe; notifications go to its callback and/or queue"""
+
+    __slots__ = ("subscription", "callback", "queue")
+
+    def __init__(self, subscription: Subscription, callback=None, queue: asyncio.Queue = None):
+        self.subscription = subscription
+        self.callback = callback
+        self.queue = queue
+
+    @property
+    def active(self) -> bool:
+        """True while notifications are flowing; otherwise the owner should poll"""
+        return self.subscription is not None and self.subscription.active
+
+    @property
+    def active_since(self):
+        """Monotonic time the server acknowledged the current subscription (None if inactive)"""
+        return self.subscription.active_since if self.active else None
+
+    def dispatch(self, result):
+        if self.callback is not None:
+            try:
+                self.callback(result)
+            except Exception as e:
+                logger.error(f"Websocket listener callback failed: {e}")
+        if self.queue is not None:
+            self.queue.put_nowait(result)
+
+
+class WsConnection:
+    """One websocket; replays all of its subscriptions after every reconnect"""
+
+    def __init__(self, manager: "WsManager", index: int):
+        self.manager = manager
+        self.index = index
+        self.subscriptions = set()
+        self._by_server_id = {}
+        self._pending = {}  # request id -> Subscription awaiting its server id
+        self._ids = itertools.count(1)
+        self._ws = None
+        self._task = None
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None
+
+    def add(self, subscription: Subscription):
+        subscription.connection = self
+        self.subscriptions.add(subscription)
+        if self.connected:
+            self._spawn(self._subscribe(subscription))
+
+    def remove(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+        if subscription.server_id is not None:
+            self._by_server_id.pop(subscription.server_id, None)
+            # The server only drops a one-shot subscription itself once it has notified
+            if self.connected and not subscription.notified:
+                unsubscribe = SUBSCRIPTION_METHODS[subscription.kind][1]
+                self._spawn(self._send(unsubscribe, [subscription.server_id]))
+        subscription.server_id = None
+        subscription.notified = False
+        subscription.connection = None
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _subscribe(self, subscription: Subscription):
+        request_id = next(self._ids)
+        # Registered before sending: the acknowledgement can be handled before send() returns
+        self._pending[request_id] = subscription
+        if await self._send(SUBSCRIPTION_METHODS[subscription.kind][0], subscription.params, request_id) is None:
+            self._pending.pop(request_id, None)
+
+    async def _send(self, method: str, params: list, request_id: int = None):
+        ws = self._ws
+        if ws is None:
+            return None
+        if request_id is None:
+            request_id = next(self._ids)
+        try:
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}))
+        except Exception as e:
+            logger.warning(f"Websocket {self.index} send failed: {e}")
+            return None
+        return request_id
+
+    def _on_message(self, message: dict):
+        if "id" in message:
+            subscription = self._pending.pop(message["id"], None)
+            if subscription is None:
+                return  # unsubscribe acknowledgement
+            if "error" in message:
+                logger.warning(f"{subscription.kind} subscription {subscription.params} failed: {message['error']}")
+                return
+            if subscription.connection is not self:
+                # Everybody left while the request was in flight
+                self._spawn(self._send(SUBSCRIPTION_METHODS[subscription.kind][1], [message["result"]]))
+                return
+            subscription.server_id = message["result"]
+            subscription.active_since = time.monotonic()
+            self._by_server_id[subscription.server_id] = subscription
+            return
+
+        kind = NOTIFICATION_KINDS.get(message.get("method"))
+        if kind is None:
+            return
+        params = message["params"]
+        subscription = self._by_server_id.get(params["subscription"])
+        if subscription is None:
+            return
+        self.manager.stats["notifications"] += 1
+        for listener in list(subscription.listeners):
+            listener.dispatch(params["result"])
+        if kind in ONE_SHOT_KINDS:
+            subscription.notified = True
+            self.manager._discard(subscription)
+
+    async def run(self, url: str):
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async with websockets.connect(url, ping_interval=PING_INTERVAL, max_size=None) as ws:
+                    self._ws = ws
+                    delay = RECONNECT_MIN_DELAY
+                    logger.info(f"Websocket {self.index} connected; resubscribing {len(self.subscriptions)} subscriptions")
+                    for subscription in list(self.subscriptions):
+                        await self._subscribe(subscription)
+                    async for raw in ws:
+                        self._on_message(json.loads(raw))
+            except Exception as e:
+                logger.warning(f"Websocket {self.index} disconnected: {e}")
+            finally:
+                self._ws = None
+                self._pending.clear()
+                self._by_server_id.clear()
+                for subscription in self.subscriptions:
+                    subscription.server_id = None
+                    subscription.active_since = None
+            self.manager.stats["reconnects"] += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+
+class WsManager:
+    """
+    Multiplexes account, program, signature, logs and slot subscriptions for the
+    whole process onto a small pool of RPC websocket connections.
+    Identical subscriptions are shared, and every connection resubscribes
+    transparently after a reconnect.
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.url = None
+        self.connections = [WsConnection(self, i) for i in range(pool_size)]
+        self._subscriptions = {}  # (kind, params) -> Subscription
+        self.stats = {
+            "subscribes": 0,
+            "deduped": 0,
+            "notifications": 0,
+            "reconnects": 0,
+        }
+
+    @property
+    def connected(self) -> bool:
+        return any(connection.connected for connection in self.connections)
+
+    def subscribe(self, kind: str, params: list = None, callback=None, queue: asyncio.Queue = None) -> Listener:
+        """
+        Listen for `kind` notifications (e.g. "account", [address, {...}]).
+        callback(result) runs on the event loop; queue receives the same result.
+        """
+        if kind not in SUBSCRIPTION_METHODS:
+            raise ValueError(f"Unknown subscription kind: {kind}")
+        params = params or []
+        key = (kind, json.dumps(params, sort_keys=True))
+        self.stats["subscribes"] += 1
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            subscription = Subscription(kind, params, key)
+            self._subscriptions[key] = subscription
+            min(self.connections, key=lambda c: len(c.subscriptions)).add(subscription)
+        else:
+            self.stats["deduped"] += 1
+        listener = Listener(subscription, callback, queue)
+        subscription.listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener: Listener):
+        """Stop a listener; the server subscription ends with its last listener"""
+        subscription = listener.subscription
+        if subscription is None:
+            return
+        listener.subscription = None
+        if listener in subscription.listeners:
+            subscription.listeners.remove(listener)
+        if not subscription.listeners:
+            self._discard(subscription)
+
+    def _discard(self, subscription: Subscription):
+        if self._subscriptions.get(subscription.key) is subscription:
+            del self._subscriptions[subscription.key]
+        if subscription.connection is not None:
+            subscription.connection.remove(subscription)
+        for listener in subscription.listeners:
+            listener.subscription = None
+        subscription.listeners.clear()
+
+    async def start(self, url: str):
+        self.url = url
+        if websockets is None:
+            logger.warning("websockets is not installed; subscriptions fall back to polling")
+            return
+        for connection in self.connections:
+            if connection._task is None or connection._task.done():
+                connection._task = asyncio.create_task(connection.run(url))
+
+    async def stop(self):
+        for connection in self.connections:
+            if connection._task is not None:
+                connection._task.cancel()
+                try:
+                    await connection._task
+                except asyncio.CancelledError:
+                    pass
+                connection._task = None
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["connected"] = sum(connection.connected for connection in self.connections)
+        stats["subscriptions"] = len(self._subscriptions)
+        stats["listeners"] = sum(len(s.listeners) for s in self._subscriptions.values())
+        return stats
+
+
+ws_manager = WsManager()